@@ -0,0 +1,4 @@
+"""
+Performance benchmarks of the tournament manager.
+Each module can be run on its own, e.g. python -m benchmarks.bench_pairing
+"""
@@ -0,0 +1,123 @@
+"""
+Compare the swiss pairing engine with the pairing loop it replaced.
+
+The former loop of Tournament.generate_round is reproduced in memory
+(without any database access, which only makes it faster than it was).
+Each size simulates a whole tournament: players are paired, results are
+drawn at random and the next round is paired again.
+
+    python -m benchmarks.bench_pairing --sizes 8 64 600 --rounds 7
+"""
+import argparse
+import itertools
+import random
+import time
+
+from src.pairing import pair_key, pair_round
+
+
+class RetryLoopFailed(Exception):
+    """ Raised when the former loop runs out of players to swap """
+
+
+def legacy_pairing(ranking, possible_games):
+    """Former pairing loop: take the first player, look for the first allowed
+    opponent and start over with the last players swapped when it fails.
+
+    Args:
+        ranking (list): ids of the players, best first
+        possible_games (list): [id, id] of the games not played yet
+
+    Returns:
+        list: games of the round
+    """
+    copy_players = list(ranking)
+    to_reindex = 1
+    while True:
+        match = []
+        try:
+            while len(match) < len(ranking) / 2:
+                player_two = 1
+                while True:
+                    player_one_id = copy_players[0]
+                    player_two_id = copy_players[player_two]
+                    if [player_one_id, player_two_id] in possible_games \
+                            or [player_two_id, player_one_id] in possible_games:
+                        break
+                    player_two += 1
+                copy_players.remove(player_two_id)
+                copy_players.remove(player_one_id)
+                match.append((player_one_id, player_two_id))
+        except IndexError:
+            copy_players = list(ranking)
+            to_reindex += 1
+            if to_reindex > len(ranking):
+                raise RetryLoopFailed()
+            copy_players[-1], copy_players[-to_reindex] = copy_players[-to_reindex], copy_players[-1]
+            continue
+        return match
+
+
+def play(pairs, scores, played, rng):
+    """Draw the results of a round and update scores and played games"""
+    for player_one_id, player_two_id in pairs:
+        result = rng.choice((0, 0.5, 1))
+        scores[player_one_id] += result
+        scores[player_two_id] += 1 - result
+        played.add(pair_key(player_one_id, player_two_id))
+
+
+def run(size, nb_rounds, legacy_max, seed):
+    """Simulate a tournament of the given size with both pairing methods
+
+    Returns:
+        dictionnary: timings in milliseconds
+    """
+    rng = random.Random(seed)
+    elos = {player_id: rng.randint(1000, 2800) for player_id in range(1, size + 1)}
+    scores = dict.fromkeys(elos, 0)
+    played, byes = set(), set()
+    engine, legacy, failures = [], [], 0
+    for _ in range(min(nb_rounds, size - 1)):
+        ranking = sorted(elos, key=lambda x: (scores[x], elos[x]), reverse=True)
+        begin = time.perf_counter()
+        pairs, bye = pair_round(ranking, scores, played, byes)
+        engine.append((time.perf_counter() - begin) * 1000)
+        if size <= legacy_max and size % 2 == 0:
+            possible_games = [list(game) for game in itertools.combinations(ranking, 2)
+                              if pair_key(*game) not in played]
+            begin = time.perf_counter()
+            try:
+                legacy_pairing(ranking, possible_games)
+                legacy.append((time.perf_counter() - begin) * 1000)
+            except RetryLoopFailed:
+                failures += 1
+        if bye is not None:
+            byes.add(bye)
+            scores[bye] += 1
+        play(pairs, scores, played, rng)
+    return {"size": size,
+            "engine_mean_ms": sum(engine) / len(engine),
+            "engine_max_ms": max(engine),
+            "legacy_mean_ms": sum(legacy) / len(legacy) if legacy else None,
+            "legacy_failures": failures}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 16, 32, 64, 128, 301, 600])
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--legacy-max", type=int, default=128,
+                        help="biggest size for which the former loop is run")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    print(f"{'players':>8} {'engine mean':>12} {'engine max':>11} {'legacy mean':>12} {'legacy failures':>16}")
+    for size in args.sizes:
+        result = run(size, args.rounds, args.legacy_max, args.seed)
+        legacy = "-" if result["legacy_mean_ms"] is None else f"{result['legacy_mean_ms']:.2f} ms"
+        print(f"{size:>8} {result['engine_mean_ms']:>9.2f} ms {result['engine_max_ms']:>8.2f} ms "
+              f"{legacy:>12} {result['legacy_failures']:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Time the elo rating of a round, and the replay of all the ratings.
+
+    - rate_period: src.rating alone, on the arrays of a round of the given number of boards
+    - rate_round: Tournament.rate_round on a generated database, reads, computation
+      and batched write of the ratings and of their history included
+    - rate_round again: the same round rated again, as after a corrected result
+    - replay, arrays: src.rating.replay alone, on rounds of random games
+    - replay: Tournament.replay_ratings on a generated database of the given number of
+      matchs, from the first round, then from a corrected round in the middle of the history
+
+    python -m benchmarks.bench_rating --boards 300 --players 20000
+    python -m benchmarks.bench_rating --replay-matchs 1000000 --engine sqlite
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.generator import sizes_for_matchs, write_database
+from src import rating, settings
+
+
+def time_rate_period(boards, repeat, seed):
+    """ Return the median duration in milliseconds of the rating of a round of random games """
+    rng = np.random.default_rng(seed)
+    players = 2 * boards
+    ratings = rng.integers(1000, 2800, players)
+    games = rng.integers(0, 60, players)
+    order = rng.permutation(players)
+    player_one, player_two = order[:boards], order[boards:]
+    score_one = rng.choice([0, 0.5, 1], boards)
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rating.rate_period(ratings, games, player_one, player_two, score_one)
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def time_rate_round(boards, players, repeat, seed):
+    """Rate the round of a generated tournament of 2 * boards players
+
+    Returns:
+        float: duration in milliseconds of the first rating
+        float: median duration in milliseconds of the next ones
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        settings.DB_ENGINE = "tinydb"
+        settings.JSON_DB_PATH = os.path.join(directory, "db.json")
+        write_database(settings.JSON_DB_PATH, players=max(players, 2 * boards), tournaments=1, rounds=1,
+                       tournament_size=2 * boards, seed=seed)
+        # la base est ouverte au premier accès, sur le fichier généré, puis les index sont construits
+        from src.models import Tournament, close_database, transaction
+        Tournament.get_player(1)
+        Tournament.get_rating_history(1)
+        Tournament.get_game_list(1)
+
+        durations = []
+        for _ in range(repeat + 1):
+            start = time.perf_counter()
+            with transaction():
+                Tournament.rate_round(1, 1)
+            durations.append((time.perf_counter() - start) * 1000)
+        close_database()
+    return durations[0], statistics.median(durations[1:])
+
+
+def time_replay_arrays(games, boards, players, seed):
+    """ Return the duration in seconds of src.rating.replay over rounds of random games """
+    rng = np.random.default_rng(seed)
+    ratings = rng.integers(1000, 2800, players + 1)
+    rated_games = np.zeros(players + 1, dtype=np.int64)
+    player_one = rng.integers(1, players + 1, games)
+    player_two = rng.integers(1, players + 1, games)
+    score_one = rng.choice([0, 0.5, 1], games)
+    period_ends = np.append(np.arange(boards, games, boards), games)
+    start = time.perf_counter()
+    for _ in rating.replay(ratings, rated_games, period_ends, player_one, player_two, score_one):
+        pass
+    return time.perf_counter() - start
+
+
+def time_replay(matchs, engine, seed):
+    """Replay the ratings of a generated database
+
+    Returns:
+        float: duration in seconds of the replay of every round, commit included
+        float: duration in seconds of the replay from a corrected round in the middle
+        dictionnary: what the first replay did
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        settings.DB_ENGINE = engine
+        settings.JSON_DB_PATH = os.path.join(directory, "db.json")
+        settings.SQLITE_DB_PATH = os.path.join(directory, "db.sqlite3")
+        write_database(settings.JSON_DB_PATH, seed=seed, **sizes_for_matchs(matchs))
+        from src.models import (INDEXED_FIELDS, SORTED_FIELDS, Tournament, close_database, compact_database, db,
+                                transaction)
+        if engine == "sqlite":
+            from src.sqlite_engine import migrate_json_to_sqlite
+            migrate_json_to_sqlite(settings.JSON_DB_PATH, settings.SQLITE_DB_PATH, INDEXED_FIELDS, SORTED_FIELDS)
+        db.table('matchs').get_by(match_id=1)
+
+        start = time.perf_counter()
+        with transaction():
+            summary = Tournament.replay_ratings()
+        full = time.perf_counter() - start
+        # le journal est fusionné avant la mesure suivante, pas pendant
+        compact_database()
+
+        # un résultat corrigé dans un round du milieu de l'historique
+        game = db.table('matchs').get_by(match_id=matchs // 2)
+        start = time.perf_counter()
+        with transaction():
+            db.table('matchs').update({"score_one": game["score_two"], "score_two": game["score_one"]},
+                                      doc_ids=[game.doc_id])
+            Tournament.replay_ratings(game["round_id"])
+        incremental = time.perf_counter() - start
+        close_database()
+    return full, incremental, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boards", type=int, default=300)
+    parser.add_argument("--players", type=int, default=20000, help="nombre de joueurs de la base")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--replay-matchs", type=int, default=100000, help="nombre de matchs de l'historique recalculé")
+    parser.add_argument("--engine", choices=("tinydb", "sqlite"), default="tinydb")
+    args = parser.parse_args()
+
+    print(f"rate_period, {args.boards} matchs: {time_rate_period(args.boards, args.repeat * 50, args.seed):.3f} ms")
+    first, again = time_rate_round(args.boards, args.players, args.repeat, args.seed)
+    print(f"rate_round, {args.boards} matchs, {args.players} joueurs en base: {first:.2f} ms, "
+          f"puis {again:.2f} ms pour le noter à nouveau")
+    print(f"replay, tableaux seuls, {args.replay_matchs} matchs: "
+          f"{time_replay_arrays(args.replay_matchs, 25, args.replay_matchs // 2, args.seed):.2f} s")
+    full, incremental, summary = time_replay(args.replay_matchs, args.engine, args.seed)
+    print(f"replay, {args.engine}, {summary['games']} matchs en {summary['rounds']} rounds: {full:.2f} s, "
+          f"puis {incremental:.2f} s depuis un round corrigé au milieu de l'historique")
+
+
+if __name__ == "__main__":
+    main()
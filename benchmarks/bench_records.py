@@ -0,0 +1,107 @@
+"""
+Compare the records of src.records with the Item/Field/Collection wrappers they replaced.
+
+For each size, player documents are turned into objects, copied and
+serialized. The time of each step and the memory held by the objects
+(measured with tracemalloc) are printed.
+
+    python -m benchmarks.bench_records --sizes 1000 50000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from copy import deepcopy
+
+from src.records import PlayerRecord
+
+
+class Field:
+    """ Former wrapper of a value, copied from src.models """
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+
+
+class Item:
+    """ Former wrapper of a document, copied from src.models """
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, Field(key, value))
+
+    def to_json(self):
+        item = {}
+        for attr in dir(self):
+            if isinstance(getattr(self, attr), Field):
+                item[attr] = getattr(self, attr).value
+        return json.dumps(item)
+
+
+class Collection:
+    """ Former wrapper of a list of documents, copied from src.models """
+    def __init__(self, data=None):
+        self._items = []
+        for item in data:
+            self._items.append(Item(**item))
+
+    @property
+    def items(self):
+        return self._items
+
+
+def build_documents(nb_of_players):
+    return [{"id": player_id,
+             "firstname": f"Prénom{player_id}",
+             "lastname": f"Nom{player_id}",
+             "birth_date": "01/01/2000",
+             "gender": "M" if player_id % 2 else "F",
+             "elo": 1000 + player_id % 1500}
+            for player_id in range(1, nb_of_players + 1)]
+
+
+def measure(build, documents):
+    """Build the objects and return the time taken and the memory they hold
+
+    Returns:
+        float: seconds
+        integer: bytes
+        list: the objects
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = build(documents)
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed, memory, objects
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare records and Collection")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'players':>8} {'objects':>10} {'build':>10} {'memory':>10} {'copy':>10} {'to_json':>10}")
+    for size in args.sizes:
+        documents = build_documents(size)
+        candidates = (("Collection", lambda data: Collection(data).items, deepcopy),
+                      ("records", PlayerRecord.from_documents, lambda objects: [record.copy() for record in objects]))
+        for name, build, copy in candidates:
+            elapsed, memory, objects = measure(build, documents)
+            copy_time = timed(lambda: copy(objects))
+            json_time = timed(lambda: [item.to_json() for item in objects])
+            print(f"{size:>8} {name:>10} {elapsed * 1000:>8.1f}ms {memory / 1024 / 1024:>8.1f}Mo "
+                  f"{copy_time * 1000:>8.1f}ms {json_time * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
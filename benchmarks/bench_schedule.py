@@ -0,0 +1,90 @@
+"""
+Time the round-robin schedules.
+
+    - round_robin: src.schedule alone, every round of a double round-robin
+    - create: AppController.create_tournament of a tournament in a generated database,
+      the rounds and matchs of a double round-robin saved with it
+    - generate_round: Tournament.generate_round of this tournament, the next saved round
+      started for the double round-robin, the round paired for the swiss tournament
+
+    python -m benchmarks.bench_schedule --players 100
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.generator import write_database
+from src import settings
+from src.schedule import SWISS, round_robin
+
+
+def time_round_robin(players, repeat):
+    """ Return the median duration in milliseconds of the schedule of a double round-robin """
+    player_ids = list(range(1, players + 1))
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        round_robin(player_ids, 2)
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def time_tournament(system, players, rounds, seed):
+    """Create a tournament in a generated database, then generate its rounds
+
+    Returns:
+        float: duration in milliseconds of the creation
+        float: median duration in milliseconds of the generation of a round
+        integer: number of saved rounds
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        settings.DB_ENGINE = "tinydb"
+        settings.JSON_DB_PATH = os.path.join(directory, "db.json")
+        write_database(settings.JSON_DB_PATH, players=players, tournaments=1, rounds=1,
+                       tournament_size=players, seed=seed)
+        from src.controller import AppController
+        from src.models import Tournament, close_database, db, transaction
+        db.table('tournaments').get_by(id=1)
+
+        start = time.perf_counter()
+        tournament_id = AppController.create_tournament({"name": "Bench", "location": "Paris", "description": "",
+                                                         "players": list(range(1, players + 1)),
+                                                         "game_rules": "blitz", "nb_rounds": rounds,
+                                                         "system": system})
+        create = (time.perf_counter() - start) * 1000
+
+        durations = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            with transaction():
+                Tournament.generate_round(tournament_id)
+            durations.append((time.perf_counter() - start) * 1000)
+            # les matchs du round sont marqués nuls pour que le suivant puisse commencer
+            with transaction():
+                games, round_id = Tournament.get_game_list(tournament_id)
+                Tournament.enter_round_results(tournament_id, round_id,
+                                               [(game.match_id, 0.5, 0.5) for game in games])
+        saved = len(db.table('rounds').search_by(tournament_id=tournament_id))
+        close_database()
+    return create, statistics.median(durations), saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5, help="nombre de rounds générés")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"round_robin, {args.players} joueurs, deux cycles: {time_round_robin(args.players, args.repeat):.2f} ms")
+    for system in ("double_round_robin", SWISS):
+        create, generate, saved = time_tournament(system, args.players, args.rounds, args.seed)
+        print(f"{system}: création {create:.1f} ms, {saved} rounds enregistrés, "
+              f"generate_round {generate:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
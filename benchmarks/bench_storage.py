@@ -0,0 +1,87 @@
+"""
+Compare the write latency of the storages of db.json.
+
+For each size a database with that number of matches is written, then
+single match updates are timed with:
+    - json: TinyDB default JSONStorage, which rewrites the file each time
+    - cached: CachedJSONStorage, parsed once but still rewritten each time
+    - journal: JournalStorage, which appends the changed match to its journal
+
+    python -m benchmarks.bench_storage --sizes 1000 10000 100000 --writes 20
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from tinydb import TinyDB
+from tinydb.storages import JSONStorage
+
+from src.models import Database
+from src.storage import CachedJSONStorage, JournalStorage
+
+
+def build_file(path, nb_of_matchs):
+    """Write a database holding nb_of_matchs matches in the current format"""
+    matchs = {str(match_id): {"player_one_id": match_id % 500 + 1,
+                              "player_two_id": (match_id + 1) % 500 + 1,
+                              "score_one": 0,
+                              "score_two": 0,
+                              "round_id": match_id // 50 + 1,
+                              "tournament_id": match_id // 500 + 1,
+                              "match_id": match_id}
+              for match_id in range(1, nb_of_matchs + 1)}
+    with open(path, "w") as handle:
+        json.dump({"matchs": matchs}, handle)
+
+
+def time_writes(database, nb_of_matchs, nb_of_writes, seed):
+    """Time single match updates
+
+    Returns:
+        list: duration of each write in milliseconds
+    """
+    rng = random.Random(seed)
+    table = database.table("matchs")
+    durations = []
+    for _ in range(nb_of_writes):
+        doc_id = rng.randint(1, nb_of_matchs)
+        begin = time.perf_counter()
+        table.update({"score_one": 1, "score_two": 0}, doc_ids=[doc_id])
+        durations.append((time.perf_counter() - begin) * 1000)
+    return durations
+
+
+def open_database(kind, path):
+    if kind == "json":
+        return TinyDB(path, storage=JSONStorage)
+    if kind == "cached":
+        return Database(path, storage=CachedJSONStorage)
+    return Database(path, storage=JournalStorage)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--writes", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    print(f"{'matchs':>8} {'storage':>8} {'median':>10} {'p95':>10}")
+    for size in args.sizes:
+        for kind in ("json", "cached", "journal"):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "db.json")
+                build_file(path, size)
+                database = open_database(kind, path)
+                database.table("matchs").get(doc_id=1)  # le premier chargement n'est pas mesuré
+                durations = time_writes(database, size, args.writes, args.seed)
+                database.close()
+            p95 = statistics.quantiles(durations, n=20)[-1] if len(durations) > 1 else durations[0]
+            print(f"{size:>8} {kind:>8} {statistics.median(durations):>7.2f} ms {p95:>7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Time the tie-breaks of the standings of a tournament.
+
+    - naive: Buchholz, Sonneborn-Berger and progressive score computed player by
+      player, every match of the tournament scanned again for each opponent
+    - arrays: src.tiebreaks alone, the same tie-breaks from the opponent arrays,
+      building of the arrays included
+    - update_standings: Tournament.update_standings on a generated tournament, reads
+      of its games and rounds, tie-breaks, ranking and write of the standings
+
+    python -m benchmarks.bench_tiebreaks --players 500 --rounds 9
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.generator import write_database
+from src import settings
+from src.pairing import pair_round
+from src.tiebreaks import DEFAULT_TIEBREAKS, opponent_arrays, tiebreak_values
+
+
+def play_tournament(players, rounds):
+    """Play a swiss tournament whose first player wins every game, the others drawing
+
+    Returns:
+        list: (round_id, player_one_id, player_two_id, score_one, score_two) of each game
+    """
+    scores = {player_id: 0 for player_id in range(1, players + 1)}
+    played, games = set(), []
+    for round_id in range(1, rounds + 1):
+        ranking = sorted(scores, key=lambda player_id: (scores[player_id], -player_id), reverse=True)
+        pairs, _ = pair_round(ranking, scores, played, set())
+        for player_one_id, player_two_id in pairs:
+            score_one, score_two = (1, 0) if player_one_id == 1 else (0.5, 0.5)
+            scores[player_one_id] += score_one
+            scores[player_two_id] += score_two
+            played.add((min(player_one_id, player_two_id), max(player_one_id, player_two_id)))
+            games.append((round_id, player_one_id, player_two_id, score_one, score_two))
+    return games
+
+
+def naive_tiebreaks(player_ids, games):
+    """ Compute the default tie-breaks by scanning the games for every opponent of every player """
+    def score(player_id, last_round=None):
+        return sum(score_one if player_one_id == player_id else score_two
+                   for round_id, player_one_id, player_two_id, score_one, score_two in games
+                   if player_id in (player_one_id, player_two_id) and (last_round is None or round_id <= last_round))
+
+    rounds = sorted({game[0] for game in games})
+    values = {}
+    for player_id in player_ids:
+        buchholz = sonneborn_berger = 0
+        for _, player_one_id, player_two_id, score_one, score_two in games:
+            if player_id == player_one_id:
+                buchholz += score(player_two_id)
+                sonneborn_berger += score_one * score(player_two_id)
+            elif player_id == player_two_id:
+                buchholz += score(player_one_id)
+                sonneborn_berger += score_two * score(player_one_id)
+        values[player_id] = [buchholz, sonneborn_berger, sum(score(player_id, round_id) for round_id in rounds)]
+    return values
+
+
+def time_arrays(player_ids, games, repeat):
+    """ Return the median duration in milliseconds of the tie-breaks computed by src.tiebreaks """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        opponents, results = opponent_arrays(player_ids, *zip(*games))
+        tiebreak_values(DEFAULT_TIEBREAKS, opponents, results)
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def time_update_standings(players, rounds, repeat, seed):
+    """ Return the median duration in milliseconds of Tournament.update_standings on a generated tournament """
+    with tempfile.TemporaryDirectory() as directory:
+        settings.DB_ENGINE = "tinydb"
+        settings.JSON_DB_PATH = os.path.join(directory, "db.json")
+        write_database(settings.JSON_DB_PATH, players=players, tournaments=1, rounds=rounds,
+                       tournament_size=players, seed=seed)
+        from src.models import Tournament, close_database, transaction
+        Tournament.get_players(1)
+
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with transaction():
+                # un score inchangé suffit à recalculer les départages
+                Tournament.update_standings(1, {1: 0})
+            durations.append((time.perf_counter() - start) * 1000)
+        close_database()
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=9)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    player_ids = list(range(1, args.players + 1))
+    games = play_tournament(args.players, args.rounds)
+    start = time.perf_counter()
+    expected = naive_tiebreaks(player_ids, games)
+    naive = (time.perf_counter() - start) * 1000
+    opponents, results = opponent_arrays(player_ids, *zip(*games))
+    values = tiebreak_values(DEFAULT_TIEBREAKS, opponents, results).tolist()
+    assert values == [expected[player_id] for player_id in player_ids]
+
+    print(f"{args.players} joueurs, {args.rounds} rounds, {len(games)} matchs")
+    print(f"naïf: {naive:.1f} ms")
+    print(f"tableaux: {time_arrays(player_ids, games, args.repeat):.2f} ms")
+    print(f"update_standings: {time_update_standings(args.players, args.rounds, args.repeat, args.seed):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
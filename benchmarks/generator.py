@@ -0,0 +1,215 @@
+"""
+Generate synthetic databases in the current db.json format.
+
+The players, their tournaments and the played rounds are drawn from a
+seeded random generator, so a seed always gives the same database.
+Rounds are paired by the swiss engine of src.pairing and the results
+follow the elo of the players. The tournaments are left ongoing, their
+last round over, so the next round can be generated on them.
+
+    python -m benchmarks.generator db.json --players 2000 --tournaments 20 --rounds 5 --tournament-size 50
+    python -m benchmarks.generator db.json --matchs 10000
+"""
+import argparse
+import json
+import math
+import random
+
+from src.migrations import MIGRATIONS
+from src.pairing import pair_key, pair_round
+from src.tiebreaks import DEFAULT_TIEBREAKS, opponent_arrays, tiebreak_values
+
+
+FIRSTNAMES = ("Anatoli", "Bobby", "Boris", "Garry", "Hou", "Irina", "Judit", "Magnus", "Maïa", "Mikhaïl",
+              "Nona", "Paul", "Vera", "Viswanathan", "Wenjun", "Xie")
+LASTNAMES = ("Alekhine", "Capablanca", "Carlsen", "Fischer", "Kasparov", "Karpov", "Lasker", "Morphy",
+             "Polgar", "Spassky", "Tal", "Topalov")
+GAME_RULES = ("bullet", "blitz", "coup rapide")
+
+# Nombre de joueurs et de rounds d'un tournoi quand seul le nombre de matchs est donné
+TOURNAMENT_SIZE = 50
+ROUNDS = 7
+
+
+def sizes_for_matchs(nb_of_matchs, tournament_size=TOURNAMENT_SIZE, rounds=ROUNDS):
+    """Return the sizes of a database holding about nb_of_matchs played matchs
+
+    Args:
+        nb_of_matchs (integer): wished number of matchs
+        tournament_size (integer, optional): players of each tournament. Defaults to TOURNAMENT_SIZE.
+        rounds (integer, optional): rounds played in each tournament. Defaults to ROUNDS.
+
+    Returns:
+        dictionnary: arguments of generate, without the seed
+    """
+    tournaments = max(1, math.ceil(nb_of_matchs / (rounds * (tournament_size // 2))))
+    return {"players": max(tournament_size, nb_of_matchs // 2),
+            "tournaments": tournaments,
+            "rounds": rounds,
+            "tournament_size": tournament_size}
+
+
+def expected_score(elo, opponent_elo):
+    return 1 / (1 + 10 ** ((opponent_elo - elo) / 400))
+
+
+def draw_result(rng, elo_one, elo_two):
+    """Draw the scores of a game, the best ranked player being more likely to win
+
+    Returns:
+        float: score of player one
+        float: score of player two
+    """
+    expected = expected_score(elo_one, elo_two)
+    draw = rng.random()
+    if draw < 0.25:
+        return 0.5, 0.5
+    if draw < 0.25 + 0.75 * expected:
+        return 1, 0
+    return 0, 1
+
+
+def generate(players, tournaments, rounds, tournament_size, seed=1):
+    """Build the tables of a database
+
+    Args:
+        players (integer): number of players in the database
+        tournaments (integer): number of tournaments
+        rounds (integer): number of rounds played in each tournament
+        tournament_size (integer): number of players of each tournament
+        seed (integer, optional): seed of the random generator. Defaults to 1.
+
+    Returns:
+        dictionnary: the tables, as saved in db.json
+    """
+    rng = random.Random(seed)
+    tournament_size = min(tournament_size, players)
+    tables = {name: {} for name in ("players", "tournaments", "rounds", "matchs", "scores", "sequences",
+                                    "migrations")}
+    for player_id in range(1, players + 1):
+        tables["players"][str(player_id)] = {"firstname": f"{rng.choice(FIRSTNAMES)}{player_id}",
+                                             "lastname": rng.choice(LASTNAMES),
+                                             "birth_date": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/"
+                                                           f"{rng.randint(1950, 2012)}",
+                                             "gender": rng.choice("mf"),
+                                             "elo": rng.randint(1000, 2800),
+                                             "id": player_id}
+    elos = {player_id: tables["players"][str(player_id)]["elo"] for player_id in range(1, players + 1)}
+
+    round_id = match_id = score_id = 0
+    for tournament_id in range(1, tournaments + 1):
+        entrants = rng.sample(range(1, players + 1), tournament_size)
+        scores = {player_id: 0 for player_id in entrants}
+        ranking = sorted(entrants, key=lambda player_id: (scores[player_id], elos[player_id]), reverse=True)
+        played, byes, round_ids = set(), [], []
+        tournament_games, bye_rounds = [], []
+        for number in range(1, rounds + 1):
+            round_id += 1
+            pairs, bye = pair_round(ranking, scores, played, set(byes))
+            games = []
+            for player_one_id, player_two_id in pairs:
+                match_id += 1
+                score_one, score_two = draw_result(rng, elos[player_one_id], elos[player_two_id])
+                scores[player_one_id] += score_one
+                scores[player_two_id] += score_two
+                played.add(pair_key(player_one_id, player_two_id))
+                tournament_games.append((round_id, player_one_id, player_two_id, score_one, score_two))
+                tables["matchs"][str(match_id)] = {"player_one_id": player_one_id,
+                                                   "player_two_id": player_two_id,
+                                                   "score_one": score_one,
+                                                   "score_two": score_two,
+                                                   "round_id": round_id,
+                                                   "tournament_id": tournament_id,
+                                                   "match_id": match_id}
+                names = (tables["players"][str(player_one_id)]["firstname"],
+                         tables["players"][str(player_two_id)]["firstname"])
+                games.append([[player_one_id, names[0], score_one], [player_two_id, names[1], score_two]])
+            if bye is not None:
+                byes.append(bye)
+                bye_rounds.append(round_id)
+                scores[bye] += 1
+            tables["rounds"][str(round_id)] = {"round_id": round_id,
+                                               "tournament_id": tournament_id,
+                                               "name": f"Round {number}",
+                                               "beginning_date": f"2021-0{number % 9 + 1}-01 10:00:00.000000",
+                                               "ending_date": f"2021-0{number % 9 + 1}-01 12:00:00.000000",
+                                               "games": games,
+                                               "bye": bye}
+            round_ids.append(round_id)
+            ranking = sorted(entrants, key=lambda player_id: (scores[player_id], elos[player_id]), reverse=True)
+        for player_id in entrants:
+            score_id += 1
+            tables["scores"][str(score_id)] = {"player_id": player_id, "tournament_id": tournament_id,
+                                               "score": scores[player_id]}
+        # comme Tournament.break_ties: le classement final est départagé par les départages par défaut
+        game_columns = list(zip(*tournament_games)) or [()] * 5
+        opponents, results = opponent_arrays(entrants, *game_columns, bye_rounds, byes)
+        tiebreaks = dict(zip(entrants, tiebreak_values(DEFAULT_TIEBREAKS, opponents, results).tolist()))
+        ranking = sorted(entrants, key=lambda player_id: (scores[player_id], *tiebreaks[player_id], elos[player_id]),
+                         reverse=True)
+        standings = [{"player_id": player_id, "score": scores[player_id], "elo": elos[player_id],
+                      "tiebreaks": tiebreaks[player_id], "rank": rank}
+                     for rank, player_id in enumerate(ranking, 1)]
+        tables["tournaments"][str(tournament_id)] = {
+            "name": f"Tournoi {tournament_id}",
+            "location": f"Salle {rng.randint(1, 20)}",
+            "description": "",
+            # deux rounds restent à jouer
+            "nb_rounds": rounds + 2,
+            "players": entrants,
+            "game_rules": rng.choice(GAME_RULES),
+            "rounds": round_ids,
+            "nb_of_played_round": rounds,
+            "begin_date": "2021-01-01 09:00:00.000000",
+            "ending_date": "",
+            "standings": standings,
+            "tiebreaks": list(DEFAULT_TIEBREAKS),
+            "id": tournament_id,
+            "byes": byes,
+            "played_pairs": sorted(played)}
+
+    last_ids = {"tournaments": tournaments, "players": players, "rounds": round_id, "matchs": match_id}
+    for doc_id, (kind, value) in enumerate(last_ids.items(), 1):
+        tables["sequences"][str(doc_id)] = {"kind": kind, "value": value}
+    for doc_id, (name, _) in enumerate(MIGRATIONS, 1):
+        tables["migrations"][str(doc_id)] = {"name": name}
+    return tables
+
+
+def write_database(path, **sizes):
+    """Generate a database and write it in a db.json file
+
+    Args:
+        path (string): path of the json file
+        sizes: arguments of generate
+
+    Returns:
+        dictionnary: number of documents of each table
+    """
+    tables = generate(**sizes)
+    with open(path, "w") as handle:
+        json.dump(tables, handle)
+    return {name: len(documents) for name, documents in tables.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--matchs", type=int, help="nombre de matchs voulu, remplace les tailles suivantes")
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--tournaments", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--tournament-size", type=int, default=TOURNAMENT_SIZE)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if args.matchs:
+        sizes = sizes_for_matchs(args.matchs, args.tournament_size, args.rounds)
+    else:
+        sizes = {"players": args.players, "tournaments": args.tournaments, "rounds": args.rounds,
+                 "tournament_size": args.tournament_size}
+    for name, count in write_database(args.path, seed=args.seed, **sizes).items():
+        print(f"{name}: {count}")
+
+
+if __name__ == "__main__":
+    main()
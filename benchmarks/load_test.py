@@ -0,0 +1,122 @@
+"""
+Load test of the HTTP server of src.server, run against localhost.
+
+Each connection sends requests one after the other, kept alive, until the
+duration is over. Requests are reads of the pages the tablets of the
+pairing room display (players report, rankings and games of the
+tournaments), mixed with elo changes in the given proportion. The rate
+of requests, the latency percentiles and the count of each status are printed.
+
+Start the server on a copy of the database, as the elo changes are saved:
+
+    CHESS_JSON_DB_PATH=/tmp/load.json python main.py serve --port 8000
+    python -m benchmarks.load_test --port 8000 --connections 50 --duration 10 --write-ratio 0.05
+"""
+import argparse
+import asyncio
+import collections
+import json
+import random
+import statistics
+import time
+
+
+async def request(reader, writer, method, path, body=None):
+    """Send a request on a kept alive connection and read the response
+
+    Returns:
+        integer: status of the response
+        bytes: body of the response
+    """
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                 f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if not line.strip():
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def discover(host, port):
+    """Read the ids of the players and of the tournaments served
+
+    Returns:
+        list: ids of the players
+        list: ids of the tournaments
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    players = json.loads((await request(reader, writer, "GET", "/players"))[1])
+    tournaments = json.loads((await request(reader, writer, "GET", "/tournaments"))[1])
+    writer.close()
+    return [player["id"] for player in players], [tournament["id"] for tournament in tournaments]
+
+
+def pick_request(rng, player_ids, tournament_ids, write_ratio):
+    """ Return the method, path and body of a random request """
+    if player_ids and rng.random() < write_ratio:
+        return "PUT", f"/players/{rng.choice(player_ids)}/elo", {"elo": rng.randint(1000, 2800)}
+    kind = rng.randrange(4) if tournament_ids else 0
+    if kind == 0:
+        return "GET", f"/reports/1?sorting=c&limit=20&offset={rng.randrange(5) * 20}", None
+    if kind == 1:
+        return "GET", f"/tournaments/{rng.choice(tournament_ids)}/ranking", None
+    if kind == 2:
+        return "GET", f"/tournaments/{rng.choice(tournament_ids)}/games", None
+    return "GET", f"/reports/3?tournament={rng.choice(tournament_ids)}&sorting=a&limit=20", None
+
+
+async def client(host, port, deadline, rng, player_ids, tournament_ids, write_ratio, latencies, statuses):
+    """ Send requests on one connection until the deadline """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            method, path, body = pick_request(rng, player_ids, tournament_ids, write_ratio)
+            begin = time.perf_counter()
+            status, _ = await request(reader, writer, method, path, body)
+            latencies[method].append((time.perf_counter() - begin) * 1000)
+            statuses[status] += 1
+    finally:
+        writer.close()
+
+
+async def run(args):
+    player_ids, tournament_ids = await discover(args.host, args.port)
+    latencies = collections.defaultdict(list)
+    statuses = collections.Counter()
+    begin = time.perf_counter()
+    deadline = begin + args.duration
+    await asyncio.gather(*(client(args.host, args.port, deadline, random.Random(args.seed + number), player_ids,
+                                  tournament_ids, args.write_ratio, latencies, statuses)
+                           for number in range(args.connections)))
+    elapsed = time.perf_counter() - begin
+    total = sum(statuses.values())
+    print(f"{total} requêtes en {elapsed:.1f} s: {total / elapsed:.0f} requêtes/s "
+          f"({len(player_ids)} joueurs, {len(tournament_ids)} tournois, {args.connections} connexions)")
+    print(f"{'méthode':>8} {'nombre':>8} {'médiane':>10} {'p95':>10} {'p99':>10}")
+    for method, durations in sorted(latencies.items()):
+        centiles = statistics.quantiles(durations, n=100) if len(durations) > 1 else durations * 99
+        print(f"{method:>8} {len(durations):>8} {statistics.median(durations):>7.2f} ms "
+              f"{centiles[94]:>7.2f} ms {centiles[98]:>7.2f} ms")
+    print("statuts: " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Time the startup of the application on generated databases of several sizes.
+
+For each size in megabytes, a db.json of about that size is generated by
+benchmarks.generator. New processes then measure, like a start of the menu
+or of a command line:
+    - import: import of the views and of the command line, which must not read the database
+    - first_access: reading one player, which opens the database and parses it
+
+The import time should not depend on the size of the database.
+
+    python -m benchmarks.startup --megabytes 1 10 100
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.generator import generate, sizes_for_matchs, write_database
+
+
+# Exécuté dans un nouveau processus, il affiche ses mesures en json
+MEASURE = """
+import json, time
+start = time.perf_counter()
+import src.views, src.cli
+imported = time.perf_counter()
+from src.controller import AppController
+AppController.get_player(1)
+opened = time.perf_counter()
+print(json.dumps({"import": (imported - start) * 1000, "first_access": (opened - imported) * 1000}))
+"""
+
+# Nombre de matchs de l'échantillon donnant la taille d'un match en json
+SAMPLE_MATCHS = 2000
+
+
+def matchs_for_megabytes(megabytes, seed=1):
+    """ Return the number of matchs of a generated database of about that size """
+    sample = json.dumps(generate(seed=seed, **sizes_for_matchs(SAMPLE_MATCHS)))
+    return max(1, int(megabytes * 1024 * 1024 * SAMPLE_MATCHS / len(sample)))
+
+
+def measure(path, repeat):
+    """Start the application repeat times on a database
+
+    Returns:
+        dictionnary: median duration in milliseconds of each step
+    """
+    durations = {}
+    environment = {**os.environ, "CHESS_DB_ENGINE": "tinydb", "CHESS_JSON_DB_PATH": path}
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", MEASURE], env=environment,
+                                check=True, capture_output=True, text=True).stdout
+        for step, duration in json.loads(output).items():
+            durations.setdefault(step, []).append(duration)
+    return {step: statistics.median(values) for step, values in durations.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=float, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'taille':>10} {'matchs':>8} {'import':>10} {'1er accès':>11}")
+    for megabytes in args.megabytes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "db.json")
+            sizes = sizes_for_matchs(matchs_for_megabytes(megabytes, args.seed))
+            counts = write_database(path, seed=args.seed, **sizes)
+            result = measure(path, args.repeat)
+            size = os.path.getsize(path) / 1024 / 1024
+        print(f"{size:>7.1f} Mo {counts['matchs']:>8} {result['import']:>7.1f} ms {result['first_access']:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Time the main operations of src.models on generated databases of several sizes.
+
+For each size, a database is generated by benchmarks.generator with the
+same seed. Each operation is then timed in a new process that opens the
+database, like the application does at startup:
+    - open: import of the models, then opening of the database, which reads it
+    - generate_round: Tournament.generate_round on an ongoing tournament
+    - get_game_list: games of the round just generated
+    - enter_results+save_results: one result entered by the former per game entry
+    - enter_round_results: all the results of the round at once
+    - get_players: players of a tournament, by rank
+    - get_report_1 to get_report_5: first page of each report (report 5 on the last played round)
+    - create_player: a new player
+
+Writes run in a transaction, as the controller does. The results are
+printed as a table and can be saved in json. A previous json file can be
+given to print how much each operation changed since.
+
+    python -m benchmarks.suite --matchs 1000 10000 100000 --output results.json
+    python -m benchmarks.suite --matchs 1000 10000 --compare results.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from benchmarks.generator import sizes_for_matchs, write_database
+
+
+# Nombre de lignes d'une page de rapport, comme dans les vues
+PAGE_SIZE = 20
+
+
+def timed(durations, name, function, *args, **kwargs):
+    """Call a function, adding its duration in milliseconds to durations[name]
+
+    Returns:
+        variable: what the function returned
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    durations.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def run_operations(repeat):
+    """Time the operations on the database given by the environment variables
+    Called in a new process, so the models open the database when they are imported.
+
+    Args:
+        repeat (integer): number of tournaments each operation is timed on
+
+    Returns:
+        dictionnary: durations in milliseconds of each operation
+    """
+    durations = {}
+    start = time.perf_counter()
+    from src.models import Player, Tournament, get_database, transaction
+    get_database()
+    durations["open"] = [(time.perf_counter() - start) * 1000]
+    # la première lecture de chaque table construit ses index
+    timed(durations, "first_lookup", Tournament.get_players, 1)
+
+    tournament_ids = Tournament.get_ongoing_tournaments()[:repeat]
+    for tournament_id in tournament_ids:
+        with transaction():
+            timed(durations, "generate_round", Tournament.generate_round, tournament_id)
+        games, round_id = timed(durations, "get_game_list", Tournament.get_game_list, tournament_id)
+
+        game = games[0]
+        matchs_results = []
+        with transaction():
+            timed(durations, "enter_results+save_results", lambda: (
+                Tournament.enter_results(tournament_id, round_id, game.match_id, 1, 0, matchs_results),
+                Tournament.save_results(matchs_results, round_id, tournament_id)))
+        results = [(game.match_id, 0.5, 0.5) for game in games]
+        with transaction():
+            timed(durations, "enter_round_results", Tournament.enter_round_results, tournament_id, round_id, results)
+
+        timed(durations, "get_players", Tournament.get_players, tournament_id)
+        number = Tournament.get_tournament(tournament_id)["nb_of_played_round"]
+        for choice in range(1, 6):
+            timed(durations, f"get_report_{choice}", lambda: list(Tournament.get_report(
+                choice, tournament_id, "c", number, limit=PAGE_SIZE)))
+
+        def create_player():
+            with transaction():
+                Player(firstname="Nouveau", lastname="Joueur", birth_date="01/01/2000", gender="f", elo=1500,
+                       id=Tournament.set_player_id()).save()
+        timed(durations, "create_player", create_player)
+    return durations
+
+
+def summarize(durations):
+    """ Return the statistics of the durations of an operation, in milliseconds """
+    ordered = sorted(durations)
+    return {"runs": len(ordered),
+            "min_ms": round(ordered[0], 4),
+            "median_ms": round(statistics.median(ordered), 4),
+            "mean_ms": round(statistics.mean(ordered), 4),
+            "max_ms": round(ordered[-1], 4)}
+
+
+def measure(nb_of_matchs, engine, storage, repeat, seed):
+    """Generate a database and time the operations on it
+
+    Returns:
+        list: one dictionnary per operation, with the size and the statistics
+    """
+    sizes = sizes_for_matchs(nb_of_matchs)
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "db.json")
+        counts = write_database(json_path, seed=seed, **sizes)
+        os.environ.update({"CHESS_DB_ENGINE": engine,
+                           "CHESS_DB_STORAGE": storage,
+                           "CHESS_JSON_DB_PATH": json_path,
+                           "CHESS_SQLITE_DB_PATH": os.path.join(directory, "db.sqlite3")})
+        if engine == "sqlite":
+            # la copie ouvre les modèles sur db.json, avec le moteur tinydb
+            subprocess.run([sys.executable, "-m", "src.sqlite_engine", json_path, os.environ["CHESS_SQLITE_DB_PATH"]],
+                           env={**os.environ, "CHESS_DB_ENGINE": "tinydb"}, check=True, stdout=subprocess.DEVNULL)
+        # "spawn": le processus importe les modèles, donc ouvre la base, avec les variables ci-dessus
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            durations = pool.submit(run_operations, repeat).result()
+    return [{"matchs": counts["matchs"], "players": counts["players"], "tournaments": counts["tournaments"],
+             "operation": operation, **summarize(values)}
+            for operation, values in durations.items()]
+
+
+def compare(results, previous_path):
+    """Print the ratio between the median of each operation and the one of a previous run
+
+    Args:
+        results (list): the new results
+        previous_path (string): json file saved by a previous run
+    """
+    with open(previous_path) as handle:
+        previous = {(result["matchs"], result["operation"]): result for result in json.load(handle)["results"]}
+    print(f"\n{'matchs':>8} {'opération':<28} {'avant':>10} {'après':>10} {'rapport':>8}")
+    for result in results:
+        old = previous.get((result["matchs"], result["operation"]))
+        if old is None:
+            continue
+        ratio = result["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        print(f"{result['matchs']:>8} {result['operation']:<28} {old['median_ms']:>7.2f} ms "
+              f"{result['median_ms']:>7.2f} ms {ratio:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matchs", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--engine", choices=("tinydb", "sqlite"), default="tinydb")
+    parser.add_argument("--storage", choices=("journal", "json"), default="journal")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="nombre de tournois sur lesquels chaque opération est mesurée")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="fichier json recevant les résultats")
+    parser.add_argument("--compare", help="fichier json d'une mesure précédente")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'matchs':>8} {'opération':<28} {'médiane':>10} {'min':>10} {'max':>10}")
+    for nb_of_matchs in args.matchs:
+        for result in measure(nb_of_matchs, args.engine, args.storage, args.repeat, args.seed):
+            results.append(result)
+            print(f"{result['matchs']:>8} {result['operation']:<28} {result['median_ms']:>7.2f} ms "
+                  f"{result['min_ms']:>7.2f} ms {result['max_ms']:>7.2f} ms")
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump({"date": datetime.now().isoformat(timespec="seconds"),
+                       "python": platform.python_version(),
+                       "engine": args.engine,
+                       "storage": args.storage,
+                       "seed": args.seed,
+                       "results": results}, handle, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,21 @@
+import sys
+
+from src import cli, instrumentation, settings
+from src.controller import AppController
+from src.storage import ConflictError
 from src.views import Views
 
 
 if __name__ == "__main__":
+    if "--profile" in sys.argv[1:]:
+        sys.argv.remove("--profile")
+        instrumentation.enable(settings.PROFILE_OUTPUT, settings.PROFILE_CAPTURE)
+    if sys.argv[1:2] and sys.argv[1] in cli.COMMANDS:
+        sys.exit(cli.main(sys.argv[1:]))
+    if sys.argv[1:2] == ["serve"]:
+        from src.server import main
+        main(sys.argv[2:])
+        sys.exit()
     while True:
         user_choice = Views.main_menue_view()
         try:
@@ -21,10 +35,17 @@ if __name__ == "__main__":
                 Views.set_new_elo_view()
             elif int(user_choice) == 8:
                 Views.show_provisional_ranking()
+            elif int(user_choice) == 9:
+                Views.import_players_view()
+            elif int(user_choice) == 10:
+                Views.generate_rounds_view()
             else:
                 Views.error_message_view()
         except ValueError:
             if user_choice in {"q", "Q"}:
+                AppController.close_database()
                 break
             else:
                 Views.error_message_view()
+        except ConflictError:
+            Views.conflict_message_view()
@@ -0,0 +1,432 @@
+"""
+This module runs the actions of the menu from the command line, without prompts.
+
+Each command calls the controller directly and prints its result as text,
+or as json, json-lines or CSV with --format, so it can be scripted:
+
+    python main.py player create --firstname Judit --lastname Polgar --birth-date 23/07/1976 --gender f --elo 2735
+    python main.py tournament create --name Open --location Paris --game-rules blitz --players 1 2 3 4
+    python main.py tournament create --name Cup --location Nice --game-rules blitz --system round_robin --players 1 2 3
+    python main.py round generate --tournament 12
+    python main.py round games --tournament 12 --format json
+    python main.py results submit --tournament 12 --file r3.csv
+    python main.py tournament tiebreaks --tournament 12 --order sonneborn_berger buchholz
+    python main.py report standings --tournament 12 --format json
+    python main.py rating replay --round 40
+    python main.py batch nightly.txt
+
+A batch file holds one command per line, without "python main.py".
+Empty lines and lines starting with # are skipped. All the commands of
+a batch run in one process and in one transaction: the database is
+read once and written once at the end. If a command fails, none of
+them is saved and the number of its line is printed.
+
+Results files are CSV files with the columns match_id, player_one_score
+and player_two_score, or json-lines files with the same keys.
+"""
+import argparse
+import io
+import itertools
+import json
+import shlex
+import sys
+
+from src import importer
+from src.controller import AppController
+from src.export import EXPORT_FORMATS, report_row_to_dict, write_rows_to
+from src.records import Record
+from src.schedule import SWISS, SYSTEMS, schedule_length
+from src.storage import ConflictError
+from src.tiebreaks import TIEBREAKS
+from src.views import Views
+
+
+OUTPUT_FORMATS = ("text", "json") + EXPORT_FORMATS
+
+# Rapports du menu 4, par nom
+REPORTS = {"players": 1, "tournaments": 2, "tournament-players": 3, "rounds": 4, "games": 5}
+
+
+class CommandError(Exception):
+    """ The command cannot be run, nothing has been saved """
+
+
+class ArgumentParser(argparse.ArgumentParser):
+    """ Raise CommandError instead of leaving the program, so a batch can tell which line is wrong """
+    def error(self, message):
+        raise CommandError(message)
+
+
+def to_row(value):
+    """ Return a result of the controller as a dictionnary """
+    if isinstance(value, Record):
+        return value.to_dict()
+    # les paires déjà jouées ne sont utiles qu'au calcul des rounds
+    return {key: item for key, item in dict(value).items() if key != "played_pairs"}
+
+
+def check_tournament(tournament_id):
+    tournament = AppController.get_tournament(tournament_id)
+    if tournament is None:
+        raise CommandError(f"le tournoi {tournament_id} n'existe pas")
+    return tournament
+
+
+def check_player(player_id):
+    player = AppController.get_player(player_id)
+    if player is None:
+        raise CommandError(f"le joueur {player_id} n'existe pas")
+    return player
+
+
+def player_create(args):
+    attrs, reason = importer.validate_row({"firstname": args.firstname, "lastname": args.lastname,
+                                           "birth_date": args.birth_date, "gender": args.gender, "elo": args.elo})
+    if attrs is None:
+        raise CommandError(reason)
+    return {"id": AppController.create_player(attrs)}
+
+
+def player_list(args):
+    return [to_row(player) for player in AppController.get_player_info()]
+
+
+def player_show(args):
+    return to_row(check_player(args.player))
+
+
+def player_elo(args):
+    check_player(args.player)
+    if args.elo < 0:
+        raise CommandError("l'elo doit être positif")
+    AppController.set_player_elo(args.player, args.elo)
+    return {"id": args.player, "elo": args.elo}
+
+
+def player_history(args):
+    check_player(args.player)
+    return AppController.get_rating_history(args.player)
+
+
+def player_import(args):
+    try:
+        imported, rejected = AppController.import_players(args.file)
+    except OSError as error:
+        raise CommandError(f"impossible de lire le fichier: {error}")
+    return {"imported": imported,
+            "rejected": [{"line": line_number, "reason": reason} for line_number, reason in rejected]}
+
+
+def tournament_create(args):
+    if len(set(args.players)) != len(args.players):
+        raise CommandError("un joueur est inscrit deux fois")
+    if len(args.players) < 2:
+        raise CommandError("il faut au moins deux joueurs")
+    length = schedule_length(len(args.players), args.system)
+    if args.rounds is not None and args.rounds < 1:
+        raise CommandError("il faut au moins un round")
+    if length is not None and args.rounds not in (None, length):
+        raise CommandError(f"un tournoi {args.system} de {len(args.players)} joueurs se joue en {length} rounds")
+    if args.tiebreaks and len(set(args.tiebreaks)) != len(args.tiebreaks):
+        raise CommandError("un départage est donné deux fois")
+    unknown = [player_id for player_id, name in AppController.get_player_names(args.players).items()
+               if name is None]
+    if unknown:
+        raise CommandError(f"joueurs inexistants: {unknown}")
+    attrs = {"name": args.name, "location": args.location, "description": args.description,
+             "players": args.players, "game_rules": args.game_rules, "nb_rounds": length or args.rounds or 4,
+             "tiebreaks": args.tiebreaks, "system": args.system}
+    return {"id": AppController.create_tournament(attrs)}
+
+
+def tournament_list(args):
+    return [to_row(tournament) for tournament in AppController.get_report(choice=2, choosing=True)]
+
+
+def tournament_show(args):
+    return to_row(check_tournament(args.tournament))
+
+
+def tournament_tiebreaks(args):
+    check_tournament(args.tournament)
+    if len(set(args.order)) != len(args.order):
+        raise CommandError("un départage est donné deux fois")
+    AppController.set_tiebreaks(args.tournament, args.order)
+    return {"tournament": args.tournament, "tiebreaks": args.order}
+
+
+def round_generate(args):
+    """Generate the next round of one tournament, or of several ones at once
+    Without --tournament, the next round of every ongoing tournament is generated.
+    """
+    if args.tournament and len(args.tournament) == 1:
+        tournament_id = args.tournament[0]
+        check_tournament(tournament_id)
+        round = AppController.generate_tour(tournament_id)
+        if round is None:
+            raise CommandError(f"le tournoi {tournament_id} est terminé")
+        if round is False:
+            raise CommandError(f"le round en cours du tournoi {tournament_id} n'a pas tous ses résultats")
+        return to_row(round)
+    for tournament_id in args.tournament or ():
+        check_tournament(tournament_id)
+    results, _ = AppController.generate_rounds(args.tournament or None)
+    rows = []
+    for result in results:
+        round = result["round"]
+        status = "terminé" if round is None else "round en cours" if round is False else "généré"
+        rows.append({"tournament_id": result["tournament_id"], "status": status,
+                     "round": round["name"] if round else None, "games": len(round["games"]) if round else 0})
+    return rows
+
+
+def round_games(args):
+    check_tournament(args.tournament)
+    games, round_id = AppController.get_game_list(args.tournament)
+    return [{"round_id": round_id, **game.to_dict()} for game in games]
+
+
+def read_results(path):
+    """Read the results of a CSV or json-lines file
+
+    Args:
+        path (string): path of the file
+
+    Returns:
+        list: (match_id, player_one_score, player_two_score) of each result
+    """
+    results = []
+    try:
+        for line_number, row in importer.read_rows(path):
+            try:
+                results.append((int(row["match_id"]), float(row["player_one_score"]), float(row["player_two_score"])))
+            except (KeyError, TypeError, ValueError):
+                raise CommandError(f"{path}, ligne {line_number}: il faut match_id, player_one_score "
+                                   "et player_two_score")
+    except OSError as error:
+        raise CommandError(f"impossible de lire le fichier: {error}")
+    return results
+
+
+def results_submit(args):
+    check_tournament(args.tournament)
+    round_id = AppController.get_game_list(args.tournament)[1]
+    if round_id is None:
+        raise CommandError(f"le tournoi {args.tournament} n'a pas de round en cours")
+    if args.round is not None and args.round != round_id:
+        raise CommandError(f"le round {args.round} n'est pas le round en cours du tournoi")
+    results = read_results(args.file) if args.file else []
+    typed, unreadable = Views.parse_results(args.result or ())
+    if unreadable:
+        raise CommandError(f"résultats illisibles: {unreadable}")
+    results += typed
+    if not results:
+        raise CommandError("aucun résultat donné, utilisez --file ou --result")
+    errors, missing = AppController.submit_round_results(args.tournament, round_id, results)
+    if errors:
+        raise CommandError("; ".join(errors))
+    return {"round_id": round_id, "saved": len(results), "missing": missing}
+
+
+def rating_replay(args):
+    summary = AppController.replay_ratings(args.round)
+    if summary is None:
+        raise CommandError(f"le round {args.round} n'existe pas")
+    return summary
+
+
+def report(args):
+    if args.kind == "standings":
+        check_tournament(args.tournament)
+        players = enumerate(AppController.get_provisional_ranking(args.tournament), 1)
+        return [{"rank": rank, "id": player.id, "firstname": player.firstname, "lastname": player.lastname,
+                 "tournament_score": player.tournament_score, **player.tiebreaks, "elo": player.elo}
+                for rank, player in itertools.islice(players, args.offset, None if args.limit is None
+                                                     else args.offset + args.limit)]
+    choice = REPORTS[args.kind]
+    if choice > 2:
+        if args.tournament is None:
+            raise CommandError("--tournament est obligatoire pour ce rapport")
+        check_tournament(args.tournament)
+    rows = AppController.get_report(choice, args.tournament, args.sorting, args.round,
+                                    offset=args.offset, limit=args.limit)
+    return [report_row_to_dict(row) for row in rows]
+
+
+def build_parser():
+    parser = ArgumentParser(prog="main.py", description="Lance une action du menu sans la saisir, ou un lot d'actions")
+    groups = parser.add_subparsers(dest="group", required=True)
+    commands = []
+
+    def command(group, name, handler, help):
+        subparser = group.add_parser(name, help=help)
+        subparser.set_defaults(handler=handler)
+        commands.append(subparser)
+        return subparser
+
+    player = groups.add_parser("player", help="joueurs").add_subparsers(dest="command", required=True)
+    create = command(player, "create", player_create, "créer un joueur")
+    create.add_argument("--firstname", required=True)
+    create.add_argument("--lastname", required=True)
+    create.add_argument("--birth-date", required=True, help="jj/mm/aaaa")
+    create.add_argument("--gender", required=True, choices=("m", "f"))
+    create.add_argument("--elo", required=True)
+    command(player, "list", player_list, "tous les joueurs")
+    command(player, "show", player_show, "un joueur").add_argument("--player", type=int, required=True)
+    elo = command(player, "elo", player_elo, "changer l'elo d'un joueur")
+    elo.add_argument("--player", type=int, required=True)
+    elo.add_argument("--elo", type=int, required=True)
+    command(player, "history", player_history, "évolution de l'elo d'un joueur").add_argument(
+        "--player", type=int, required=True)
+    command(player, "import", player_import, "importer des joueurs d'un fichier CSV ou json-lines").add_argument(
+        "--file", required=True)
+
+    tournament = groups.add_parser("tournament", help="tournois").add_subparsers(dest="command", required=True)
+    create = command(tournament, "create", tournament_create, "créer un tournoi")
+    create.add_argument("--name", required=True)
+    create.add_argument("--location", required=True)
+    create.add_argument("--description", default="")
+    create.add_argument("--game-rules", required=True, choices=("bullet", "blitz", "coup rapide"))
+    create.add_argument("--rounds", type=int,
+                        help="nombre de rounds, 4 par défaut pour un tournoi suisse, celui du calendrier sinon")
+    create.add_argument("--system", choices=SYSTEMS, default=SWISS,
+                        help="suisse, ou toutes rondes en un ou deux cycles: tous les rounds sont alors calculés")
+    create.add_argument("--players", type=int, nargs="+", required=True, help="id des joueurs")
+    create.add_argument("--tiebreaks", nargs="+", choices=tuple(TIEBREAKS),
+                        help="ordre des départages, buchholz sonneborn_berger progressive par défaut")
+    command(tournament, "list", tournament_list, "tous les tournois")
+    command(tournament, "show", tournament_show, "un tournoi").add_argument("--tournament", type=int, required=True)
+    tiebreaks = command(tournament, "tiebreaks", tournament_tiebreaks, "changer l'ordre des départages d'un tournoi")
+    tiebreaks.add_argument("--tournament", type=int, required=True)
+    tiebreaks.add_argument("--order", nargs="+", required=True, choices=tuple(TIEBREAKS))
+
+    round = groups.add_parser("round", help="rounds").add_subparsers(dest="command", required=True)
+    command(round, "generate", round_generate, "générer le prochain round").add_argument(
+        "--tournament", type=int, nargs="+", help="id des tournois, tous les tournois en cours par défaut")
+    command(round, "games", round_games, "matchs du round en cours").add_argument(
+        "--tournament", type=int, required=True)
+
+    results = groups.add_parser("results", help="résultats").add_subparsers(dest="command", required=True)
+    submit = command(results, "submit", results_submit, "enregistrer des résultats du round en cours")
+    submit.add_argument("--tournament", type=int, required=True)
+    submit.add_argument("--round", type=int, help="id du round en cours, vérifié s'il est donné")
+    submit.add_argument("--file", help="fichier CSV ou json-lines des résultats")
+    submit.add_argument("--result", action="append", help="'id_du_match score_joueur1 score_joueur2'")
+
+    rating = groups.add_parser("rating", help="classement elo").add_subparsers(dest="command", required=True)
+    command(rating, "replay", rating_replay, "recalculer l'elo de tous les joueurs depuis les résultats").add_argument(
+        "--round", type=int, help="id du premier round modifié, tous les rounds par défaut")
+
+    reports = command(groups, "report", report, "un rapport, ou le classement d'un tournoi")
+    reports.add_argument("kind", choices=tuple(REPORTS) + ("standings",))
+    reports.add_argument("--tournament", type=int)
+    reports.add_argument("--sorting", choices=("a", "c"), default="c")
+    reports.add_argument("--round", type=int, default=0, help="numéro du round, pour le rapport games")
+    reports.add_argument("--offset", type=int, default=0)
+    reports.add_argument("--limit", type=int)
+
+    for subparser in commands:
+        subparser.add_argument("--format", choices=OUTPUT_FORMATS, default="text")
+    batch = groups.add_parser("batch", help="lancer les commandes d'un fichier, une par ligne")
+    batch.add_argument("file")
+    batch.set_defaults(handler=None)
+    return parser
+
+
+def write_result(result, output_format, out):
+    """Print the result of a command
+
+    Args:
+        result (dictionnary or list): the result, or its rows
+        output_format (string): one of OUTPUT_FORMATS
+        out (file): where it is printed
+    """
+    if output_format == "json":
+        out.write(json.dumps(result, ensure_ascii=False, default=list) + "\n")
+        return
+    rows = result if isinstance(result, list) else [result]
+    if output_format in EXPORT_FORMATS:
+        write_rows_to(rows, out, output_format)
+        return
+    for row in rows:
+        out.write(" | ".join(f"{key}: {value}" for key, value in row.items()) + "\n")
+
+
+def read_batch(path, parser):
+    """Read the commands of a batch file, all of them are checked before any is run
+
+    Args:
+        path (string): path of the file
+        parser (ArgumentParser): parser of the commands
+
+    Returns:
+        list: line number and arguments of each command
+    """
+    commands = []
+    try:
+        with open(path, encoding="utf-8") as handle:
+            lines = list(handle)
+    except OSError as error:
+        raise CommandError(f"impossible de lire le fichier: {error}")
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        try:
+            args = parser.parse_args(shlex.split(line))
+        except (CommandError, ValueError) as error:
+            raise CommandError(f"{path}, ligne {line_number}: {error}")
+        if args.handler is None:
+            raise CommandError(f"{path}, ligne {line_number}: un lot ne peut pas lancer un autre lot")
+        commands.append((line_number, args))
+    return commands
+
+
+def run_commands(path, commands):
+    """Run the commands of a batch, called by the controller inside a single transaction
+
+    Returns:
+        string: what the commands printed, printed once all of them are saved
+    """
+    out = io.StringIO()
+    for line_number, args in commands:
+        try:
+            write_result(args.handler(args), args.format, out)
+        except CommandError as error:
+            raise CommandError(f"{path}, ligne {line_number}: {error}. Aucune commande du lot n'a été enregistrée.")
+    return out.getvalue()
+
+
+def main(argv=None):
+    """Run a command, or a batch of commands
+
+    Args:
+        argv (list, optional): the arguments. Defaults to None, for the ones of the program.
+
+    Returns:
+        integer: status of the program, 0 if the command succeeded
+    """
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+        if args.handler is None:
+            commands = read_batch(args.file, parser)
+            sys.stdout.write(AppController.run_in_transaction(run_commands, args.file, commands))
+        else:
+            write_result(args.handler(args), args.format, sys.stdout)
+    except CommandError as error:
+        print(f"erreur: {error}", file=sys.stderr)
+        return 1
+    except ConflictError:
+        print("erreur: la base a été modifiée par un autre programme, rien n'a été enregistré", file=sys.stderr)
+        return 1
+    finally:
+        AppController.close_database()
+    return 0
+
+
+# Premier argument des commandes, pour que main.py les reconnaisse
+COMMANDS = ("player", "tournament", "round", "results", "rating", "report", "batch")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,35 +2,100 @@
 This module receive user wishes from the view module and call
 the correct methods in the model.
 """
-from src.models import Tournament, Player
+import functools
+import multiprocessing
+import os
+import random
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from src import importer, instrumentation
+from src.models import Tournament, Player, transaction, close_database, compact_database, database_version
+from src.pairing import timed_pair_round
+from src.schedule import SWISS, schedule_length
+from src.storage import ConflictError
+
+
+# Nombre de fois qu'une action est tentée quand un autre programme écrit la base en même temps
+CONFLICT_ATTEMPTS = 3
+# Attente maximale avant de tenter à nouveau une action, en secondes, multipliée par le nombre d'essais
+CONFLICT_BACKOFF = 0.05
+
+
+def unit_of_work(method):
+    """Run a controller method inside a database transaction
+    so all its writes are saved at once, or not at all if it fails.
+    If another program wrote the database in the meantime, nothing is saved
+    and the method is run again on the new data, after a random wait, while
+    holding the lock of the database so no other program can write it before
+    the end. ConflictError is raised after CONFLICT_ATTEMPTS attempts, which
+    only happens where the lock is not available.
+    """
+    @functools.wraps(method)
+    def wrapper(cls, *args, **kwargs):
+        for attempt in range(1, CONFLICT_ATTEMPTS + 1):
+            try:
+                with transaction(exclusive=attempt > 1):
+                    return method(cls, *args, **kwargs)
+            except ConflictError:
+                if attempt == CONFLICT_ATTEMPTS:
+                    raise
+                time.sleep(random.uniform(0, CONFLICT_BACKOFF * attempt))
+    return wrapper
 
 
 class AppController:
     _current_tournament = None
 
     @classmethod
+    @unit_of_work
     def create_tournament(cls, attrs):
         """Create the tournament in database
 
         Args:
             attrs (dictionnary): attributes collected by the view
+
+        Returns:
+            integer: id of the tournament
+
+        Raises:
+            ValueError: if a player does not exist in database, or if the number of rounds
+                        of a round-robin tournament is not the one of its schedule. Nothing is saved.
         """
+        unknown = [player_id for player_id, name in Tournament.get_player_names(attrs["players"]).items()
+                   if name is None]
+        if unknown:
+            raise ValueError(f"joueurs inexistants: {unknown}")
+        system = attrs.get("system") or SWISS
+        length = schedule_length(len(attrs["players"]), system)
+        if length is not None and attrs.get("nb_rounds") not in (None, length):
+            raise ValueError(f"un tournoi {system} de {len(attrs['players'])} joueurs se joue en {length} rounds")
         tournament = Tournament(attrs["name"],
                                 attrs["location"],
                                 attrs["description"],
                                 attrs["players"],
                                 attrs["game_rules"],
-                                attrs["nb_rounds"])
+                                attrs["nb_rounds"],
+                                begin_date=attrs.get("begin_date", str(datetime.now())),
+                                tiebreaks=attrs.get("tiebreaks"),
+                                system=system)
         id = Tournament.set_tournament_id()
         tournament.id = id
         tournament.save()
+        return id
 
     @classmethod
+    @unit_of_work
     def create_player(cls, attrs):
         """Create a new player in database
 
         Args:
             attrs (dictionnary): attrs are the attributes collected by the view
+
+        Returns:
+            integer: id of the player
         """
         id = Tournament.set_player_id()
         player = Player(firstname=attrs["firstname"],
@@ -40,8 +105,24 @@ class AppController:
                         elo=attrs["elo"],
                         id=id)
         player.save()
+        return id
+
+    @classmethod
+    @unit_of_work
+    def import_players(cls, path):
+        """Create all the players listed in a CSV or json-lines file
+
+        Args:
+            path (string): path of the file
+
+        Returns:
+            integer: number of imported players
+            list: (line number, reason) of each rejected row
+        """
+        return importer.import_players(path)
 
     @classmethod
+    @unit_of_work
     def generate_tour(cls, tournament_id_user_choice):
         """Generate a new round for an ongoing tournament
 
@@ -55,6 +136,89 @@ class AppController:
         return round
 
     @classmethod
+    def generate_rounds(cls, tournament_ids=None, workers=None):
+        """Generate the next round of several tournaments at once
+        Each tournament is read in a snapshot, the pairings are computed in parallel
+        by a pool of processes, then all the rounds are saved in a single write.
+        The saved rounds of the round-robin tournaments are started in the same write.
+        The tournaments changed by another program before the write are read and paired again.
+
+        Args:
+            tournament_ids (list, optional): ids of the tournaments. Defaults to None, for all ongoing ones.
+            workers (integer, optional): number of processes. Defaults to the number of processors.
+
+        Returns:
+            list: for each tournament a dictionnary with its id, the generated round
+                  (None if the tournament is over, False if its previous round is not over)
+                  and the seconds spent to read it, pair it and save it
+            float: seconds spent to write the database
+        """
+        if tournament_ids is None:
+            tournament_ids = Tournament.get_ongoing_tournaments()
+        version = database_version()
+        results = []
+        for tournament_id in tournament_ids:
+            start = time.perf_counter()
+            snapshot = Tournament.pairing_snapshot(tournament_id)
+            results.append({"tournament_id": tournament_id, "round": snapshot, "snapshot": snapshot,
+                            "read": time.perf_counter() - start, "pairing": 0, "save": 0})
+        to_pair = [result for result in results if result["snapshot"] and not result["snapshot"]["scheduled"]]
+        arguments = ([result["snapshot"][key] for result in to_pair]
+                     for key in ("ranking", "scores", "played", "byes"))
+        workers = min(workers or os.cpu_count() or 1, len(to_pair))
+        if workers > 1:
+            # "spawn": les processus n'importent que le module pairing et n'ouvrent pas la base
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                pairings = list(pool.map(timed_pair_round, *arguments))
+        else:
+            pairings = list(map(timed_pair_round, *arguments))
+        for result, (pairs, bye, pairing_time) in zip(to_pair, pairings):
+            result["pairing"] = pairing_time
+            result["pairs"] = pairs, bye
+
+        start = time.perf_counter()
+        cls.save_generated_rounds(results, version)
+        write_time = time.perf_counter() - start - sum(result["save"] for result in results)
+        for result in results:
+            del result["snapshot"]
+            result.pop("pairs", None)
+        return results, write_time
+
+    @classmethod
+    @unit_of_work
+    def save_generated_rounds(cls, results, version):
+        """Save the rounds paired by generate_rounds, and start the saved rounds of the round-robin tournaments
+        If the database was written since the snapshots were read, each tournament is read
+        again: a tournament whose round was generated or whose results were entered in the
+        meantime is paired again, or skipped if it can no longer get a round.
+
+        Args:
+            results (list): the dictionnaries built by generate_rounds, updated with the saved rounds
+            version: version of the database when the snapshots were read
+        """
+        if database_version() != version:
+            for result in results:
+                snapshot = Tournament.pairing_snapshot(result["tournament_id"])
+                if snapshot == result["snapshot"]:
+                    continue
+                result["snapshot"] = result["round"] = snapshot
+                if snapshot and not snapshot["scheduled"]:
+                    pairs, bye, result["pairing"] = timed_pair_round(
+                        *(snapshot[key] for key in ("ranking", "scores", "played", "byes")))
+                    result["pairs"] = pairs, bye
+        for result in results:
+            snapshot = result["snapshot"]
+            if not snapshot:
+                continue
+            save_start = time.perf_counter()
+            if snapshot["scheduled"]:
+                result["round"] = Tournament.start_scheduled_round(snapshot)
+            else:
+                result["round"] = Tournament.save_round(snapshot, *result["pairs"])
+            result["save"] = time.perf_counter() - save_start
+
+    @classmethod
+    @unit_of_work
     def set_tour_results(cls, matchs_results, round_id, tournament_id_user_choice,
                          match_id, player_one_score=None, player_two_score=None):
         """[summary]
@@ -72,6 +236,22 @@ class AppController:
                                  player_two_score, matchs_results)
         Tournament.save_results(matchs_results, round_id, tournament_id_user_choice)
 
+    @classmethod
+    @unit_of_work
+    def submit_round_results(cls, tournament_id, round_id, results):
+        """Save the results of several games of a round at once
+
+        Args:
+            tournament_id (integer): the concerned tournament
+            round_id (integer): the concerned round
+            results (list): (match_id, player_one_score, player_two_score) of each reported game
+
+        Returns:
+            list: description of each invalid result, empty if the results were saved
+            list: ids of the games still waiting for a result, the round is closed when it is empty
+        """
+        return Tournament.enter_round_results(tournament_id, round_id, results)
+
     @classmethod
     def get_provisional_ranking(cls, tournament_id_user_choice):
         """Used to send the ranking of a tournament
@@ -80,11 +260,25 @@ class AppController:
             tournament_id_user_choice (integer): id of thre  wished tournament
 
         Returns:
-            list: sorted by tournament_score list for the wished tournament
+            list: sorted by tournament_score, then by the tie-breaks of the tournament, list for the wished tournament
         """
         players = Tournament.get_players(tournament_id_user_choice)
         return players
 
+    @classmethod
+    @unit_of_work
+    def set_tiebreaks(cls, tournament_id, tiebreaks):
+        """Change the order of the tie-breaks of a tournament
+
+        Args:
+            tournament_id (integer): id of the tournament in database
+            tiebreaks (list): names of the tie-breaks, the first one breaks ties first
+
+        Returns:
+            list: the new standings of the tournament
+        """
+        return Tournament.set_tiebreaks(tournament_id, tiebreaks)
+
     @classmethod
     def get_player_info(cls, player_choice=None):
         """send either informations about every players of the data base
@@ -99,12 +293,51 @@ class AppController:
                 list: list all list where each one is about a player
         """
         if not player_choice:
-            players = Tournament.get_all_players()
+            players = list(Tournament.get_all_players())
             return players
         player_info = Tournament.get_player_info(player_choice)
         return player_info
 
     @classmethod
+    def get_player(cls, player_id):
+        """Return a player as saved in database
+
+        Args:
+            player_id (integer): id of the wished player
+
+        Returns:
+            dictionnary: the player, None if there is none
+        """
+        return Tournament.get_player(player_id)
+
+    @classmethod
+    def get_rating_history(cls, player_id):
+        """Return the elo changes of a player computed after his rounds
+
+        Args:
+            player_id (integer): id of the player
+
+        Returns:
+            list: the changes, from the oldest
+        """
+        return Tournament.get_rating_history(player_id)
+
+    @classmethod
+    @unit_of_work
+    def replay_ratings(cls, round_id=None):
+        """Compute again the elo of every player from the results of the rounds
+
+        Args:
+            round_id (integer, optional): id of the first changed round. Defaults to None, for all the rounds.
+
+        Returns:
+            dictionnary: number of rated rounds and games and of players whose elo changed,
+                         None if the round does not exist
+        """
+        return Tournament.replay_ratings(round_id)
+
+    @classmethod
+    @unit_of_work
     def set_player_elo(cls, player, new_elo):
         """Allows the user to update a player's elo
 
@@ -126,24 +359,52 @@ class AppController:
         """
         return Tournament.get_game_list(tournament_id)
 
+    @classmethod
+    def get_tournament(cls, tournament_id):
+        """Return a tournament as saved in database
+
+        Args:
+            tournament_id (integer): id of the wished tournament
+
+        Returns:
+            dictionnary: the tournament, None if there is none
+        """
+        return Tournament.get_tournament(tournament_id)
+
+    @classmethod
+    def get_player_names(cls, player_ids):
+        """Return the firstname of each player, used to display the games
+
+        Args:
+            player_ids (iterable): ids of the players
+
+        Returns:
+            dictionnary: firstname of each player id
+        """
+        return Tournament.get_player_names(player_ids)
+
     @classmethod
     def get_report(cls, choice=0,
                    tournament_choice=None,
                    sorting=None,
                    round_choice=None,
-                   choosing=None):
+                   choosing=None,
+                   offset=0,
+                   limit=None):
         """
 
         Args:
             choice (int, optional): number of the command. Defaults to 0.
             tournament_choice (integer, optional): id of the wished tournament. Defaults to None.
             sorting (string, optional): choice of sorting, alphabetical or rank. Defaults to None.
-            round_choice (integer, optional): id of the wished round. Defaults to None.
-            choosing (Boolean, optional): used to delete the list of all possible games when the programm
-                                          uploads all tournaments in base. Defaults to None.
+            round_choice (integer, optional): number of the wished round. Defaults to None.
+            choosing (Boolean, optional): used to get the tournaments themselves when the programm
+                                          lists them to choose one. Defaults to None.
+            offset (integer, optional): number of rows to skip. Defaults to 0.
+            limit (integer, optional): maximum number of rows. Defaults to None, for all of them.
 
         Returns:
-            list or dictionnary: depends of the user choice.
+            iterator: rows of the report, generated one by one.
                                 5 kind of reports are possible:
                                 - All players in database sorted alphabetically or by rank
                                 - The list of all tournaments in database
@@ -151,4 +412,42 @@ class AppController:
                                 - The list of played and ongoing rounds in a tournament
                                 - The list of games in a round for a specified tournament
         """
-        return Tournament.get_report(choice, tournament_choice, sorting, round_choice, choosing)
+        return Tournament.get_report(choice, tournament_choice, sorting, round_choice, choosing, offset, limit)
+
+    @classmethod
+    @unit_of_work
+    def run_in_transaction(cls, function, *args):
+        """Run several actions as one: the database is written once, when all of them succeeded
+        Used by the batches of the command line.
+
+        Args:
+            function (function): calls the actions of the controller
+            args: arguments of the function
+
+        Returns:
+            variable: what the function returned
+        """
+        return function(*args)
+
+    @classmethod
+    def database_version(cls):
+        """Return a value which changes each time the database is written, even by another program
+
+        Returns:
+            variable: the version, only compared with the previous ones
+        """
+        return database_version()
+
+    @classmethod
+    def compact_database(cls):
+        """Merge the journal of the database into db.json"""
+        compact_database()
+
+    @classmethod
+    def close_database(cls):
+        """Close the database before leaving, it is opened again if it is used afterwards"""
+        close_database()
+
+
+if instrumentation.is_enabled():
+    instrumentation.instrument_loaded()
@@ -0,0 +1,234 @@
+"""
+This module exports reports and tournaments to CSV or json-lines files.
+
+Rows are written one by one as they are read from the database, so the
+memory used does not depend on the size of the export. The columns of a
+CSV file are those of all its rows: the players are read twice, once to
+find them, and the rows of the other exports are kept in memory until
+they are known. In CSV files the lists and dictionnaries of a row are
+written as json.
+
+Several tournaments are exported in parallel by a pool of processes.
+Each process opens the database itself, so it must be saved first.
+
+    python -m src.export players joueurs.csv
+    python -m src.export report 3 classement.csv --tournament 1 --sorting c
+    python -m src.export tournaments exports --format jsonl --workers 4
+"""
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+from src.models import Tournament
+
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+
+def guess_format(path):
+    """Return the format of a file from its extension, json-lines if it is not .csv"""
+    return "csv" if os.path.splitext(path)[1].lower() == ".csv" else "jsonl"
+
+
+def columns_of(rows):
+    """Return the keys found in the rows, in the order they first appear
+
+    Args:
+        rows (iterable): the rows, as dictionnaries
+
+    Returns:
+        list: the keys
+    """
+    columns = {}
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+    return list(columns)
+
+
+def write_rows(rows, path, file_format=None, columns=None):
+    """Write rows in a file, one by one
+
+    Args:
+        rows (iterable): the rows, as dictionnaries
+        path (string): path of the file
+        file_format (string, optional): "csv" or "jsonl". Defaults to the extension of the file.
+        columns (list, optional): columns of a CSV file. Defaults to None, for the keys of all the rows.
+
+    Returns:
+        integer: number of written rows
+    """
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        return write_rows_to(rows, handle, file_format or guess_format(path), columns)
+
+
+def write_rows_to(rows, handle, file_format, columns=None):
+    """Write rows in an opened file, like sys.stdout, one by one
+
+    Args:
+        rows (iterable): the rows, as dictionnaries
+        handle (file): the opened file
+        file_format (string): "csv" or "jsonl"
+        columns (list, optional): columns of a CSV file, the keys of every row must be in it.
+                                  Defaults to None, for the keys of all the rows, kept in memory to find them.
+
+    Returns:
+        integer: number of written rows
+    """
+    count = 0
+    if file_format == "jsonl":
+        for count, row in enumerate(rows, 1):
+            handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+        return count
+    if columns is None:
+        rows = list(rows)
+        columns = columns_of(rows)
+    if not columns:
+        return 0
+    # une clé absente d'une ligne donne une case vide
+    writer = csv.DictWriter(handle, fieldnames=columns)
+    writer.writeheader()
+    for count, row in enumerate(rows, 1):
+        writer.writerow({key: json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value
+                         for key, value in row.items()})
+    return count
+
+
+def report_row_to_dict(row):
+    """Turn a row of a report, like ['Prénom: Light', 'Nom: Guim'], into a dictionnary
+
+    Args:
+        row (list): the displayed row
+
+    Returns:
+        dictionnary: value of each label
+    """
+    return dict(cell.split(": ", 1) if ": " in cell else (cell, "") for cell in row)
+
+
+def export_report(path, choice, tournament_choice=None, sorting=None, round_choice=None, file_format=None):
+    """Export one of the reports of Tournament.get_report
+
+    Args:
+        path (string): path of the file
+        choice (integer): number of the wished report
+        tournament_choice (integer, optional): id of the wished tournament. Defaults to None.
+        sorting (string, optional): a for alphabetical, c for rank. Defaults to None.
+        round_choice (integer, optional): number of the round in the tournament. Defaults to None.
+        file_format (string, optional): "csv" or "jsonl". Defaults to the extension of the file.
+
+    Returns:
+        integer: number of written rows
+    """
+    rows = Tournament.get_report(choice, tournament_choice, sorting, round_choice)
+    return write_rows((report_row_to_dict(row) for row in rows), path, file_format)
+
+
+def export_players(path, file_format=None):
+    """Export all the players of the database
+
+    Args:
+        path (string): path of the file
+        file_format (string, optional): "csv" or "jsonl". Defaults to the extension of the file.
+
+    Returns:
+        integer: number of written rows
+    """
+    columns = columns_of(Tournament.get_all_players()) if (file_format or guess_format(path)) == "csv" else None
+    return write_rows(Tournament.get_all_players(), path, file_format, columns)
+
+
+def export_tournament(tournament_id, directory, file_format="csv"):
+    """Export a tournament: its description, standings, rounds, matchs and scores
+    Each of them is written in its own file, named after the tournament id.
+
+    Args:
+        tournament_id (integer): id of the tournament
+        directory (string): directory receiving the files
+        file_format (string, optional): "csv" or "jsonl". Defaults to "csv".
+
+    Returns:
+        dictionnary: number of written rows of each file
+    """
+    tournament = Tournament.__table__.get_by(id=tournament_id)
+    if tournament is None:
+        return {}
+    description = {key: value for key, value in tournament.items() if key not in ("standings", "played_pairs")}
+    parts = {"tournament": [description],
+             # l'export ne modifie pas la base: les classements manquants ne sont pas enregistrés
+             "standings": Tournament.compute_standings(tournament),
+             "rounds": Tournament.get_tournament_rounds(tournament_id),
+             "matchs": Tournament.get_tournament_matchs(tournament_id),
+             "scores": Tournament.get_tournament_scores(tournament_id)}
+    written = {}
+    for part, rows in parts.items():
+        path = os.path.join(directory, f"tournament_{tournament_id}_{part}.{file_format}")
+        written[path] = write_rows(rows, path, file_format)
+    return written
+
+
+def export_tournaments(directory, tournament_ids=None, file_format="csv", workers=None):
+    """Export several tournaments, in parallel when there are several workers
+
+    Args:
+        directory (string): directory receiving the files
+        tournament_ids (list, optional): ids of the tournaments. Defaults to None, for all of them.
+        file_format (string, optional): "csv" or "jsonl". Defaults to "csv".
+        workers (integer, optional): number of processes. Defaults to the number of processors.
+
+    Returns:
+        dictionnary: number of written rows of each file
+    """
+    os.makedirs(directory, exist_ok=True)
+    if tournament_ids is None:
+        tournament_ids = [tournament["id"] for tournament in Tournament.get_all_tournaments()]
+    workers = min(workers or os.cpu_count() or 1, len(tournament_ids))
+    written = {}
+    if workers <= 1:
+        for tournament_id in tournament_ids:
+            written.update(export_tournament(tournament_id, directory, file_format))
+        return written
+    # "spawn": chaque processus ouvre sa propre connexion à la base au lieu d'hériter de celle-ci
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for files in pool.map(export_tournament, tournament_ids, itertools.repeat(directory),
+                              itertools.repeat(file_format)):
+            written.update(files)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporte des rapports ou des tournois en CSV ou json-lines")
+    commands = parser.add_subparsers(dest="command", required=True)
+    players = commands.add_parser("players", help="tous les joueurs")
+    players.add_argument("path")
+    report = commands.add_parser("report", help="un des rapports du menu 4")
+    report.add_argument("choice", type=int, choices=range(1, 6))
+    report.add_argument("path")
+    report.add_argument("--tournament", type=int)
+    report.add_argument("--sorting", choices=("a", "c"), default="c")
+    report.add_argument("--round", type=int)
+    tournaments = commands.add_parser("tournaments", help="rounds, matchs et scores de tournois")
+    tournaments.add_argument("directory")
+    tournaments.add_argument("ids", type=int, nargs="*", help="ids des tournois, tous par défaut")
+    tournaments.add_argument("--workers", type=int)
+    for command in (players, report, tournaments):
+        command.add_argument("--format", choices=EXPORT_FORMATS)
+    args = parser.parse_args()
+
+    if args.command == "players":
+        print(f"{export_players(args.path, args.format)} lignes exportées")
+    elif args.command == "report":
+        count = export_report(args.path, args.choice, args.tournament, args.sorting, args.round, args.format)
+        print(f"{count} lignes exportées")
+    else:
+        written = export_tournaments(args.directory, args.ids or None, args.format or "csv", args.workers)
+        for path, count in written.items():
+            print(f"{path}: {count} lignes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+This module imports players in bulk from a CSV or json-lines file.
+
+The file is read line by line. Valid rows become players whose ids are
+taken in one contiguous block, then all players are saved in a single
+write. Invalid rows are rejected with the reason, they do not stop the import.
+
+CSV files need a header with the columns firstname, lastname, birth_date,
+gender and elo. In json-lines files each line is an object with the same keys.
+"""
+import csv
+import json
+import os
+
+from src.models import Player, Tournament
+
+
+PLAYER_FIELDS = ("firstname", "lastname", "birth_date", "gender", "elo")
+
+
+def read_rows(path, file_format=None):
+    """Yield the rows of the file one by one
+
+    Args:
+        path (string): path of the file
+        file_format (string, optional): "csv" or "jsonl". Defaults to the extension of the file.
+
+    Yields:
+        tuple: line number and the row as a dictionnary, or None if the line is not readable
+    """
+    if file_format is None:
+        file_format = "csv" if os.path.splitext(path)[1].lower() == ".csv" else "jsonl"
+    with open(path, newline="", encoding="utf-8") as handle:
+        if file_format == "csv":
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+
+
+def validate_row(row):
+    """Check a row with the rules of the player creation view
+
+    Args:
+        row (dictionnary): the row read in the file
+
+    Returns:
+        dictionnary: the attributes of the player, None if the row is rejected
+        string: the reason of the rejection, None if the row is valid
+    """
+    if row is None:
+        return None, "ligne illisible"
+    # une valeur json comme "elo": 0 est gardée, seuls les champs absents ou null sont vides
+    attrs = {field: "" if row.get(field) is None else str(row[field]).strip() for field in PLAYER_FIELDS}
+    if not attrs["firstname"]:
+        return None, "le prénom est obligatoire"
+    if not attrs["lastname"]:
+        return None, "le nom est obligatoire"
+    try:
+        attrs["elo"] = int(attrs["elo"])
+    except ValueError:
+        return None, "le classement est obligatoire et doit être un entier"
+    if attrs["elo"] < 0:
+        return None, "le classement ne peut pas être négatif"
+    return attrs, None
+
+
+def import_players(path, file_format=None):
+    """Import all valid players of a file
+
+    Args:
+        path (string): path of the CSV or json-lines file
+        file_format (string, optional): "csv" or "jsonl". Defaults to the extension of the file.
+
+    Returns:
+        integer: number of imported players
+        list: (line number, reason) of each rejected row
+    """
+    players, rejected = [], []
+    for line_number, row in read_rows(path, file_format):
+        attrs, reason = validate_row(row)
+        if reason:
+            rejected.append((line_number, reason))
+        else:
+            players.append(Player(**attrs))
+    first_id = Tournament.reserve_player_ids(len(players))
+    for player_id, player in enumerate(players, first_id):
+        player.id = player_id
+    Player.save_many(players)
+    return len(players), rejected
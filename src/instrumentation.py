@@ -0,0 +1,422 @@
+"""
+Count and time the database accesses of the application, on demand.
+
+Once enabled, the methods of the tables and of the storages are replaced
+by wrappers recording each access per table, with its kind:
+    - lookup: documents found by an indexed field
+    - scan: every document of the table read, no index could be used
+    - page: documents read in the order of a sorted field
+    - read: one document read by its doc_id
+    - write: documents inserted, updated or removed
+    - load, commit, compaction: the database file read, written or merged
+
+The public methods of the models and of AppController are wrapped too.
+An access is attributed to every operation running when it happens, so
+the accesses of AppController.generate_tour include the ones of the
+Tournament methods it calls. Accesses made outside of any operation
+are attributed to "-".
+
+At exit, the count and the p50/p95 durations of each operation and of
+its accesses are printed, or saved in a json file. The first call of one
+operation can also be run under cProfile or tracemalloc.
+
+Nothing is wrapped while it is not enabled, so the application runs as fast as before:
+
+    CHESS_PROFILE=1 python main.py
+    python main.py --profile
+    CHESS_PROFILE=1 CHESS_PROFILE_OUTPUT=stats.json python main.py serve
+    CHESS_PROFILE=1 CHESS_PROFILE_CAPTURE=AppController.generate_tour:tracemalloc python main.py
+"""
+import atexit
+import collections
+import cProfile
+import functools
+import inspect
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+
+# Opération à laquelle sont attribués les accès faits hors de toute opération
+NO_OPERATION = "-"
+
+# Nombre de lignes affichées par cProfile et tracemalloc
+CAPTURE_LINES = 20
+
+_enabled = False
+_instrumented = set()
+_lock = threading.Lock()
+# durées en secondes: de chaque opération, et de chaque accès par opération, table et nature
+_operations = collections.defaultdict(list)
+_accesses = collections.defaultdict(lambda: collections.defaultdict(list))
+# chaque fil d'exécution a sa pile d'opérations en cours
+_local = threading.local()
+_capture = {"operation": None, "mode": None, "done": False}
+
+
+def _state():
+    """ Return the operations running in the current thread and the kinds of accesses being recorded """
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+        _local.recording = set()
+    return _local
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable(output=None, capture=None):
+    """Wrap the tables, the storages, the models and the controller, and report the statistics at exit
+    Nothing is done if it is already enabled.
+
+    Args:
+        output (string, optional): json file receiving the statistics. Defaults to None, to print them.
+        capture (string, optional): "Class.method" whose first call is profiled, followed by
+                                    ":cprofile" (the default) or ":tracemalloc". Defaults to None.
+    """
+    global _enabled
+    if _enabled:
+        return
+    _enabled = True
+    if capture:
+        operation, _, mode = capture.partition(":")
+        _capture.update(operation=operation, mode=mode or "cprofile")
+
+    from src import models, sqlite_engine, storage
+    instrument_tables(models.IndexedTable, sqlite_engine.SQLiteTable)
+    instrument_storages(storage.CachedJSONStorage, storage.JournalStorage)
+    instrument_loaded()
+    atexit.register(report, output)
+
+
+def instrument_loaded():
+    """Wrap the classes of the models and of the controller already defined
+    The controller, imported after the models, calls it again once AppController is defined.
+    """
+    for module, names in (("src.models", ("Tournament", "Player", "Match", "Round", "Score", "Sequence")),
+                          ("src.controller", ("AppController",))):
+        for name in names:
+            cls = getattr(sys.modules.get(module), name, None)
+            if cls is not None:
+                instrument_class(cls)
+
+
+def _record(key, duration):
+    """ Add the duration of an access to the operations running in the current thread """
+    operations = set(_state().stack) or {NO_OPERATION}
+    with _lock:
+        for operation in operations:
+            _accesses[operation][key].append(duration)
+
+
+def _access(function, kind_of, category="table"):
+    """Wrap a method of a table or a storage so each call is recorded as an access
+    Accesses made by the wrapped method itself, like all() iterating the table, are not counted twice.
+
+    Args:
+        function (function): the method
+        kind_of (function): return the table and the kind of the access, from the arguments of the method
+        category (string, optional): "table" or "storage", the accesses nested in the same category
+                                     are not recorded. Defaults to "table".
+
+    Returns:
+        function: the wrapper
+    """
+    if inspect.isgeneratorfunction(function):
+        @functools.wraps(function)
+        def generator_wrapper(self, *args, **kwargs):
+            # seules les étapes du générateur sont mesurées, pas le code qui le parcourt
+            key = kind_of(self, args, kwargs)
+            iterator = function(self, *args, **kwargs)
+            duration = 0
+            try:
+                while True:
+                    state = _state()
+                    nested = category in state.recording
+                    state.recording.add(category)
+                    start = time.perf_counter()
+                    try:
+                        value = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        duration += time.perf_counter() - start
+                        if not nested:
+                            state.recording.discard(category)
+                    yield value
+            finally:
+                if not nested:
+                    _record(key, duration)
+        return generator_wrapper
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        state = _state()
+        if category in state.recording:
+            return function(self, *args, **kwargs)
+        state.recording.add(category)
+        start = time.perf_counter()
+        try:
+            return function(self, *args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            state.recording.discard(category)
+            _record(kind_of(self, args, kwargs), duration)
+    return wrapper
+
+
+def _indexed_fields(table):
+    # IndexedTable: champs indexés en mémoire, SQLiteTable: colonnes indexées
+    if hasattr(table, "key_fields"):
+        return table.key_fields
+    from src.models import INDEXED_FIELDS
+    return INDEXED_FIELDS.get(table.name, ())
+
+
+def _sorted_fields(table):
+    if hasattr(table, "key_fields"):
+        return table.key_fields
+    from src.models import SORTED_FIELDS
+    return SORTED_FIELDS.get(table.name, ())
+
+
+def _scan_kind(table, args, kwargs):
+    return table.name, "scan"
+
+
+def _write_kind(table, args, kwargs):
+    return table.name, "write"
+
+
+def _keys_kind(table, args, kwargs):
+    # search_by(**keys) ou SQLiteTable._select(keys)
+    keys = args[0] if args else kwargs
+    return table.name, "lookup" if set(keys) & set(_indexed_fields(table)) else "scan"
+
+
+def _sorted_kind(table, args, kwargs):
+    field = args[0] if args else kwargs.get("field")
+    return table.name, "page" if field in _sorted_fields(table) else "scan"
+
+
+def _get_kind(table, args, kwargs):
+    # Table.get(cond=None, doc_id=None): lecture directe par doc_id, sinon parcours
+    return table.name, "read" if kwargs.get("doc_id") is not None else "scan"
+
+
+def _storage_kind(kind):
+    """ Return the function giving the file and the kind of a storage access """
+    def kind_of(storage, args, kwargs):
+        return os.path.basename(storage.path), kind
+    return kind_of
+
+
+def instrument_tables(indexed_table, sqlite_table):
+    """Wrap the methods of the tables of both engines which access the documents
+
+    Args:
+        indexed_table (class): table of the tinydb engine
+        sqlite_table (class): table of the sqlite engine
+    """
+    kinds = {indexed_table: {"search_by": _keys_kind, "sorted_by": _sorted_kind, "get": _get_kind,
+                             "search": _scan_kind, "all": _scan_kind, "__iter__": _scan_kind, "rows": _scan_kind,
+                             "insert": _write_kind, "insert_multiple": _write_kind, "update": _write_kind,
+                             "update_many": _write_kind, "remove": _write_kind, "truncate": _write_kind},
+             # search_by, get_by, update_by et all passent tous par _select
+             sqlite_table: {"_select": _keys_kind, "sorted_by": _sorted_kind, "__iter__": _scan_kind,
+                            "rows": _scan_kind,
+                            "insert": _write_kind, "insert_multiple": _write_kind, "update": _write_kind,
+                            "update_many": _write_kind, "remove": _write_kind}}
+    for cls, methods in kinds.items():
+        if cls in _instrumented:
+            continue
+        _instrumented.add(cls)
+        for name, kind_of in methods.items():
+            setattr(cls, name, _access(getattr(cls, name), kind_of))
+
+
+def instrument_storages(*classes):
+    """Wrap the methods of the storages reading, writing and merging the database file
+
+    Args:
+        classes (class): storages of the tinydb engine
+    """
+    for cls in classes:
+        if cls in _instrumented:
+            continue
+        _instrumented.add(cls)
+        for name, kind in (("_load", "load"), ("_commit", "commit"), ("_merge_sealed_journal", "compaction")):
+            # une méthode héritée est déjà enveloppée dans la classe parente
+            if name in vars(cls):
+                setattr(cls, name, _access(vars(cls)[name], _storage_kind(kind), "storage"))
+
+
+def instrument_class(cls):
+    """Wrap the public methods of a class of the models or of the controller, so they are recorded as operations
+
+    Args:
+        cls (class): the class, its methods are named "Class.method"
+    """
+    if cls in _instrumented:
+        return
+    _instrumented.add(cls)
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        operation = f"{cls.__name__}.{name}"
+        if isinstance(attribute, (classmethod, staticmethod)):
+            setattr(cls, name, type(attribute)(_operation(operation, attribute.__func__)))
+        elif inspect.isfunction(attribute):
+            setattr(cls, name, _operation(operation, attribute))
+
+
+def _operation(name, function):
+    """Wrap a method so its calls are recorded as an operation
+    The steps of a generator, like the reports, are measured one by one.
+
+    Args:
+        name (string): name of the operation
+        function (function): the method
+
+    Returns:
+        function: the wrapper
+    """
+    if inspect.isgeneratorfunction(function):
+        @functools.wraps(function)
+        def generator_wrapper(*args, **kwargs):
+            iterator = function(*args, **kwargs)
+            duration = 0
+            try:
+                while True:
+                    stack = _state().stack
+                    stack.append(name)
+                    start = time.perf_counter()
+                    try:
+                        value = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        duration += time.perf_counter() - start
+                        stack.pop()
+                    yield value
+            finally:
+                with _lock:
+                    _operations[name].append(duration)
+        return generator_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        stack = _state().stack
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            if name == _capture["operation"] and not _capture["done"]:
+                _capture["done"] = True
+                return _captured(name, function, args, kwargs)
+            return function(*args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            with _lock:
+                _operations[name].append(duration)
+    return wrapper
+
+
+def _captured(name, function, args, kwargs):
+    """Call a method under cProfile or tracemalloc and print what they measured on stderr
+    The cProfile statistics are also saved in "<operation>.prof", to be read by pstats or snakeviz.
+
+    Returns:
+        variable: what the method returned
+    """
+    if _capture["mode"] == "tracemalloc":
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            differences = tracemalloc.take_snapshot().compare_to(before, "lineno")
+            if started:
+                tracemalloc.stop()
+            print(f"\nMémoire allouée par {name}:", file=sys.stderr)
+            for difference in differences[:CAPTURE_LINES]:
+                print(difference, file=sys.stderr)
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        path = f"{name}.prof"
+        profiler.dump_stats(path)
+        print(f"\nProfil de {name}, enregistré dans {path}:", file=sys.stderr)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(CAPTURE_LINES)
+
+
+def percentile(durations, rank):
+    """Return a percentile of durations, by the nearest rank method
+
+    Args:
+        durations (list): the durations, in seconds
+        rank (integer): the percentile, from 1 to 100
+
+    Returns:
+        float: the duration in milliseconds
+    """
+    ordered = sorted(durations)
+    index = max(0, -(-len(ordered) * rank // 100) - 1)
+    return ordered[index] * 1000
+
+
+def _summary(durations):
+    return {"count": len(durations),
+            "total_ms": round(sum(durations) * 1000, 3),
+            "p50_ms": round(percentile(durations, 50), 3),
+            "p95_ms": round(percentile(durations, 95), 3)}
+
+
+def statistics():
+    """Return the statistics recorded since the instrumentation was enabled
+
+    Returns:
+        dictionnary: for each operation its calls, and the accesses made while it ran,
+                     by "table:kind". Accesses made outside of any operation are under "-".
+    """
+    with _lock:
+        operations = {name: list(durations) for name, durations in _operations.items()}
+        accesses = {name: {key: list(durations) for key, durations in keys.items()}
+                    for name, keys in _accesses.items()}
+    result = {}
+    for name in sorted(set(operations) | set(accesses)):
+        result[name] = {"calls": _summary(operations[name]) if name in operations else None,
+                        "accesses": {f"{table}:{kind}": _summary(durations)
+                                     for (table, kind), durations in sorted(accesses.get(name, {}).items())}}
+    return result
+
+
+def report(output=None):
+    """Print the statistics on stderr, or save them in a json file
+
+    Args:
+        output (string, optional): path of the json file. Defaults to None, to print them.
+    """
+    result = statistics()
+    if output:
+        with open(output, "w") as handle:
+            json.dump({"pid": os.getpid(), "operations": result}, handle, indent=2)
+        return
+    print(f"\n{'opération / accès':<46} {'nombre':>8} {'total':>11} {'p50':>10} {'p95':>10}", file=sys.stderr)
+    for name, recorded in result.items():
+        rows = [(name, recorded["calls"])] + [("    " + key, summary) for key, summary in recorded["accesses"].items()]
+        for label, summary in rows:
+            if summary is None:
+                print(label, file=sys.stderr)
+                continue
+            print(f"{label:<46} {summary['count']:>8} {summary['total_ms']:>8.2f} ms {summary['p50_ms']:>7.3f} ms "
+                  f"{summary['p95_ms']:>7.3f} ms", file=sys.stderr)
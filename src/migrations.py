@@ -0,0 +1,120 @@
+"""
+This module updates the documents saved by older versions of the application.
+
+Each migration is applied once: its name is saved in the table 'migrations'
+when it is done. They work through the tables of the database, so both
+engines are migrated in place. Pending migrations are applied when the
+database is opened, or with:
+
+    python -m src.migrations
+"""
+import json
+
+from src.pairing import pair_key
+
+
+def player_id_from_label(label):
+    """Extract the id of a player from the label saved in an old match
+
+    Args:
+        label (string): player label like 'Light(id:12)'
+
+    Returns:
+        integer: id of the player in database
+    """
+    return int(label[label.rindex("(id:") + 4:-1])
+
+
+def typed_match_fields(database):
+    """Replace the 'joueur1' and 'joueur2' labels of the matchs by the ids of the players
+    and give each match the id of its tournament
+
+    Args:
+        database (Database or SQLiteDatabase): the database to migrate
+    """
+    tournament_of_round = {round["round_id"]: round["tournament_id"] for round in database.table('rounds').all()}
+    matchs = database.table('matchs')
+    for game in matchs.all():
+        if "player_one_id" in game:
+            continue
+
+        def retype(document, game=game):
+            document["player_one_id"] = player_id_from_label(document.pop("joueur1"))
+            document["player_two_id"] = player_id_from_label(document.pop("joueur2"))
+            document["tournament_id"] = tournament_of_round.get(game["round_id"])
+        matchs.update(retype, doc_ids=[game.doc_id])
+
+
+def played_pairs_index(database):
+    """Replace the list of the games not played yet of each tournament, which held every
+    pair of its players, by the keys of the pairs already played
+
+    Args:
+        database (Database or SQLiteDatabase): the database to migrate
+    """
+    played = {}
+    for game in database.table('matchs').all():
+        played.setdefault(game["tournament_id"], set()).add(pair_key(game["player_one_id"], game["player_two_id"]))
+    tournaments = database.table('tournaments')
+    for tournament in tournaments.all():
+
+        def index(document, tournament=tournament):
+            document.pop("list_of_possible_games", None)
+            document["played_pairs"] = sorted(played.get(tournament["id"], ()))
+        tournaments.update(index, doc_ids=[tournament.doc_id])
+
+
+def round_games_as_lists(database):
+    """Replace the games of the rounds saved as json strings by the lists saved by the
+    newer versions, so every round holds its games in the same format
+
+    Args:
+        database (Database or SQLiteDatabase): the database to migrate
+    """
+    rounds = database.table('rounds')
+    for round in rounds.all():
+        if not any(isinstance(game, str) for game in round.get("games") or []):
+            continue
+
+        def decode(document):
+            document["games"] = [json.loads(game) if isinstance(game, str) else game for game in document["games"]]
+        rounds.update(decode, doc_ids=[round.doc_id])
+
+
+# Migrations in the order they have to be applied
+MIGRATIONS = [("typed_match_fields", typed_match_fields),
+              ("played_pairs_index", played_pairs_index),
+              ("round_games_as_lists", round_games_as_lists)]
+
+
+def migrate(database):
+    """Apply the migrations not applied yet, each one in a transaction
+
+    Args:
+        database (Database or SQLiteDatabase): the database to migrate
+
+    Returns:
+        list: names of the applied migrations
+    """
+    applied = []
+    done = database.table('migrations')
+    for name, migration in MIGRATIONS:
+        if done.get_by(name=name) is not None:
+            continue
+        with database.transaction():
+            migration(database)
+            done.insert({"name": name})
+        applied.append(name)
+    return applied
+
+
+def main():
+    # ouvrir la base applique les migrations en attente
+    from src.models import db
+
+    for migration in db.table('migrations').all():
+        print(f"{migration['name']}: appliquée")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,73 +5,626 @@ or return information from the database
 
 The database used here is TinyDB
 """
+import bisect
 import itertools
-import json
+import threading
 
 from datetime import datetime
-from tinydb import TinyDB, where, Query
+from collections.abc import Mapping, MutableMapping
+import numpy as np
+from tinydb import TinyDB
+from tinydb.table import Table
 from tinydb.operations import increment, add
-from copy import deepcopy
 
+from src import instrumentation, rating, settings
+from src.migrations import migrate
+from src.pairing import pair_key, pair_round
+from src.records import MatchRecord, PlayerRecord, TournamentRecord
+from src.schedule import SCHEDULES, SWISS, round_robin
+from src.sqlite_engine import SQLiteDatabase
+from src.storage import CachedJSONStorage, JournalStorage
+from src.tiebreaks import DEFAULT_TIEBREAKS, format_tiebreaks, opponent_arrays, tiebreak_values
 
-class Field:
-    """ take a couple key value and turn them into an attribute of the wanted class """
-    def __init__(self, key, value):
+
+# Fields used to find documents in each table. They are indexed in memory.
+INDEXED_FIELDS = {"tournaments": ("id",),
+                  "players": ("id",),
+                  "rounds": ("round_id", "tournament_id"),
+                  "matchs": ("match_id", "round_id", "tournament_id", "player_one_id", "player_two_id"),
+                  "scores": ("player_id", "tournament_id"),
+                  "sequences": ("kind",),
+                  "migrations": ("name",),
+                  "ratings": ("player_id", "round_id")}
+
+# Fields whose documents can be read in order, page by page. They are kept sorted in memory.
+SORTED_FIELDS = {"players": ("elo", "firstname")}
+
+# Nombre de documents écrits à la fois au-delà duquel un index trié est mis à jour en un seul passage
+BATCH_REINDEX = 16
+
+# Nombre de parties recalculées entre deux points de reprise du recalcul des classements elo
+CHECKPOINT_GAMES = 100000
+
+
+def sort_key(value):
+    """Return the key ordering the values of a sorted field
+    Texts are ordered without taking the case into account, missing values come last.
+
+    Args:
+        value (variable): value of the field
+
+    Returns:
+        tuple: the key
+    """
+    if value is None:
+        return (2, 0)
+    if isinstance(value, str):
+        return (1, value.lower())
+    return (0, value)
+
+
+class HashIndex:
+    """ Maps the values of a field to the ids of the documents having them """
+    def __init__(self, field):
         """
         Args:
-            key (string): describe the attribute
-            value (variable): can be of any type
+            field (string): indexed field of the documents
         """
-        self.key = key
-        self.value = value
+        self.field = field
+        self.buckets = {}
+        self.values = {}  # doc_id -> valeur indexée, pour pouvoir la retirer
 
+    def add(self, doc_id, document):
+        """Index a document
 
-class Item:
-    """ Turns dictionnary keys into attributs"""
-    def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            # transforme un dictionnaire en objets d'une classe
-            setattr(self, key, Field(key, value))
+        Args:
+            doc_id (integer): id of the document in its table
+            document (dictionnary): the document
+        """
+        value = document.get(self.field)
+        try:
+            self.buckets.setdefault(value, set()).add(doc_id)
+        except TypeError:  # les valeurs non hashables ne sont pas indexées
+            return
+        self.values[doc_id] = value
 
-    def __repr__(self):
-        return self.to_json()
+    def discard(self, doc_id):
+        """Remove a document from the index
+
+        Args:
+            doc_id (integer): id of the document in its table
+        """
+        if doc_id not in self.values:
+            return
+        value = self.values.pop(doc_id)
+        bucket = self.buckets[value]
+        bucket.discard(doc_id)
+        if not bucket:
+            del self.buckets[value]
+
+    def lookup(self, value):
+        """Return the ids of the documents having the value
+
+        Args:
+            value (variable): value of the indexed field
+
+        Returns:
+            set: ids of the documents
+        """
+        return self.buckets.get(value, set())
+
+
+class SortedIndex:
+    """ Keeps the ids of the documents sorted by the value of a field
+    The entries are sorted once, then each write inserts its document at its place.
+    """
+    def __init__(self, field):
+        """
+        Args:
+            field (string): sorted field of the documents
+        """
+        self.field = field
+        self.entries = []  # (clé de tri, doc_id)
+        self.values = {}  # doc_id -> clé de tri, pour pouvoir la retirer
+        self._sorted = False
+
+    def add(self, doc_id, document):
+        """Index a document
+
+        Args:
+            doc_id (integer): id of the document in its table
+            document (dictionnary): the document
+        """
+        key = sort_key(document.get(self.field))
+        self.values[doc_id] = key
+        if self._sorted:
+            bisect.insort(self.entries, (key, doc_id))
+        else:
+            self.entries.append((key, doc_id))
+
+    def discard(self, doc_id):
+        """Remove a document from the index
+
+        Args:
+            doc_id (integer): id of the document in its table
+        """
+        if doc_id not in self.values:
+            return
+        entry = (self.values.pop(doc_id), doc_id)
+        if self._sorted:
+            del self.entries[bisect.bisect_left(self.entries, entry)]
+        else:
+            self.entries.remove(entry)
+
+    def replace(self, documents):
+        """Index again several documents in a single pass over the entries,
+        instead of removing them one by one
+
+        Args:
+            documents (dictionnary): new document of each doc_id, None if it has been removed
+        """
+        for doc_id in documents:
+            self.values.pop(doc_id, None)
+        self.entries = [entry for entry in self.entries if entry[1] not in documents]
+        for doc_id, document in documents.items():
+            if document is not None:
+                key = sort_key(document.get(self.field))
+                self.values[doc_id] = key
+                self.entries.append((key, doc_id))
+        # trié de nouveau à la prochaine lecture, les entrées déjà triées le sont vite
+        self._sorted = False
+
+    def _sort(self):
+        if not self._sorted:
+            self.entries.sort()
+            self._sorted = True
+
+    def lookup(self, value):
+        """Return the ids of the documents whose value has the same key
+
+        Args:
+            value (variable): value of the sorted field
+
+        Returns:
+            set: ids of the documents
+        """
+        self._sort()
+        key = sort_key(value)
+        start = bisect.bisect_left(self.entries, (key,))
+        end = bisect.bisect_left(self.entries, (key, float("inf")))
+        return {doc_id for _, doc_id in self.entries[start:end]}
+
+    def page(self, offset=0, limit=None, reverse=False):
+        """Return the ids of a page of documents in the order of the field
+
+        Args:
+            offset (integer, optional): number of documents to skip. Defaults to 0.
+            limit (integer, optional): maximum number of documents. Defaults to None, for all of them.
+            reverse (boolean, optional): True for the decreasing order. Defaults to False.
+
+        Returns:
+            list: ids of the documents
+        """
+        self._sort()
+        if reverse:
+            end = len(self.entries) - offset
+            start = 0 if limit is None else max(end - limit, 0)
+            entries = reversed(self.entries[start:max(end, 0)])
+        else:
+            entries = self.entries[offset:None if limit is None else offset + limit]
+        return [doc_id for _, doc_id in entries]
+
+
+class IntKeyView(MutableMapping):
+    """ View of a stored table with integer document ids
+    TinyDB converts every key of a table at each read and write. This view
+    converts only the keys that are used.
+    """
+    def __init__(self, raw_table):
+        """
+        Args:
+            raw_table (dictionnary): documents by their id as a string
+        """
+        self.raw_table = raw_table
+
+    def __getitem__(self, doc_id):
+        return self.raw_table[str(doc_id)]
+
+    def __setitem__(self, doc_id, document):
+        self.raw_table[str(doc_id)] = document
+
+    def __delitem__(self, doc_id):
+        del self.raw_table[str(doc_id)]
+
+    def __contains__(self, doc_id):
+        return str(doc_id) in self.raw_table
+
+    def __iter__(self):
+        return (int(doc_id) for doc_id in self.raw_table)
 
-    def to_json(self):
-        """ Take all attributes from children class and organize them into json
+    def __len__(self):
+        return len(self.raw_table)
+
+
+class IndexedTable(Table):
+    """ TinyDB table answering lookups by key fields with in-memory hash indexes
+    Indexes are built at the first lookup and kept up to date by the writes
+    made through the table. They are dropped when the storage forgets its
+    data, after a rollback or a write of another program for example.
+    """
+    def __init__(self, storage, name, **kwargs):
+        super().__init__(storage, name, **kwargs)
+        self._indexes = None
+        self._generation = getattr(storage, "generation", 0)
+
+    def _check_generation(self):
+        """Drop everything cached by the table if the storage data has been reloaded
+        or is about to be, because another program has written the database.
+        """
+        if hasattr(self._storage, "refresh"):
+            self._storage.refresh()
+        generation = getattr(self._storage, "generation", 0)
+        if generation != self._generation:
+            self._generation = generation
+            self._indexes = None
+            self._next_id = None
+            self.clear_cache()
+
+    def _get_next_id(self):
+        self._check_generation()
+        return super()._get_next_id()
+
+    def search(self, cond):
+        self._check_generation()
+        return super().search(cond)
+
+    def _get_indexes(self):
+        """Return the indexes of the table, building them if needed
+
+        Returns:
+            dictionnary: HashIndex of each indexed field, SortedIndex of each sorted field
+        """
+        self._check_generation()
+        if self._indexes is None:
+            self._indexes = {field: HashIndex(field) for field in INDEXED_FIELDS.get(self.name, ())}
+            self._indexes.update({field: SortedIndex(field) for field in SORTED_FIELDS.get(self.name, ())})
+            for doc_id, document in self._raw_table().items():
+                for index in self._indexes.values():
+                    index.add(int(doc_id), document)
+        return self._indexes
+
+    def _raw_table(self):
+        """Return the table as stored, without converting every document
 
         Returns:
-            json: dictionnary that can be seen and saved in the database
+            dictionnary: documents by their id as a string
         """
-        item = {}
-        for attr in dir(self):
-            if isinstance(getattr(self, attr), Field):
-                item[attr] = getattr(self, attr).value
-        return json.dumps(item)
+        tables = self._storage.read() or {}
+        return tables.get(self.name, {})
 
+    def _read_table(self):
+        self._check_generation()
+        return IntKeyView(self._raw_table())
 
-class Collection:
-    """ Take a dictionnary in argument and turns items into attributes and corresponding values """
-    def __init__(self, data=None):
-        """Initiate Collection with items from a dictionnary
+    def _update_table(self, updater):
+        # les documents sont modifiés sur place au lieu de recopier toute la table
+        tables = self._storage.read() or {}
+        updater(IntKeyView(tables.setdefault(self.name, {})))
+        self._storage.write(tables)
+        self.clear_cache()
+
+    def _reindex(self, doc_ids, removed=False):
+        """Update the indexes after a write
+
+        Args:
+            doc_ids (list): ids of the written documents
+            removed (boolean, optional): True if the documents were removed. Defaults to False.
+        """
+        self._check_generation()
+        if self._indexes is None:
+            return
+        table = self._raw_table()
+        for index in self._indexes.values():
+            if isinstance(index, SortedIndex) and len(doc_ids) > BATCH_REINDEX:
+                index.replace({doc_id: None if removed else table[str(doc_id)] for doc_id in doc_ids})
+                continue
+            for doc_id in doc_ids:
+                index.discard(doc_id)
+                if not removed:
+                    index.add(doc_id, table[str(doc_id)])
+
+    # Each write runs in a transaction of the storage, so the changed documents
+    # are reported with mark_changed before the storage saves them.
+
+    def insert(self, document):
+        with self._storage.transaction():
+            doc_id = super().insert(document)
+            self._storage.mark_changed(self.name, [doc_id])
+        self._reindex([doc_id])
+        return doc_id
+
+    def insert_multiple(self, documents):
+        doc_ids = []
+
+        def updater(table):
+            # comme Table.insert_multiple, mais les ids suivent le premier sans être recalculés pour chaque document
+            next_id = self._get_next_id()
+            for document in documents:
+                if not isinstance(document, Mapping):
+                    raise ValueError('Document is not a Mapping')
+                table[next_id] = dict(document)
+                doc_ids.append(next_id)
+                next_id += 1
+            self._next_id = next_id
+
+        with self._storage.transaction():
+            self._update_table(updater)
+            self._storage.mark_changed(self.name, doc_ids)
+        self._reindex(doc_ids)
+        return doc_ids
+
+    def update(self, fields, cond=None, doc_ids=None):
+        with self._storage.transaction():
+            updated = super().update(fields, cond, doc_ids)
+            self._storage.mark_changed(self.name, updated)
+        if not isinstance(fields, Mapping) or set(fields) & set(self._indexes or ()):
+            self._reindex(updated)
+        return updated
+
+    def update_many(self, updates):
+        """Update several documents at once, each with its own fields
 
         Args:
-            data (dictionnary, optional): [description]. Defaults to None.
+            updates (dictionnary): fields to update of each doc_id
+
+        Returns:
+            list: ids of the updated documents
+        """
+        def updater(table):
+            for doc_id, fields in updates.items():
+                table[doc_id].update(fields)
+
+        doc_ids = list(updates)
+        with self._storage.transaction():
+            self._update_table(updater)
+            self._storage.mark_changed(self.name, doc_ids)
+        if any(set(fields) & set(self._indexes or ()) for fields in updates.values()):
+            self._reindex(doc_ids)
+        return doc_ids
+
+    def remove(self, cond=None, doc_ids=None):
+        with self._storage.transaction():
+            removed = super().remove(cond, doc_ids)
+            self._storage.mark_changed(self.name, removed)
+        self._reindex(removed, removed=True)
+        return removed
+
+    def truncate(self):
+        with self._storage.transaction():
+            super().truncate()
+            self._storage.mark_changed(self.name, None)
+        self._indexes = None
+
+    def search_by(self, **keys):
+        """Return the documents whose fields are equal to the given values
+        The lookup uses the index of the most selective indexed field.
+
+        Args:
+            keys: field=value pairs the documents must match
+
+        Returns:
+            list: matching documents
+        """
+        indexes = self._get_indexes()
+        candidates = None
+        for field, value in keys.items():
+            if field in indexes:
+                doc_ids = indexes[field].lookup(value)
+                if candidates is None or len(doc_ids) < len(candidates):
+                    candidates = doc_ids
+        table = self._raw_table()
+        if candidates is None:
+            candidates = (int(doc_id) for doc_id in table)
+        documents = []
+        for doc_id in sorted(candidates):
+            document = table[str(doc_id)]
+            if all(document.get(field) == value for field, value in keys.items()):
+                documents.append(self.document_class(document, doc_id))
+        return documents
+
+    def get_by(self, **keys):
+        """Return the first document whose fields are equal to the given values
+
+        Args:
+            keys: field=value pairs the document must match
+
+        Returns:
+            dictionnary: the document, None if there is none
+        """
+        documents = self.search_by(**keys)
+        return documents[0] if documents else None
+
+    def rows(self, *fields):
+        """Yield the id and some fields of every document, without copying the documents
+        For the computations going through a whole table.
+
+        Args:
+            fields: names of the fields, a missing field gives None
+
+        Yields:
+            tuple: id of the document then the value of each field
+        """
+        self._check_generation()
+        for doc_id, document in self._raw_table().items():
+            yield (int(doc_id), *map(document.get, fields))
+
+    def sorted_by(self, field, reverse=False, offset=0, limit=None):
+        """Yield a page of the documents in the order of a field
+        Sorted fields are read from their index, other fields sort the whole table.
+
+        Args:
+            field (string): the field giving the order
+            reverse (boolean, optional): True for the decreasing order. Defaults to False.
+            offset (integer, optional): number of documents to skip. Defaults to 0.
+            limit (integer, optional): maximum number of documents. Defaults to None, for all of them.
+
+        Yields:
+            dictionnary: the documents of the page
+        """
+        index = self._get_indexes().get(field)
+        table = self._raw_table()
+        if isinstance(index, SortedIndex):
+            doc_ids = index.page(offset, limit, reverse)
+        else:
+            doc_ids = sorted((int(doc_id) for doc_id in table),
+                             key=lambda doc_id: (sort_key(table[str(doc_id)].get(field)), doc_id), reverse=reverse)
+            doc_ids = doc_ids[offset:None if limit is None else offset + limit]
+        for doc_id in doc_ids:
+            yield self.document_class(table[str(doc_id)], doc_id)
+
+    def update_by(self, fields, **keys):
+        """Update the documents whose fields are equal to the given values
+
+        Args:
+            fields (dictionnary or callable): the fields to update or a tinydb operation
+            keys: field=value pairs the documents must match
+
+        Returns:
+            list: ids of the updated documents
         """
-        self._items = []
-        for item in data:
-            self._items.append(Item(**item))
+        doc_ids = [document.doc_id for document in self.search_by(**keys)]
+        if not doc_ids:
+            return []
+        return self.update(fields, doc_ids=doc_ids)
+
+
+class Database(TinyDB):
+    """ TinyDB database whose tables are indexed """
+    table_class = IndexedTable
+
+    def transaction(self, exclusive=False):
+        return self.storage.transaction(exclusive)
+
+    def compact(self):
+        self.storage.compact()
+
+    def version(self):
+        """ Return the version of the database, incremented by each write of any program """
+        return self.storage.lock.version()
+
+
+# Storages of db.json, chosen by settings.DB_STORAGE
+STORAGES = {"json": CachedJSONStorage, "journal": JournalStorage}
+
+
+def open_database():
+    """Open the database of the engine chosen in the settings
+
+    The migrations not applied yet to the saved documents are applied.
+
+    Returns:
+        Database or SQLiteDatabase: the database, both give the same interface to the models
+    """
+    if settings.DB_ENGINE == "sqlite":
+        database = SQLiteDatabase(settings.SQLITE_DB_PATH, INDEXED_FIELDS, SORTED_FIELDS)
+    else:
+        database = Database(settings.JSON_DB_PATH, storage=STORAGES[settings.DB_STORAGE])
+    migrate(database)
+    return database
 
-    @property
-    def items(self):
-        return self._items
 
+_database = None
+_database_lock = threading.Lock()
 
-db = TinyDB('db.json')
+
+def get_database():
+    """Return the database, opened at the first call
+    Importing the models does not read anything, so the programs start
+    at once whatever the size of the database.
+
+    Returns:
+        Database or SQLiteDatabase: the database
+    """
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = open_database()
+    return _database
+
+
+def close_database():
+    """Close the database, waiting for a merge of its journal if there is one running
+    The next access opens it again, with the settings of that time.
+    """
+    global _database
+    with _database_lock:
+        if _database is not None:
+            _database.close()
+            _database = None
+
+
+class LazyDatabase:
+    """ Stands for the database, which is opened at the first use of one of its methods """
+    def table(self, name):
+        # appelée à chaque accès d'un modèle à une table, sans passer par __getattr__
+        return get_database().table(name)
+
+    def __getattr__(self, name):
+        return getattr(get_database(), name)
+
+
+class LazyTable:
+    """ Table of a model class, found in the database when it is accessed
+    so the database is opened at the first access to a table, not at import.
+    """
+    def __init__(self, name):
+        self.name = name
+        self._database = None
+        self._table = None
+
+    def __get__(self, instance, owner):
+        database = get_database()
+        if database is not self._database:
+            self._table = database.table(self.name)
+            self._database = database
+        return self._table
+
+
+db = LazyDatabase()
+
+
+def transaction(exclusive=False):
+    """Group the database writes of a user action
+    Every write made in the block is kept in memory and db.json is written
+    once at the end. If an exception is raised db.json is left untouched.
+
+        with transaction():
+            Tournament.enter_results(...)
+            Tournament.save_results(...)
+
+    Args:
+        exclusive (boolean, optional): True to keep the other programs from writing the
+                                       database until the end of the block. Defaults to False.
+    """
+    return db.transaction(exclusive)
+
+
+def compact_database():
+    """Merge the journal into db.json, or rebuild the SQLite file"""
+    db.compact()
+
+
+def database_version():
+    """Return a value which changes when the database is written, by this program or another one
+    It can be read from any thread.
+    """
+    return db.version()
 
 
 class Tournament():
     """ Contains all methods used in database relations """
-    __table__ = db.table('tournaments')
+    __table__ = LazyTable('tournaments')
 
     name = None
     location = None
@@ -83,6 +636,8 @@ class Tournament():
     nb_of_played_round = None
     begin_date = None
     ending_date = None
+    tiebreaks = None
+    system = None
     id = None
 
     def __init__(self,
@@ -96,7 +651,9 @@ class Tournament():
                  nb_of_played_round=0,
                  begin_date=str(datetime.now()),
                  ending_date="",
-                 id=None):
+                 id=None,
+                 tiebreaks=None,
+                 system=SWISS):
 
         super().__init__()
         self.name = name
@@ -110,46 +667,110 @@ class Tournament():
         self.begin_date = begin_date
         self.ending_date = ending_date
         self.id = id
+        self.tiebreaks = list(tiebreaks or DEFAULT_TIEBREAKS)
+        self.system = system
 
     def save(self):
         """writte all attribute in the database at the corresponding table
+        The rounds of a round-robin tournament are all computed and saved with it,
+        the players being seeded by their elo.
         """
+        standings = Tournament.rank_standings([{"player_id": player_id,
+                                                "score": 0,
+                                                "elo": Player.__table__.get_by(id=player_id)["elo"],
+                                                "tiebreaks": [0] * len(self.tiebreaks)}
+                                               for player_id in self.players])
+        schedule = None
+        if self.system in SCHEDULES:
+            schedule = round_robin([entry["player_id"] for entry in standings], SCHEDULES[self.system])
         self.__table__.insert({"name": self.name,
                                "location": self.location,
                                "description": self.description,
-                               "nb_rounds": self.nb_rounds,
-                               "players": self.players,
+                               "nb_rounds": len(schedule) if schedule else self.nb_rounds,
+                               "players": list(self.players),
                                "game_rules": self.game_rules,
-                               "rounds": self.rounds,
+                               "rounds": list(self.rounds),
                                "nb_of_played_round": self.nb_of_played_round,
                                "begin_date": self.begin_date,
                                "ending_date": self.ending_date,
+                               "standings": standings,
+                               "tiebreaks": self.tiebreaks,
+                               "system": self.system,
+                               "played_pairs": [],
                                "id": self.id})
+        if schedule:
+            Tournament.save_schedule(self.id, schedule)
+
+    @classmethod
+    def save_schedule(cls, tournament_id, schedule):
+        """Save all the rounds of a tournament and their games, in one batch for each table
+        The rounds have no beginning date until they are started by generate_round.
+
+        Args:
+            tournament_id (integer): id of the tournament in database
+            schedule (list): games and exempted player of each round, as given by schedule.round_robin
+        """
+        first_round_id = Sequence.reserve("rounds", len(schedule))
+        first_match_id = Sequence.reserve("matchs", sum(len(games) for games, _ in schedule))
+        rounds = []
+        matchs = []
+        for number, (games, bye) in enumerate(schedule):
+            round_id = first_round_id + number
+            rounds.append({"round_id": round_id,
+                           "tournament_id": tournament_id,
+                           "name": f"Round {number + 1}",
+                           "beginning_date": None,
+                           "ending_date": None,
+                           "games": [],
+                           "bye": bye})
+            for player_one_id, player_two_id in games:
+                matchs.append({"player_one_id": player_one_id,
+                               "player_two_id": player_two_id,
+                               "score_one": 0,
+                               "score_two": 0,
+                               "round_id": round_id,
+                               "tournament_id": tournament_id,
+                               "match_id": first_match_id + len(matchs)})
+        Round.__table__.insert_multiple(rounds)
+        Match.__table__.insert_multiple(matchs)
 
     @classmethod
     def set_tournament_id(cls):
         """Automatically returns the id of a new tournament
-        It measures the lengh of the table 'tournaments' in the database
+        It is taken from the sequence of the tournaments
             Return:
                 integer: it will be the id of the tournament in the database
         """
-        return len(cls.__table__) + 1
+        return Sequence.next_id("tournaments")
 
     @classmethod
     def set_player_id(cls):
-        """Automatically returns the id of a new tournament
-        It measures the lengh of the table 'players' in the database
+        """Automatically returns the id of a new player
+        It is taken from the sequence of the players
             Return:
                 integer: it will be the id of the player in the database
         """
-        return len(db.table('players')) + 1
+        return Sequence.next_id("players")
+
+    @classmethod
+    def reserve_player_ids(cls, count):
+        """Returns the first id of a block of ids for new players
+        The ids from the returned one to the returned one + count - 1 are free.
+
+            Args:
+                count (integer): number of ids needed
+
+            Return:
+                integer: first id of the block
+        """
+        return Sequence.reserve("players", count)
 
     @classmethod
     def get_players(cls, tournament_id):
         """Store players competing in the wished tournament
-        Creates a list composed of Player's objects
-        Then it sorts this list according to the tournament_score of each player.
-        In case of equality it takes the elo rank.
+        Creates a list composed of player records
+        The list follows the standings of the tournament, already sorted according to the
+        tournament_score of each player, then to the tie-breaks of the tournament and to the elo rank.
 
             Args:
                 tournament_id (integer): get the dictionnary of the tournament in the table 'tournaments'
@@ -157,111 +778,183 @@ class Tournament():
             Return:
                 list: sorted list of tournament's players
         """
-        P = Query()
-        tournament = cls.__table__.search(where('id') == tournament_id)
+        # lecture seule: le classement d'un ancien tournoi est calculé, la prochaine écriture de son classement
+        # l'enregistrera
+        tournament = cls.__table__.get_by(id=tournament_id)
+        standings = Tournament.compute_standings(tournament)
+        criteria = tournament.get("tiebreaks") or list(DEFAULT_TIEBREAKS)
+
+        # on crée notre liste  d'objets players participant au tournoi, déjà triée par le classement
+        players = []
+        for entry in standings:
+            player = PlayerRecord.from_document(Player.__table__.get_by(id=entry["player_id"]))
+            player.tournament_score = entry["score"]
+            player.tiebreaks = dict(zip(criteria, entry["tiebreaks"]))
+            players.append(player)
+        return players  # on renvoie la liste triée par le score, les départages et l'elo des joueurs du tournoi.
 
-        # on crée notre liste  d'objets players participant au tournoi
-        collection = Collection(data=Player.__table__.search(P.id.one_of(tournament[0]["players"])))
-        players = sorted(collection.items,
-                         key=lambda x: (Tournament.get_tournament_score(
-                             x.id.value, tournament_id), x.elo.value),
-                         reverse=True)  # on trie cette liste avec l'elo comme critère de trie.
+    @classmethod
+    def rank_standings(cls, standings):
+        """Sort standings by tournament score, then tie-breaks, then elo and number their ranks
 
-        for player in players:
-            setattr(player, 'tournament_score', Tournament.get_tournament_score(
-                player.id.value, tournament_id) or 0)
-        return players  # on renvoie la liste triée par le score et l'elo des joueurs participants au tournoi.
+        Args:
+            standings (list): dictionnaries with the player_id, score, elo and tie-breaks of each player
+
+        Returns:
+            list: the same list, sorted and with the rank of each player
+        """
+        standings.sort(key=lambda x: (x["score"], *x.get("tiebreaks", ()), x["elo"]), reverse=True)
+        for rank, entry in enumerate(standings, 1):
+            entry["rank"] = rank
+        return standings
 
     @classmethod
-    def listing_all_possible_games(cls, tournament_id):
-        """Make a list with all possible game configurations
-        This is made with itertools combinations methods.
-        Then cases as [[P1 vs P2], [P2 vs P1]] are avoided
+    def build_standings(cls, tournament):
+        """Compute the standings of a tournament from the tables 'scores' and 'players'
+        Only needed for tournaments created before standings were saved.
 
-            Args:
-                tournament_id: id of the wished tournament
+        Args:
+            tournament (dictionnary): the tournament as saved in the database
 
-            Return:
-                list: contains all possible games configurations
+        Returns:
+            list: standings of the tournament
         """
-        players = [player.id.value for player in Tournament.get_players(tournament_id)]
-        setattr(Tournament, 'list_of_possible_games', [
-                game for game in itertools.combinations(players, 2)])
-        return Tournament.list_of_possible_games
+        standings = []
+        for player_id in tournament["players"]:
+            score = db.table('scores').get_by(player_id=player_id, tournament_id=tournament["id"])
+            standings.append({"player_id": player_id,
+                              "score": score["score"] if score else 0,
+                              "elo": db.table('players').get_by(id=player_id)["elo"]})
+        return Tournament.rank_standings(standings)
 
     @classmethod
-    def generate_first_round(cls, players, tournament_id, round_id, match):
-        """As the first round has a unique logic in its generation it is isolated in a function.
+    def get_standings(cls, tournament_id):
+        """Return a copy of the standings saved with the tournament, which can be changed
+        They are built and saved the first time for older tournaments,
+        which are given the default tie-breaks.
 
         Args:
-            players (list): sorted list of tournament's players
-            tournament_id (integer): id of the wished tournament
-            round_id (integer): id of the round in the database
-            match (list): empty list that will be filled with the generated games
-        """
-        all_possible_games = Tournament.listing_all_possible_games(tournament_id)
-        cls.__table__.update({"list_of_possible_games": all_possible_games},
-                             where("id") == tournament_id)
-        top = 0
-        bottom = int(len(players)/2)
-        while top < len(players)/2:
-            player_one_id = players[top].id.value
-            player_two_id = players[bottom].id.value
-            score_one = 0
-            score_two = 0
-            player_one_name = players[top].firstname.value
-            player_two_name = players[bottom].firstname.value
-            game = Match(player_one_id,
-                         player_two_id,
-                         score_one,
-                         score_two,
-                         player_one_name,
-                         player_two_name,
-                         round_id)
-            match.append(game.to_json())
-            game.save()
-            top += 1
-            bottom += 1
-        pass
-
-    @classmethod
-    def authorized_game(cls,
-                        player_one_id,
-                        player_two_id,
-                        count_rounds,
-                        match,
-                        nb_of_games):
-        """When a generated game is authorized, as it has not already happened,
-        this function add it to the game list of the round and create Match instance.
-
-
-        Args:
-            player_one_id (integer): id of the first player in database
-            player_two_id (integer): id of the second player in database
-            count_rounds (integer): id of the round in the tournament
-            match (list): list that will store the generated game
-            nb_of_games (integer): number of games in the round. Used to detect when all games have been generated
+            tournament_id (integer): id of the tournament in database
 
         Returns:
-            integer: when equal to for this value will make the program break from the while loop it is into
+            list: dictionnaries with player_id, score, elo, tie-breaks and rank, best player first
         """
-        player_one_name = Tournament.get_player_info(player_one_id)[0].split()[1]
-        player_two_name = Tournament.get_player_info(player_two_id)[0].split()[1]
-        score_one, score_two = 0, 0
-        game = Match(player_one_id,
-                     player_two_id,
-                     score_one,
-                     score_two,
-                     player_one_name,
-                     player_two_name,
-                     count_rounds)
-        match.append([[game.player_one_id, game.player_one_name, game.score_one],
-                     [game.player_two_id, game.player_two_name, game.score_two]])
-        nb_of_games += 1
-        return nb_of_games
+        tournament = cls.__table__.get_by(id=tournament_id)
+        standings = Tournament.compute_standings(tournament)
+        if tournament.get("standings") is None or tournament.get("tiebreaks") is None:
+            cls.__table__.update_by({"standings": [dict(entry) for entry in standings],
+                                     "tiebreaks": tournament.get("tiebreaks") or list(DEFAULT_TIEBREAKS)},
+                                    id=tournament_id)
+        return standings
+
+    @classmethod
+    def compute_standings(cls, tournament):
+        """Return a copy of the standings of a tournament without saving anything
+        Older tournaments have none saved: they are built from the scores, with the default tie-breaks.
+
+        Args:
+            tournament (dictionnary): the tournament document
+
+        Returns:
+            list: dictionnaries with player_id, score, elo, tie-breaks and rank, best player first
+        """
+        if tournament.get("standings") is None:
+            standings = Tournament.build_standings(tournament)
+        else:
+            # copie: le document lu est celui gardé en mémoire par le stockage, et annuler la transaction
+            # ne restaurerait pas les lignes modifiées en place
+            standings = [dict(entry) for entry in tournament["standings"]]
+            if tournament.get("tiebreaks") is not None:
+                return standings
+        return Tournament.break_ties(tournament, standings, tournament.get("tiebreaks") or list(DEFAULT_TIEBREAKS))
+
+    @classmethod
+    def compute_tiebreaks(cls, tournament, criteria):
+        """Compute the tie-breaks of the players of a tournament from its games and its byes
+        The games and the rounds of the tournament are read once, then src.tiebreaks
+        computes every tie-break for all the players at once.
+
+        Args:
+            tournament (dictionnary): the tournament as saved in the database
+            criteria (list): names of the tie-breaks, in the order they break ties
+
+        Returns:
+            dictionnary: list of the tie-breaks of each player id, in the order of the criteria
+        """
+        games = [(game["round_id"], game["player_one_id"], game["player_two_id"], game["score_one"], game["score_two"])
+                 for game in db.table('matchs').search_by(tournament_id=tournament["id"])
+                 if game["score_one"] + game["score_two"] == 1]
+        # l'exemption d'un round enregistré d'avance ne compte qu'une fois le round commencé
+        started = set(tournament["rounds"])
+        byes = [(round["round_id"], round["bye"])
+                for round in db.table('rounds').search_by(tournament_id=tournament["id"])
+                if round.get("bye") is not None and round["round_id"] in started]
+        game_rounds, player_one, player_two, score_one, score_two = zip(*games) if games else ((),) * 5
+        bye_rounds, bye_players = zip(*byes) if byes else ((),) * 2
+        opponents, results = opponent_arrays(tournament["players"], game_rounds, player_one, player_two,
+                                             score_one, score_two, bye_rounds, bye_players)
+        values = tiebreak_values(criteria, opponents, results).tolist()
+        return dict(zip(tournament["players"], values))
+
+    @classmethod
+    def break_ties(cls, tournament, standings, criteria):
+        """Give each entry of the standings its tie-breaks and rank them again
+
+        Args:
+            tournament (dictionnary): the tournament as saved in the database
+            standings (list): the standings of the tournament
+            criteria (list): names of the tie-breaks, in the order they break ties
+
+        Returns:
+            list: the same list, with the tie-breaks, sorted and with the rank of each player
+        """
+        values = Tournament.compute_tiebreaks(tournament, criteria)
+        for entry in standings:
+            entry["tiebreaks"] = values.get(entry["player_id"], [0] * len(criteria))
+        return Tournament.rank_standings(standings)
+
+    @classmethod
+    def update_standings(cls, tournament_id, points=None, elos=None):
+        """Apply score or elo changes to the standings of a tournament and rank them again
+        The tie-breaks depend on the scores of the opponents: they are all computed
+        again when a score changes.
+
+        Args:
+            tournament_id (integer): id of the tournament in database
+            points (dictionnary, optional): points to add to the score of each player id. Defaults to None.
+            elos (dictionnary, optional): new elo of each player id. Defaults to None.
+        """
+        points = points or {}
+        elos = elos or {}
+        standings = Tournament.get_standings(tournament_id)
+        for entry in standings:
+            entry["score"] += points.get(entry["player_id"], 0)
+            entry["elo"] = elos.get(entry["player_id"], entry["elo"])
+        if points:
+            tournament = cls.__table__.get_by(id=tournament_id)
+            standings = Tournament.break_ties(tournament, standings, tournament["tiebreaks"])
+        else:
+            standings = Tournament.rank_standings(standings)
+        cls.__table__.update_by({"standings": standings}, id=tournament_id)
+
+    @classmethod
+    def set_tiebreaks(cls, tournament_id, criteria):
+        """Change the order of the tie-breaks of a tournament and rank its standings again
+
+        Args:
+            tournament_id (integer): id of the tournament in database
+            criteria (list): names of the tie-breaks, keys of src.tiebreaks.TIEBREAKS
+
+        Returns:
+            list: the new standings of the tournament
+        """
+        tournament = cls.__table__.get_by(id=tournament_id)
+        standings = Tournament.break_ties(tournament, Tournament.get_standings(tournament_id), list(criteria))
+        cls.__table__.update_by({"standings": standings, "tiebreaks": list(criteria)}, id=tournament_id)
+        return standings
 
     @classmethod
-    def enter_round_in_database(cls, round_id, tournament_id, count_rounds, match):
+    def enter_round_in_database(cls, round_id, tournament_id, count_rounds, match, bye=None):
         """Used to save the round in the database
 
         Args:
@@ -269,6 +962,7 @@ class Tournament():
             tournament_id (integer): id of the tournament in database
             count_rounds (integer): id of the round in the tournament
             match (list): contains all games for the round
+            bye (integer, optional): id of the player exempted in this round. Defaults to None.
 
         Returns:
             list: contains all the games of the round
@@ -278,17 +972,13 @@ class Tournament():
                           tournament_id=tournament_id,
                           beginning_date=str(datetime.now()))
         round_bdd.save()
-        db.table('tournaments').update(increment('nb_of_played_round'),
-                                       where("id") == int(tournament_id))
-        db.table('rounds').update({"games": match},
-                                  (where("tournament_id") == tournament_id)
-                                  & (where("round_id") == round_id))
-        round = db.table('rounds').get((where("tournament_id") == tournament_id)
-                                       & (where("round_id") == round_id))
-        rounds = cls.__table__.get(where("id") == tournament_id)["rounds"]
-        rounds.append(round_id)
-        db.table('tournaments').update({'rounds': rounds},
-                                       where("id") == tournament_id)
+        db.table('tournaments').update_by(increment('nb_of_played_round'), id=int(tournament_id))
+        db.table('rounds').update_by({"games": match, "bye": bye},
+                                     tournament_id=tournament_id, round_id=round_id)
+        round = db.table('rounds').get_by(tournament_id=tournament_id, round_id=round_id)
+        # nouvelle liste: celle lue est celle gardée en mémoire par le stockage
+        rounds = cls.__table__.get_by(id=tournament_id)["rounds"] + [round_id]
+        db.table('tournaments').update_by({'rounds': rounds}, id=tournament_id)
         return round
 
     @classmethod
@@ -301,14 +991,9 @@ class Tournament():
             tournament_id (integer): id of the tournament in the database
         """
         for game in match:  # game is like: [[6, 'Light', 0], [4, 'goku', 0]]
-            match_bdd = Match(game[0][0], game[1][0], game[0][2], game[1][2], game[0][1], game[1][1], round_id)
+            match_bdd = Match(game[0][0], game[1][0], game[0][2], game[1][2], game[0][1], game[1][1], round_id,
+                              tournament_id)
             match_bdd.save()
-            to_remove = db.table('tournaments').search(
-                where("id") == tournament_id)
-            try:
-                to_remove[0]["list_of_possible_games"].remove([game[0][0], game[1][0]])
-            except ValueError:
-                to_remove[0]["list_of_possible_games"].remove([game[1][0], game[0][0]])
 
     @classmethod
     def check_last_round(cls, tournament_id, round_id):
@@ -321,49 +1006,156 @@ class Tournament():
         Returns:
             boolean: False if the previous round is not over. True otherwise
         """
-        previous_round_finished = db.table('rounds').get((where('tournament_id') == tournament_id) &
-                                                         (where('round_id') == round_id))["ending_date"]
-        if previous_round_finished == "":
+        previous_round_finished = db.table('rounds').get_by(tournament_id=tournament_id,
+                                                            round_id=round_id)["ending_date"]
+        # un round en cours a une date de fin vide ou None
+        if not previous_round_finished:
             return False
         return True
 
     @classmethod
-    def generate_game(cls, copy_players, player_one, player_two, tournament_id, ids, authorized_game):
-        """Will generate the next game and chack if the configuration is authorized
+    def get_played_pairs(cls, tournament_id):
+        """Return the games already played in a tournament
+        Their keys are saved with the tournament when its rounds are saved.
+
+        Args:
+            tournament_id (integer): id of the tournament in the database
+
+        Returns:
+            set: keys of the played games, as built by pairing.pair_key
+        """
+        return set(cls.__table__.get_by(id=tournament_id)["played_pairs"])
+
+    @classmethod
+    def add_played_pairs(cls, tournament_id, pairs):
+        """Save the keys of new games with the tournament
+        Only the pairs which did not play yet are added, a rematch is saved once.
 
         Args:
-            copy_players (list): contains all players of the tournament
-            player_one (integer): index of the first player in copy_player
-            player_two (integer): index of the second player in copy_player
             tournament_id (integer): id of the tournament in the database
-            ids (list): will contain the configurations by id of generated games
-            authorized_game (boolean): initially False. True when the configuration is authorized
-
-        Returns:
-            integer: id of both players in the generated game
-        """
-        while not authorized_game:
-            player_one_id = copy_players[player_one].id.value
-            player_two_id = copy_players[player_two].id.value
-            if [player_one_id, player_two_id] in db.table('tournaments').search(
-                    where("id") == tournament_id)[0]["list_of_possible_games"]:
-                authorized_game = True
-                ids.append([player_one_id, player_two_id])
-                copy_players.remove(copy_players[player_two])
-                copy_players.remove(copy_players[player_one])
-                return player_one_id, player_two_id
-            elif [player_two_id, player_one_id] in db.table('tournaments').search(
-                    where("id") == tournament_id)[0]["list_of_possible_games"]:
-                authorized_game = True
-                ids.append([player_two_id, player_one_id])
-                copy_players.remove(copy_players[player_two])
-                copy_players.remove(copy_players[player_one])
-                return player_one_id, player_two_id
-            player_two += 1
+            pairs (list): games as (player_one_id, player_two_id)
+        """
+        played_pairs = cls.__table__.get_by(id=tournament_id)["played_pairs"]
+        known = set(played_pairs)
+        new_pairs = []
+        for player_one_id, player_two_id in pairs:
+            key = pair_key(player_one_id, player_two_id)
+            if key not in known:
+                known.add(key)
+                new_pairs.append(key)
+        if new_pairs:
+            # nouvelle liste: celle lue est celle gardée en mémoire par le stockage
+            cls.__table__.update_by({"played_pairs": played_pairs + new_pairs}, id=tournament_id)
+
+    @classmethod
+    def award_bye(cls, player_id, tournament_id):
+        """Give the point of the exemption to a player and remember he has been exempted
+
+        Args:
+            player_id (integer): id of the exempted player in database
+            tournament_id (integer): id of the tournament in database
+        """
+        byes = cls.__table__.get_by(id=tournament_id).get("byes", [])
+        cls.__table__.update_by({"byes": byes + [player_id]}, id=tournament_id)
+        Tournament.add_to_tournament_score(player_id, tournament_id, 1)
+        Tournament.update_standings(tournament_id, {player_id: 1})
+
+    @classmethod
+    def pairing_snapshot(cls, tournament_id):
+        """Read everything the pairing of the next round needs, without writing anything
+        The snapshot only holds plain values, so it can be sent to another process.
+        The rounds of a round-robin tournament are already saved: its snapshot
+        only tells which one comes next, scheduled being True.
+
+        Args:
+            tournament_id (integer): id of the tournament in the database
+
+        Returns:
+            dictionnary: the snapshot, None if the tournament is over,
+                         False if the previous round is not over
+        """
+        tournament = cls.__table__.get_by(id=tournament_id)
+        count_rounds = tournament['nb_of_played_round']
+        if count_rounds >= int(tournament['nb_rounds']):
+            return None
+        if count_rounds and not Tournament.check_last_round(tournament_id, tournament['rounds'][-1]):
+            return False
+        if tournament.get("system", SWISS) in SCHEDULES:
+            return {"tournament_id": tournament_id, "count_rounds": count_rounds, "scheduled": True}
+        # le classement d'un ancien tournoi est calculé sans être enregistré, save_round l'enregistre
+        standings = Tournament.compute_standings(tournament)
+        ranking = [entry["player_id"] for entry in standings]
+        return {"tournament_id": tournament_id,
+                "count_rounds": count_rounds,
+                "scheduled": False,
+                "ranking": ranking,
+                "scores": {entry["player_id"]: entry["score"] for entry in standings},
+                "played": Tournament.get_played_pairs(tournament_id),
+                "byes": set(tournament.get('byes', [])),
+                "names": Tournament.get_player_names(ranking)}
+
+    @classmethod
+    def save_round(cls, snapshot, pairs, bye):
+        """Save a round computed from a snapshot: its games, the bye and the round itself
+
+        Args:
+            snapshot (dictionnary): the snapshot given by pairing_snapshot
+            pairs (list): games as (player_one_id, player_two_id)
+            bye (integer): id of the exempted player, None if every player plays
+
+        Returns:
+            dictionnary: the round saved in the database
+        """
+        tournament_id = snapshot["tournament_id"]
+        names = snapshot["names"]
+        # enregistre le classement d'un ancien tournoi, que pairing_snapshot n'a fait que calculer
+        Tournament.get_standings(tournament_id)
+        round_id = Sequence.next_id("rounds")
+        match = [[[player_one_id, names[player_one_id], 0], [player_two_id, names[player_two_id], 0]]
+                 for player_one_id, player_two_id in pairs]
+        Tournament.enter_game_in_database(match, round_id, tournament_id)
+        Tournament.add_played_pairs(tournament_id, pairs)
+        round = Tournament.enter_round_in_database(round_id, tournament_id, snapshot["count_rounds"], match, bye)
+        # l'exemption est comptée dans les départages une fois le round enregistré
+        if bye is not None:
+            Tournament.award_bye(bye, tournament_id)
+        return round
+
+    @classmethod
+    def start_scheduled_round(cls, snapshot):
+        """Start the next round saved with a round-robin tournament
+        Its games already exist: the round only gets its beginning date and the
+        display of its games, and the tournament counts it as played.
+
+        Args:
+            snapshot (dictionnary): the snapshot given by pairing_snapshot
+
+        Returns:
+            dictionnary: the started round
+        """
+        tournament_id = snapshot["tournament_id"]
+        round = db.table('rounds').get_by(tournament_id=tournament_id, name=f"Round {snapshot['count_rounds'] + 1}")
+        pairs = [(game["player_one_id"], game["player_two_id"])
+                 for game in db.table('matchs').search_by(round_id=round["round_id"])]
+        names = Tournament.get_player_names({player_id for pair in pairs for player_id in pair})
+        match = [[[player_one_id, names[player_one_id], 0], [player_two_id, names[player_two_id], 0]]
+                 for player_one_id, player_two_id in pairs]
+        db.table('rounds').update_by({"beginning_date": str(datetime.now()), "games": match},
+                                     round_id=round["round_id"])
+        tournament = cls.__table__.get_by(id=tournament_id)
+        cls.__table__.update_by({"nb_of_played_round": tournament["nb_of_played_round"] + 1,
+                                 "rounds": tournament["rounds"] + [round["round_id"]]}, id=tournament_id)
+        Tournament.add_played_pairs(tournament_id, pairs)
+        if round["bye"] is not None:
+            Tournament.award_bye(round["bye"], tournament_id)
+        return db.table('rounds').get_by(round_id=round["round_id"])
 
     @classmethod
     def generate_round(cls, tournament_id):
         """Called to generate a round for a given tournament
+        Games are computed by the swiss pairing engine of the pairing module.
+        A round-robin tournament starts instead the next of its saved rounds.
+        When the number of players is odd, one of them is exempted and wins the point.
 
         Args:
             tournament_id (integer): id of the tournament in the database
@@ -372,55 +1164,35 @@ class Tournament():
             method: call the methode that will enter the round in the database
                     and return the fancy games configuration.
         """
-        nb_of_played_round = db.table('tournaments').get(
-            where('id') == tournament_id)['nb_of_played_round']
-        nb_rounds = db.table('tournaments').get(
-            where('id') == tournament_id)['nb_rounds']
-        if nb_of_played_round >= nb_rounds:
-            return None
-        count_rounds = db.table('tournaments').get(
-            where('id') == tournament_id)['nb_of_played_round']
-        round_id = len(db.table('rounds')) + 1
-        is_first_round = count_rounds == 0
-        match = []
-        players = Tournament.get_players(tournament_id)
-        if is_first_round:
-            Tournament.generate_first_round(players, tournament_id, round_id, match)
-        elif not Tournament.check_last_round(tournament_id, round_id - 1):
-            return False
-        else:
-            copy_players = deepcopy(players)
-            ids = []
-            to_reindex = 1  # used to solve the case where the two last player have already encountered.
-            while True:
-                nb_of_games = 0
-                nb_of_players = len(players)
-                try:
-                    while nb_of_games < nb_of_players/2:
-                        authorized_game = False
-                        player_one = 0
-                        player_two = 1
-                        player_one_id, player_two_id = Tournament.generate_game(copy_players,
-                                                                                player_one,
-                                                                                player_two,
-                                                                                tournament_id,
-                                                                                ids,
-                                                                                authorized_game)
-                        nb_of_games = Tournament.authorized_game(player_one_id,
-                                                                 player_two_id,
-                                                                 count_rounds,
-                                                                 match,
-                                                                 nb_of_games)
-                except IndexError:
-                    copy_players = deepcopy(players)
-                    to_reindex += 1  # Incremented each time the case is encountered
-                    copy_players[-1], copy_players[-to_reindex] = copy_players[-to_reindex], copy_players[-1]
-                    match, ids = [], []
-                    continue
-                if nb_of_games == 4:
-                    Tournament.enter_game_in_database(match, round_id, tournament_id)
-                    break
-        return Tournament.enter_round_in_database(round_id, tournament_id, count_rounds, match)
+        snapshot = Tournament.pairing_snapshot(tournament_id)
+        if not snapshot:
+            return snapshot
+        if snapshot["scheduled"]:
+            return Tournament.start_scheduled_round(snapshot)
+        pairs, bye = pair_round(snapshot["ranking"], snapshot["scores"], snapshot["played"], snapshot["byes"])
+        return Tournament.save_round(snapshot, pairs, bye)
+
+    @classmethod
+    def get_tournament(cls, tournament_id):
+        """Return the document of a tournament
+
+        Args:
+            tournament_id (integer): id of the tournament in database
+
+        Returns:
+            dictionnary: the tournament, None if there is none
+        """
+        return cls.__table__.get_by(id=tournament_id)
+
+    @classmethod
+    def get_ongoing_tournaments(cls):
+        """Return the ids of the tournaments which still have rounds to play
+
+        Returns:
+            list: ids of the tournaments
+        """
+        return [tournament["id"] for tournament in Tournament.get_all_tournaments()
+                if tournament["nb_of_played_round"] < int(tournament["nb_rounds"])]
 
     @classmethod
     def get_game_list(cls, tournament_id_user_choice):
@@ -434,19 +1206,14 @@ class Tournament():
             integer: id of the ongoing round
         """
 
-        T = Query()
-        chosen_tournament = Collection(cls.__table__.search(
-            where('id') == tournament_id_user_choice))
+        chosen_tournament = TournamentRecord.from_document(cls.__table__.get_by(id=tournament_id_user_choice))
 
-        rounds = Collection(db.table('rounds').search(
-            where("tournament_id") == tournament_id_user_choice))
-        round_items = rounds.items[chosen_tournament.items[0].nb_of_played_round.value - 1]
-        round_id = round_items.round_id.value
-        if len(rounds.items) == 0:
+        # les rounds d'un tournoi toutes rondes sont enregistrés d'avance, seuls ceux commencés sont listés ici
+        if not chosen_tournament.rounds:
             return [], None
+        round_id = chosen_tournament.rounds[-1]
 
-        games_list = Collection(db.table('matchs').search(
-            T.round_id == rounds.items[len(rounds.items) - 1].round_id.value))
+        games_list = MatchRecord.from_documents(db.table('matchs').search_by(round_id=round_id))
         return games_list, round_id
 
     @classmethod
@@ -474,25 +1241,21 @@ class Tournament():
             matchs_results (list): list of the games with the results
         """
 
-        player_one_id = int(db.table('matchs').search(where("match_id") == int(match_id))[0]["joueur1"][-2])
-        player_two_id = int(db.table('matchs').search(where("match_id") == int(match_id))[0]["joueur2"][-2])
-        player_one_name = db.table('players').get(where("id") == player_one_id)["firstname"]
-        player_two_name = db.table('players').get(where("id") == player_two_id)["firstname"]
+        game_record = db.table('matchs').get_by(match_id=int(match_id))
+        player_one_id = game_record["player_one_id"]
+        player_two_id = game_record["player_two_id"]
+        names = Tournament.get_player_names([player_one_id, player_two_id])
+        player_one_name = names[player_one_id]
+        player_two_name = names[player_two_id]
 
-        db.table('matchs').update({'score_one': player_one_score},
-                                  (where('match_id') == match_id) & (where('round_id') == round_id))
-        db.table('matchs').update({'score_two': player_two_score},
-                                  (where('match_id') == match_id) & (where('round_id') == round_id))
+        # si le résultat avait déjà été saisi on ne compte que la différence
+        points_one, points_two = player_one_score, player_two_score
+        if game_record["score_one"] + game_record["score_two"] == 1:
+            points_one -= game_record["score_one"]
+            points_two -= game_record["score_two"]
 
-        if [player_one_id, player_two_id] in db.table('tournaments').search(
-                where("id") == tournament_id)[0]["list_of_possible_games"]:
-            to_remove = [player_one_id, player_two_id]
-            db.table('tournaments').search(
-                where("id") == tournament_id)[0]["list_of_possible_games"].remove(to_remove)
-            list_of_possible_games = db.table('tournaments').search(
-                where("id") == tournament_id)[0]["list_of_possible_games"]
-            db.table('tournaments').update({"list_of_possible_games": list_of_possible_games},
-                                           where("id") == tournament_id)
+        db.table('matchs').update_by({'score_one': player_one_score, 'score_two': player_two_score},
+                                     match_id=match_id, round_id=round_id)
 
         game = Match(player_one_id,
                      player_two_id,
@@ -502,53 +1265,402 @@ class Tournament():
                      player_two_name,
                      match_id)
 
-        if db.table('scores').get((where('tournament_id') == tournament_id) &
-                                  (where("player_id") == player_one_id)):
-            db.table('scores').update(add("score", player_one_score),
-                                      (where('player_id') == player_one_id) &
-                                      (where('tournament_id') == tournament_id))
-            db.table('scores').update(add("score", player_two_score),
-                                      (where('player_id') == player_two_id) &
-                                      (where('tournament_id') == tournament_id))
-        else:
-            tournament_score_one = Score(player_one_id, tournament_id, player_one_score)
-            tournament_score_one.save()
-            tournament_score_two = Score(player_two_id, tournament_id, player_two_score)
-            tournament_score_two.save()
+        Tournament.add_to_tournament_score(player_one_id, tournament_id, points_one)
+        Tournament.add_to_tournament_score(player_two_id, tournament_id, points_two)
+        Tournament.update_standings(tournament_id, {player_one_id: points_one, player_two_id: points_two})
 
         already_in = False
         for n, match in enumerate(matchs_results):
-            if f"[{player_one_id}" in match:
+            if match[0][0] == player_one_id:
                 matchs_results.pop(n)
                 already_in = True
-                matchs_results.insert(n, game.to_json())
+                matchs_results.insert(n, game.to_list())
 
         if not already_in:
-            matchs_results.append(game.to_json())
+            matchs_results.append(game.to_list())
 
     @classmethod
     def save_results(cls, matchs_results, round_id, tournament_id_user_choice):
         """Updates a round results in the table 'rounds'
-        It also give an ending date to the corresponding round
+        It also give an ending date to the corresponding round, once all its games have a result
 
         Args:
             matchs_results (list): list of the games with the results
             round_id (integer): id of the round in database
             tournament_id_user_choice (integer): id of the tournament in database
         """
-        db.table('rounds').update({"games": matchs_results},
-                                  (where("tournament_id") == tournament_id_user_choice) &
-                                  (where("round_id") == round_id))
-        nb_of_played_round = db.table('tournaments').get(
-            where('id') == tournament_id_user_choice)['nb_of_played_round']
-        nb_rounds = db.table('tournaments').get(
-            where('id') == tournament_id_user_choice)['nb_rounds']
-        if nb_of_played_round == int(nb_rounds):
-            db.table('tournaments').update({"ending_date": str(datetime.now())})
+        round_over = all(game["score_one"] + game["score_two"] == 1
+                         for game in db.table('matchs').search_by(round_id=round_id))
+        round_fields = {"games": matchs_results}
+        if round_over:
+            round_fields["ending_date"] = str(datetime.now())
+        db.table('rounds').update_by(round_fields, tournament_id=tournament_id_user_choice, round_id=round_id)
+        if not round_over:
+            return
+        # le round est noté quand tous ses matchs ont un résultat
+        if settings.AUTO_RATING:
+            Tournament.rate_round(tournament_id_user_choice, round_id)
+        tournament = db.table('tournaments').get_by(id=tournament_id_user_choice)
+        if tournament['nb_of_played_round'] == int(tournament['nb_rounds']):
+            db.table('tournaments').update_by({"ending_date": str(datetime.now())}, id=tournament_id_user_choice)
+
+    @classmethod
+    def check_round_results(cls, round_games, results):
+        """Check a batch of results before anything is written
+
+        Args:
+            round_games (dictionnary): games of the round, by match id
+            results (list): (match_id, player_one_score, player_two_score) of each reported game
+
+        Returns:
+            list: description of each invalid result, empty if the batch is valid
+        """
+        errors = []
+        seen = set()
+        for match_id, player_one_score, player_two_score in results:
+            if match_id not in round_games:
+                errors.append(f"match {match_id}: ce match n'appartient pas au round en cours")
+            elif match_id in seen:
+                errors.append(f"match {match_id}: résultat saisi deux fois")
+            elif {player_one_score, player_two_score} - {0, 0.5, 1} or player_one_score + player_two_score != 1:
+                errors.append(f"match {match_id}: les scores doivent valoir 0, 0.5 ou 1 et leur somme 1")
+            seen.add(match_id)
+        return errors
+
+    @classmethod
+    def enter_round_results(cls, tournament_id, round_id, results):
+        """Save all the results of a round at once
+        The whole batch is checked first: if one result is invalid nothing is saved.
+        Games, scores, standings and the round are then updated in one pass.
+        Re-entered results only count the difference with the previous ones.
+        The round gets its ending date when every game has a result.
+        Only the rounds already started in the tournament accept results.
+
+        Args:
+            tournament_id (integer): id of the tournament in database
+            round_id (integer): id of the round in database
+            results (list): (match_id, player_one_score, player_two_score) of each reported game
+
+        Returns:
+            list: description of each invalid result, empty if the results were saved
+            list: ids of the games of the round still waiting for a result
+        """
+        tournament = cls.__table__.get_by(id=tournament_id)
+        # un round d'un autre tournoi donnerait ses points au classement de celui-ci
+        if tournament is None or round_id not in tournament["rounds"]:
+            return [f"le round {round_id} n'est pas un round commencé du tournoi {tournament_id}"], []
+        round_games = {game["match_id"]: game for game in db.table('matchs').search_by(round_id=round_id)}
+        errors = Tournament.check_round_results(round_games, results)
+        if errors:
+            return errors, sorted(match_id for match_id, game in round_games.items()
+                                  if game["score_one"] + game["score_two"] != 1)
+
+        points = {}
+        for match_id, player_one_score, player_two_score in results:
+            game = round_games[match_id]
+            player_one_id, player_two_id = game["player_one_id"], game["player_two_id"]
+            # si le résultat avait déjà été saisi on ne compte que la différence
+            points_one, points_two = player_one_score, player_two_score
+            if game["score_one"] + game["score_two"] == 1:
+                points_one -= game["score_one"]
+                points_two -= game["score_two"]
+            points[player_one_id] = points.get(player_one_id, 0) + points_one
+            points[player_two_id] = points.get(player_two_id, 0) + points_two
+            game.update({'score_one': player_one_score, 'score_two': player_two_score})
+            db.table('matchs').update({'score_one': player_one_score, 'score_two': player_two_score},
+                                      doc_ids=[game.doc_id])
+
+        for player_id, player_points in points.items():
+            Tournament.add_to_tournament_score(player_id, tournament_id, player_points)
+        Tournament.update_standings(tournament_id, points)
+
+        tournament = cls.__table__.get_by(id=tournament_id)
+        names = Tournament.get_player_names(tournament["players"])
+        games = []
+        missing = []
+        for match_id, game in sorted(round_games.items()):
+            player_one_id, player_two_id = game["player_one_id"], game["player_two_id"]
+            # les matchs sans résultat restent affichés, avec leur score à 0
+            if game["score_one"] + game["score_two"] != 1:
+                missing.append(match_id)
+            games.append(Match(player_one_id, player_two_id, game["score_one"], game["score_two"],
+                               names.get(player_one_id), names.get(player_two_id)).to_list())
+        round_fields = {"games": games}
+        if not missing:
+            round_fields["ending_date"] = str(datetime.now())
+        db.table('rounds').update_by(round_fields, tournament_id=tournament_id, round_id=round_id)
+        if not missing and settings.AUTO_RATING:
+            Tournament.rate_round(tournament_id, round_id)
+        if not missing and tournament['nb_of_played_round'] == int(tournament['nb_rounds']):
+            cls.__table__.update_by({"ending_date": str(datetime.now())}, id=tournament_id)
+        return [], missing
+
+    @classmethod
+    def rate_round(cls, tournament_id, round_id):
+        """Update the elo of the players of a round, all its games having a result
+        The new ratings are computed by src.rating and written in one batch. Each change
+        is kept in the table 'ratings', the history of the players. A round rated again,
+        after a corrected result, is rated from the ratings the players had before it.
+
+        Args:
+            tournament_id (integer): id of the tournament in database
+            round_id (integer): id of the round in database
+
+        Returns:
+            dictionnary: new elo of each player id of the round
+        """
+        games = db.table('matchs').search_by(round_id=round_id)
+        if not games:
+            return {}
+        player_ids = sorted({game["player_one_id"] for game in games} | {game["player_two_id"] for game in games})
+        if Tournament.rated_after(round_id, player_ids):
+            # les classements de rounds suivants partent de ceux de ce round: on les recalcule aussi
+            Tournament.replay_ratings(round_id)
+            return {player_id: db.table('players').get_by(id=player_id)["elo"] for player_id in player_ids}
+        history = db.table('ratings').search_by(round_id=round_id)
+        before = {entry["player_id"]: entry for entry in history}
+        players = {player_id: db.table('players').get_by(id=player_id) for player_id in player_ids}
+        ratings = [before[player_id]["rating_before"] if player_id in before else players[player_id]["elo"]
+                   for player_id in player_ids]
+        rated_games = [before[player_id]["games_before"] if player_id in before
+                       else players[player_id].get("rated_games", 0) for player_id in player_ids]
+        position = {player_id: n for n, player_id in enumerate(player_ids)}
+        new_ratings, new_rated_games = rating.rate_period(ratings, rated_games,
+                                                          [position[game["player_one_id"]] for game in games],
+                                                          [position[game["player_two_id"]] for game in games],
+                                                          [game["score_one"] for game in games])
+
+        elos = {player_id: int(elo) for player_id, elo in zip(player_ids, new_ratings)}
+        db.table('players').update_many({players[player_id].doc_id: {"elo": elos[player_id],
+                                                                     "rated_games": int(count)}
+                                         for player_id, count in zip(player_ids, new_rated_games)})
+        if history:
+            db.table('ratings').remove(doc_ids=[entry.doc_id for entry in history])
+        date = str(datetime.now())
+        db.table('ratings').insert_multiple([{"player_id": player_id,
+                                              "tournament_id": tournament_id,
+                                              "round_id": round_id,
+                                              "rating_before": int(old_rating),
+                                              "rating_after": elos[player_id],
+                                              "games_before": int(old_games),
+                                              "date": date}
+                                             for player_id, old_rating, old_games in zip(player_ids, ratings,
+                                                                                         rated_games)])
+        # comme change_player_elo, pour les classements de tous les tournois des joueurs
+        for tournament in cls.__table__.all():
+            changed = {player_id: elos[player_id] for player_id in tournament["players"] if player_id in elos}
+            if changed:
+                Tournament.update_standings(tournament["id"], elos=changed)
+        return elos
+
+    @classmethod
+    def get_rating_history(cls, player_id):
+        """Return the elo changes of a player, from the oldest
+
+        Args:
+            player_id (integer): id of the player in database
+
+        Returns:
+            list: dictionnaries with the tournament_id, round_id, rating_before, rating_after and date of each change
+        """
+        return sorted((dict(entry) for entry in db.table('ratings').search_by(player_id=player_id)),
+                      key=lambda entry: (entry["date"], entry["round_id"]))
+
+    @classmethod
+    def rating_order(cls, round_document):
+        """Return the key ordering the rounds when the ratings are computed again: their beginning date
+
+        Args:
+            round_document (dictionnary): the round as saved in the database
+
+        Returns:
+            tuple: beginning date and id of the round
+        """
+        return round_document.get("beginning_date") or "", round_document["round_id"]
+
+    @classmethod
+    def rated_after(cls, round_id, player_ids):
+        """Tell if some players have been rated in a round coming after the given one
+
+        Args:
+            round_id (integer): id of the round in database
+            player_ids (list): ids of the players
+
+        Returns:
+            boolean: True if one of them has a rating from a later round
+        """
+        order = Tournament.rating_order(db.table('rounds').get_by(round_id=round_id))
+        later_rounds = {entry["round_id"] for player_id in player_ids
+                        for entry in db.table('ratings').search_by(player_id=player_id)} - {round_id}
+        return any(Tournament.rating_order(db.table('rounds').get_by(round_id=later_round)) > order
+                   for later_round in later_rounds)
+
+    @classmethod
+    def replay_ratings(cls, round_id=None):
+        """Compute again the elo of all the players from the results of every round over
+        The rounds are rated one after the other, in the order of their beginning date. Each
+        player starts from his first rating in the history, or from his current elo if he has
+        none. The ratings are kept in arrays indexed by player id and each round updates its
+        players at once. Every CHECKPOINT_GAMES games, the ratings of the players rated so far
+        are saved in the table 'rating_checkpoints': a replay from a given round restarts from
+        the last checkpoint before it instead of from the first round.
 
-        db.table('rounds').update({"ending_date": str(datetime.now())},
-                                  (where("tournament_id") == tournament_id_user_choice) &
-                                  (where("round_id") == round_id))
+        Args:
+            round_id (integer, optional): id of the first round whose results or rules changed.
+                                          Defaults to None, to replay every round.
+
+        Returns:
+            dictionnary: number of rated rounds and games, of players whose elo changed,
+                         and id of the round the replay started from. None if the round does not exist
+        """
+        rounds = sorted(({"round_id": number, "tournament_id": tournament_id, "beginning_date": beginning_date}
+                         for _, number, tournament_id, beginning_date in db.table('rounds').rows(
+                             "round_id", "tournament_id", "beginning_date")), key=Tournament.rating_order)
+        ranks = {document["round_id"]: rank for rank, document in enumerate(rounds)}
+        if round_id is not None and round_id not in ranks:
+            return None
+        checkpoints = [checkpoint for checkpoint in db.table('rating_checkpoints').all()
+                       if checkpoint["round_id"] in ranks]
+        checkpoint = None
+        if round_id is not None:
+            checkpoint = max((checkpoint for checkpoint in checkpoints
+                              if ranks[checkpoint["round_id"]] <= ranks[round_id]),
+                             key=lambda checkpoint: ranks[checkpoint["round_id"]], default=None)
+        start = ranks[checkpoint["round_id"]] if checkpoint else 0
+
+        # les parties des rounds terminés à partir du point de reprise, dans l'ordre des rounds
+        columns = np.array([(ranks.get(game_round_id, -1), player_one_id, player_two_id, points_one, points_two)
+                            for _, game_round_id, player_one_id, player_two_id, points_one, points_two
+                            in db.table('matchs').rows("round_id", "player_one_id", "player_two_id",
+                                                       "score_one", "score_two")],
+                           dtype=np.float64).reshape(-1, 5)
+        rank, player_one, player_two, score_one, score_two = columns.T
+        over = score_one + score_two == 1
+        kept = over & (rank >= start) & ~np.isin(rank, rank[~over])
+        order = np.argsort(rank[kept], kind="stable")
+        rank = rank[kept][order].astype(np.int64)
+        player_one = player_one[kept][order].astype(np.intp)
+        player_two = player_two[kept][order].astype(np.intp)
+        score_one = score_one[kept][order]
+        period_ends = np.append(np.flatnonzero(np.diff(rank)) + 1, len(rank)) if len(rank) else np.array([], int)
+        period_rounds = [rounds[period_rank] for period_rank in rank[period_ends - 1]]
+
+        players = list(db.table('players').rows("id", "elo", "rated_games"))
+        doc_ids = {player_id: doc_id for doc_id, player_id, _, _ in players}
+        size = int(max(max(doc_ids, default=0), player_one.max(initial=0), player_two.max(initial=0))) + 1
+        ids = np.array([player_id for _, player_id, _, _ in players], dtype=np.intp)
+        ratings = np.zeros(size, dtype=np.int64)
+        rated_games = np.zeros(size, dtype=np.int64)
+        ratings[ids] = [elo for _, _, elo, _ in players]
+        rated_games[ids] = [count or 0 for _, _, _, count in players]
+        saved_ratings, saved_games = ratings.copy(), rated_games.copy()
+
+        # chaque joueur part de son premier classement de l'historique
+        first = {}
+        previous = {}
+        dates = {}
+        for doc_id, player_id, entry_round_id, rating_before, rating_after, games_before, entry_date in db.table(
+                'ratings').rows("player_id", "round_id", "rating_before", "rating_after", "games_before", "date"):
+            entry_rank = ranks.get(entry_round_id, -1)
+            if entry_rank >= start:
+                previous[(player_id, entry_round_id)] = (doc_id, rating_before, rating_after, games_before)
+                dates.setdefault(entry_round_id, entry_date)
+            known = first.get(player_id)
+            if known is None or entry_rank < known[0]:
+                first[player_id] = (entry_rank, rating_before, games_before)
+        for player_id, (_, rating_before, games_before) in first.items():
+            ratings[player_id], rated_games[player_id] = rating_before, games_before
+        played = np.zeros(size, dtype=bool)
+        if checkpoint:
+            ids = np.array(checkpoint["player_ids"], dtype=np.intp)
+            ratings[ids], rated_games[ids] = checkpoint["ratings"], checkpoint["games"]
+            played[ids] = True
+
+        new_checkpoints = []
+        corrected = {}
+        date = str(datetime.now())
+
+        def replayed_history():
+            """Rate the rounds one after the other and yield the history entries of the rounds not rated yet
+            The entries already saved are kept if they did not change, or corrected in place.
+            """
+            games_since_checkpoint = 0
+            for period, player_ids, ratings_before, games_before in rating.replay(ratings, rated_games, period_ends,
+                                                                                  player_one, player_two, score_one):
+                rated_round_id = period_rounds[period]["round_id"]
+                for player_id, rating_before, rating_after, count in zip(
+                        player_ids.tolist(), ratings_before.tolist(), ratings[player_ids].tolist(),
+                        games_before.tolist()):
+                    known = previous.pop((player_id, rated_round_id), None)
+                    if known is None:
+                        yield {"player_id": player_id,
+                               "tournament_id": period_rounds[period]["tournament_id"],
+                               "round_id": rated_round_id,
+                               "rating_before": rating_before,
+                               "rating_after": rating_after,
+                               "games_before": count,
+                               "date": dates.get(rated_round_id, date)}
+                    elif known[1:] != (rating_before, rating_after, count):
+                        corrected[known[0]] = {"rating_before": rating_before, "rating_after": rating_after,
+                                               "games_before": count}
+                played[player_ids] = True
+                games_since_checkpoint += period_ends[period] - (period_ends[period - 1] if period else 0)
+                if games_since_checkpoint >= CHECKPOINT_GAMES and period + 1 < len(period_ends):
+                    ids = np.flatnonzero(played)
+                    new_checkpoints.append({"round_id": period_rounds[period + 1]["round_id"],
+                                            "player_ids": ids.tolist(),
+                                            "ratings": ratings[ids].tolist(),
+                                            "games": rated_games[ids].tolist()})
+                    games_since_checkpoint = 0
+
+        # les entrées sont écrites au fil du calcul, sans garder une seconde copie de tout l'historique
+        db.table('ratings').insert_multiple(replayed_history())
+        db.table('ratings').update_many(corrected)
+        if previous:
+            # entrées de rounds qui ne sont plus notés
+            db.table('ratings').remove(doc_ids=[known[0] for known in previous.values()])
+        stale = [saved.doc_id for saved in db.table('rating_checkpoints').all()
+                 if checkpoint is None or ranks.get(saved["round_id"], start + 1) > start]
+        if stale:
+            db.table('rating_checkpoints').remove(doc_ids=stale)
+        if new_checkpoints:
+            db.table('rating_checkpoints').insert_multiple(new_checkpoints)
+
+        changed = [player_id for player_id in np.flatnonzero((ratings != saved_ratings)
+                                                             | (rated_games != saved_games)).tolist()
+                   if player_id in doc_ids]
+        db.table('players').update_many({doc_ids[player_id]: {"elo": int(ratings[player_id]),
+                                                              "rated_games": int(rated_games[player_id])}
+                                         for player_id in changed})
+        # les classements des tournois des joueurs, écrits en une fois
+        elos = {player_id: int(ratings[player_id]) for player_id in changed}
+        new_standings = {}
+        for doc_id, tournament_id, tournament_players, standings in cls.__table__.rows("id", "players", "standings"):
+            if not any(player_id in elos for player_id in tournament_players):
+                continue
+            if standings is None:
+                Tournament.update_standings(tournament_id, elos=elos)
+                continue
+            new_standings[doc_id] = {"standings": Tournament.rank_standings(
+                [{**entry, "elo": elos.get(entry["player_id"], entry["elo"])} for entry in standings])}
+        cls.__table__.update_many(new_standings)
+        return {"rounds": len(period_rounds),
+                "games": len(player_one),
+                "changed_players": len(changed),
+                "from_round": period_rounds[0]["round_id"] if period_rounds else None}
+
+    @classmethod
+    def add_to_tournament_score(cls, player_id, tournament_id, points):
+        """Adds points to the tournament score of a player
+        The score is created in the table 'scores' if the player has none yet
+
+        Args:
+            player_id (integer): id of the player in database
+            tournament_id (integer): id of the concerned tournament in database
+            points (float): points won by the player
+        """
+        if not db.table('scores').update_by(add("score", points), player_id=player_id, tournament_id=tournament_id):
+            Score(player_id, tournament_id, points).save()
 
     @classmethod
     def get_tournament_score(cls, player_id, tournament_id):
@@ -564,11 +1676,7 @@ class Tournament():
             float: score of the player in the wished tournament
         """
 
-        if not db.table('scores').search(where('tournament_id') == tournament_id):
-            return 0
-
-        tournament_score = db.table('scores').get((where('player_id') == player_id) &
-                                                  (where('tournament_id') == tournament_id))
+        tournament_score = db.table('scores').get_by(player_id=player_id, tournament_id=tournament_id)
         if tournament_score is None:
             return 0
         return tournament_score["score"]
@@ -576,13 +1684,44 @@ class Tournament():
     @classmethod
     def change_player_elo(cls, player_choice, new_elo):
         """Changes the elo of a player in the table 'players'
+        and in the standings of the tournaments he plays
 
         Args:
             player_choice (integer): id of the player in database
             new_elo (integer): new value updated in database
         """
-        P = Query()
-        db.table('players').update({'elo': new_elo}, P.id == player_choice)
+        db.table('players').update_by({'elo': new_elo}, id=player_choice)
+        for tournament in cls.__table__.all():
+            if player_choice in tournament["players"]:
+                Tournament.update_standings(tournament["id"], elos={player_choice: new_elo})
+
+    @classmethod
+    def get_player_names(cls, player_ids):
+        """Find the firstname of players through the index of the table 'players'
+
+        Args:
+            player_ids (iterable): ids of the players in database
+
+        Returns:
+            dictionnary: firstname of each player id
+        """
+        names = {}
+        for player_id in player_ids:
+            player = db.table('players').get_by(id=player_id)
+            names[player_id] = player["firstname"] if player is not None else None
+        return names
+
+    @classmethod
+    def get_player(cls, player_id):
+        """Return the document of a player
+
+        Args:
+            player_id (integer): id of the player in database
+
+        Returns:
+            dictionnary: the player, None if there is none
+        """
+        return db.table('players').get_by(id=player_id)
 
     @classmethod
     def get_player_info(cls, player_choice):
@@ -594,7 +1733,7 @@ class Tournament():
         Returns:
             list: list displaying all infos about the player
         """
-        player = db.table('players').get(where('id') == player_choice)
+        player = db.table('players').get_by(id=player_choice)
         player_display = [f"Prénom: {player['firstname']}",
                           f"Nom: {player['lastname']}",
                           f"Date de naissance: {player['birth_date']}",
@@ -604,21 +1743,21 @@ class Tournament():
 
     @classmethod
     def get_all_players(cls):
-        """Return a list with all components of the 'players' table
+        """Return all components of the 'players' table, read one by one
         Returns:
-            list: a list with all components of the 'players' table
+            iterator: all components of the 'players' table
         """
-        return db.table('players').all()
+        return iter(db.table('players'))
 
     @classmethod
     def get_all_tournaments(cls):
-        """Return a list with all components of the 'tournaments' table
+        """Return all components of the 'tournaments' table, read one by one
 
         Returns:
-            list: all components of the 'tournaments' table
+            iterator: all components of the 'tournaments' table
 
         """
-        return db.table('tournaments').all()
+        return iter(db.table('tournaments'))
 
     @classmethod
     def get_tournament_rounds(cls, tournament_choice):
@@ -632,145 +1771,184 @@ class Tournament():
             list: all components of the 'rounds' table for a given
         tournament
         """
-        return db.table('rounds').search(where('tournament_id') == tournament_choice)
+        return db.table('rounds').search_by(tournament_id=tournament_choice)
+
+    @classmethod
+    def get_tournament_matchs(cls, tournament_choice):
+        """Return all components of the 'matchs' table for a given tournament
+
+        Args:
+            tournament_choice (integer): tournament id in database
+
+        Returns:
+            list: the matchs of the tournament
+        """
+        return db.table('matchs').search_by(tournament_id=tournament_choice)
 
     @classmethod
-    def report_1(cls, sorting, returned_report):
+    def get_tournament_scores(cls, tournament_choice):
+        """Return all components of the 'scores' table for a given tournament
+
+        Args:
+            tournament_choice (integer): tournament id in database
+
+        Returns:
+            list: the scores of the tournament
+        """
+        return db.table('scores').search_by(tournament_id=tournament_choice)
+
+    @classmethod
+    def report_1(cls, sorting, offset=0, limit=None):
         """generate a report with all players in database
+        The players are read page by page from the sorted index of the table 'players'.
 
         Args:
             sorting (string): a for alphabetical, c for rank
-            returned_report (list): each element is a list with player info
+            offset (integer, optional): number of players to skip. Defaults to 0.
+            limit (integer, optional): maximum number of players. Defaults to None, for all of them.
+
+        Yields:
+            list: player info
         """
         if sorting == "a":
-            report = sorted(Tournament.get_all_players(), key=lambda x: x["firstname"].lower())
-        if sorting == "c":
-            report = sorted(Tournament.get_all_players(), key=lambda x: x["elo"], reverse=True)
+            report = db.table('players').sorted_by("firstname", offset=offset, limit=limit)
+        else:
+            report = db.table('players').sorted_by("elo", reverse=True, offset=offset, limit=limit)
         for value in report:
-            returned_report.append([f"Prénom: {value['firstname']}",
-                                    f"Nom: {value['lastname']}",
-                                    f"Date de naissance: {value['birth_date']}",
-                                    f"Classement elo: {value['elo']}"])
+            yield [f"Prénom: {value['firstname']}",
+                   f"Nom: {value['lastname']}",
+                   f"Date de naissance: {value['birth_date']}",
+                   f"Classement elo: {value['elo']}"]
 
     @classmethod
-    def report_2(cls, report, returned_report, choosing):
+    def report_2(cls, offset=0, limit=None):
         """generate a report with all tournaments in database
 
         Args:
-            report (list): intermediate list that will be cleaned
-            returned_report (list): will receive clean data
-            choosing (boolean): only use in this method as a trigger for cleaning
+            offset (integer, optional): number of tournaments to skip. Defaults to 0.
+            limit (integer, optional): maximum number of tournaments. Defaults to None, for all of them.
 
-        Returns:
-            list: list with clean data
+        Yields:
+            list: tournament info
         """
-        report = Tournament.get_all_tournaments()
-        for value in report:
-            if choosing:
-                try:
-                    del value["lists_of_possible_games"]
-                except KeyError:
-                    pass
-                return report
-            returned_report.append([f"Nom: {value['name']}",
-                                    f"Lieu: {value['location']}",
-                                    f"Nombre de tours prévus: {value['nb_rounds']}",
-                                    f"Joueurs participants: {value['players']}",
-                                    f"id des tours déjà joués: {value['rounds']}",
-                                    f"Règles des partie: {value['game_rules']}",
-                                    f"Date de début: {value['begin_date']}",
-                                    f"Date de fin: {value['ending_date']}"])
-        return returned_report
-
-    @classmethod
-    def report_3(cls, report, returned_report, tournament_choice, sorting):
+        for value in itertools.islice(cls.__table__, offset, None if limit is None else offset + limit):
+            yield [f"Nom: {value['name']}",
+                   f"Lieu: {value['location']}",
+                   f"Système: {value.get('system', SWISS)}",
+                   f"Nombre de tours prévus: {value['nb_rounds']}",
+                   f"Joueurs participants: {value['players']}",
+                   f"id des tours déjà joués: {value['rounds']}",
+                   f"Règles des partie: {value['game_rules']}",
+                   f"Date de début: {value['begin_date']}",
+                   f"Date de fin: {value['ending_date']}"]
+
+    @classmethod
+    def report_3(cls, tournament_choice, sorting, offset=0, limit=None):
         """generate a list with all players for a given tournament
 
         Args:
-            report (list): empty list that will be fill with raw data
-            returned_report (list): empty list that will be filled with fancy elements
             tournament_choice (integer): id of the wished tournament in database
-            sorting (string): a for alphabetical, c for rank
+            sorting (string): a for alphabetical, c for the standings of the tournament
+            offset (integer, optional): number of players to skip. Defaults to 0.
+            limit (integer, optional): maximum number of players. Defaults to None, for all of them.
+
+        Yields:
+            list: player info
         """
+        # les joueurs sont lus dans l'ordre du classement: score, départages puis elo
+        report = Tournament.get_players(tournament_choice)
         if sorting == "a":
-            report = sorted(Tournament.get_players(tournament_choice),
-                            key=lambda x: x.firstname.value.lower())
-        if sorting == "c":
-            report = sorted(Tournament.get_players(tournament_choice),
-                            key=lambda x: x.elo.value, reverse=True)
-        for value in report:
-            returned_report.append([f"Prénom: {value.firstname.value}",
-                                    f"Nom: {value.lastname.value}",
-                                    f"Date de naissance: {value.birth_date.value}",
-                                    f"Classement elo: {value.elo.value}",
-                                    f"Score dans le tournoi: {value.tournament_score}"])
+            report = sorted(report, key=lambda x: x.firstname.lower())
+        for value in itertools.islice(report, offset, None if limit is None else offset + limit):
+            yield [f"Prénom: {value.firstname}",
+                   f"Nom: {value.lastname}",
+                   f"Date de naissance: {value.birth_date}",
+                   f"Classement elo: {value.elo}",
+                   f"Score dans le tournoi: {value.tournament_score}",
+                   f"Départages: {format_tiebreaks(value.tiebreaks)}"]
 
     @classmethod
-    def report_4(cls, report, returned_report, tournament_choice):
+    def report_4(cls, tournament_choice, offset=0, limit=None):
         """generate a report ith all rounds from a given tournament
 
         Args:
-            report (list): empty list that will be fill with raw data
-            returned_report (list): empty list that will be filled with fancy elements
             tournament_choice (integer): id of the wished tournament in database
+            offset (integer, optional): number of rounds to skip. Defaults to 0.
+            limit (integer, optional): maximum number of rounds. Defaults to None, for all of them.
 
-        Returns:
-            list: list with fancy data
+        Yields:
+            list: round info
         """
         report = Tournament.get_tournament_rounds(tournament_choice)
-        display = deepcopy(report)
-        for value in display:
-            try:
-                del value["round_id"]
-                del value["tournament_id"]
-            except KeyError:
-                pass
-            returned_report.append([f"Nom du tour: {value['name']}",
-                                    f"Date de début: {value['beginning_date']}",
-                                    f"Date de fin: {value['ending_date']}",
-                                    f"Parties jouées: {value['games']}"])
-        return returned_report
+        for value in itertools.islice(report, offset, None if limit is None else offset + limit):
+            # les rounds d'un tournoi toutes rondes sont enregistrés avant d'être commencés
+            yield [f"Nom du tour: {value['name']}",
+                   f"Date de début: {value['beginning_date'] or 'à venir'}",
+                   f"Date de fin: {value['ending_date']}",
+                   f"Parties jouées: {value['games']}"]
+
+    @classmethod
+    def report_5(cls, tournament_choice, round_choice, offset=0, limit=None):
+        """generate a report with the games of a round
+
+        Args:
+            tournament_choice (integer): id of the wished tournament in database
+            round_choice (integer): number of the round in the tournament
+            offset (integer, optional): number of games to skip. Defaults to 0.
+            limit (integer, optional): maximum number of games. Defaults to None, for all of them.
+
+        Yields:
+            list: game info
+        """
+        round = db.table('rounds').get_by(tournament_id=tournament_choice, name=f"Round {round_choice}")
+        games = (round.get("games") or []) if round is not None else []
+        for game in itertools.islice(games, offset, None if limit is None else offset + limit):
+            player_one, player_two = game
+            yield [f"Joueur 1: {player_one[1]}(id:{player_one[0]})",
+                   f"Joueur 2: {player_two[1]}(id:{player_two[0]})",
+                   f"Score: {player_one[2]} - {player_two[2]}"]
 
     @classmethod
     def get_report(cls, choice,
                    tournament_choice=None,
                    sorting=None,
                    round_choice=None,
-                   choosing=None):
+                   choosing=None,
+                   offset=0,
+                   limit=None):
         """will generate a report according to the user choice
+        The rows are generated one by one, only for the wished page.
 
         Args:
             choice (integer): number of the wished report
             tournament_choice (integer, optional): id of the wished tournament in database. Defaults to None.
             sorting (string, optional): a for alphabetical, c for rank. Defaults to None.
-            round_choice (integer, optional): id of the round in database. Defaults to None.
-            choosing (boolean, optional): only used in report 2. Defaults to None.
+            round_choice (integer, optional): number of the round in the tournament. Defaults to None.
+            choosing (boolean, optional): with report 2, return the documents of the tournaments. Defaults to None.
+            offset (integer, optional): number of rows to skip. Defaults to 0.
+            limit (integer, optional): maximum number of rows. Defaults to None, for all of them.
 
         Returns:
-            list: list filled with data to display
+            iterator: rows to display
         """
-
-        report = []
-        returned_report = []
         if choice == 1:
-            Tournament.report_1(sorting, returned_report)
+            return Tournament.report_1(sorting, offset, limit)
         if choice == 2:
-            return Tournament.report_2(report, returned_report, choosing)
+            if choosing:
+                return Tournament.get_all_tournaments()
+            return Tournament.report_2(offset, limit)
         if choice == 3:
-            Tournament.report_3(report, returned_report, tournament_choice, sorting)
+            return Tournament.report_3(tournament_choice, sorting, offset, limit)
         if choice == 4:
-            Tournament.report_4(report, returned_report, tournament_choice)
+            return Tournament.report_4(tournament_choice, offset, limit)
         if choice == 5:
-            first_report = Tournament.get_tournament_rounds(tournament_choice)
-            for value in first_report:
-                if value["name"] == f"Round {round_choice}":
-                    returned_report = value
-        return returned_report
+            return Tournament.report_5(tournament_choice, round_choice, offset, limit)
+        return iter(())
 
 
 class Player():
     """ Model for player management """
-    __table__ = db.table('players')
+    __table__ = LazyTable('players')
 
     firstname = None
     lastname = None
@@ -790,25 +1968,40 @@ class Player():
     def __repr__(self):
         return self.__table__[0]["firstname"]
 
+    def to_dict(self):
+        """ Return the attributes as saved in the database """
+        return {"firstname": self.firstname,
+                "lastname": self.lastname,
+                "birth_date": self.birth_date,
+                "gender": self.gender,
+                "elo": self.elo,
+                "id": self.id}
+
     def save(self):
         """ Save all attributes in the database at the corresponding table """
-        self.__table__.insert({"firstname": self.firstname,
-                               "lastname": self.lastname,
-                               "birth_date": self.birth_date,
-                               "gender": self.gender,
-                               "elo": self.elo,
-                               "id": self.id})
+        self.__table__.insert(self.to_dict())
+
+    @classmethod
+    def save_many(cls, players):
+        """Save several players in a single write
+
+        Args:
+            players (list): Player instances with their id already set
+        """
+        if players:
+            cls.__table__.insert_multiple(player.to_dict() for player in players)
 
 
 class Match():
     """ Model for match management """
-    __table__ = db.table('matchs')
+    __table__ = LazyTable('matchs')
 
     player_one_id = None
     player_two_id = None
     score_one = None
     player_two_name = None
     round_id = None
+    tournament_id = None
     score_two = None
     player_one_name = None
 
@@ -819,7 +2012,8 @@ class Match():
                  score_two=0,
                  player_one_name=None,
                  player_two_name=None,
-                 round_id=None):
+                 round_id=None,
+                 tournament_id=None):
         self.player_one_id = player_one_id
         self.player_two_id = player_two_id
         self.score_one = score_one
@@ -827,6 +2021,7 @@ class Match():
         self.player_one_name = player_one_name
         self.player_two_name = player_two_name
         self.round_id = round_id
+        self.tournament_id = tournament_id
 
     def __repr__(self):
         to_repr1 = f"{[self.player_one_id, self.player_one_name, self.score_one]}\n"
@@ -834,17 +2029,21 @@ class Match():
         return f"{to_repr1} {to_repr2}"
 
     def save(self):
-        """ Save all attributes in the database at the corresponding table """
-        self.__table__.insert({'joueur1': f"{self.player_one_name}(id:{self.player_one_id})",
-                               'joueur2': f"{self.player_two_name}(id:{self.player_two_id})",
+        """ Save all attributes in the database at the corresponding table
+        The names of the players are not saved, they are found by their id when displayed.
+        """
+        self.__table__.insert({'player_one_id': self.player_one_id,
+                               'player_two_id': self.player_two_id,
                                'score_one': self.score_one,
                                'score_two': self.score_two,
                                'round_id': self.round_id,
-                               'match_id': len(db.table('matchs')) + 1})
+                               'tournament_id': self.tournament_id,
+                               'match_id': Sequence.next_id("matchs")})
 
-    def to_json(self):
-        return json.dumps(([self.player_one_id, self.player_one_name, self.score_one],
-                           [self.player_two_id, self.player_two_name, self.score_two]))
+    def to_list(self):
+        """ Return the game as it is saved in the games of its round """
+        return [[self.player_one_id, self.player_one_name, self.score_one],
+                [self.player_two_id, self.player_two_name, self.score_two]]
 
 
 class Round():
@@ -853,7 +2052,7 @@ class Round():
     Returns:
         string: fancy display of a round
     """
-    __table__ = db.table('rounds')
+    __table__ = LazyTable('rounds')
 
     round_id = None
     list_of_match = None
@@ -885,7 +2084,7 @@ class Round():
 
 class Score():
     """ Model for score management """
-    __table__ = db.table('scores')
+    __table__ = LazyTable('scores')
 
     player_id = None
     tournament_id = None
@@ -902,3 +2101,67 @@ class Score():
         self.__table__.insert({"player_id": self.player_id,
                                "tournament_id": self.tournament_id,
                                "score": self.score})
+
+
+class Sequence():
+    """ Model for the id sequences of the other tables
+    Each sequence stores the last id given, so new ids never come back
+    even when documents are removed.
+    """
+    __table__ = LazyTable('sequences')
+
+    # table and field holding the ids of each sequence
+    SOURCES = {"tournaments": ("tournaments", "id"),
+               "players": ("players", "id"),
+               "rounds": ("rounds", "round_id"),
+               "matchs": ("matchs", "match_id")}
+
+    @classmethod
+    def reserve(cls, kind, count=1):
+        """Take a block of consecutive ids in a sequence
+
+        Args:
+            kind (string): name of the sequence, a key of SOURCES
+            count (integer, optional): number of ids to take. Defaults to 1.
+
+        Returns:
+            integer: first id of the block
+        """
+        with transaction():
+            sequence = cls.__table__.get_by(kind=kind)
+            if sequence is None:
+                last_id = cls.last_used_id(kind)
+                cls.__table__.insert({"kind": kind, "value": last_id + count})
+            else:
+                last_id = sequence["value"]
+                cls.__table__.update_by({"value": last_id + count}, kind=kind)
+        return last_id + 1
+
+    @classmethod
+    def next_id(cls, kind):
+        """Take the next id of a sequence
+
+        Args:
+            kind (string): name of the sequence, a key of SOURCES
+
+        Returns:
+            integer: the id
+        """
+        return cls.reserve(kind, 1)
+
+    @classmethod
+    def last_used_id(cls, kind):
+        """Find the biggest id already used, to start a sequence on an existing database
+
+        Args:
+            kind (string): name of the sequence, a key of SOURCES
+
+        Returns:
+            integer: the biggest id, 0 if the table is empty
+        """
+        table, field = cls.SOURCES[kind]
+        return max((int(document.get(field) or 0) for document in db.table(table).all()), default=0)
+
+
+if settings.PROFILE:
+    instrumentation.enable(settings.PROFILE_OUTPUT, settings.PROFILE_CAPTURE)
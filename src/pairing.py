@@ -0,0 +1,207 @@
+"""
+This module computes the games of a swiss round.
+
+It does not communicate with the database: the model gives it the ranking
+of the players, their tournament scores and the pairs already played,
+and receives the list of games to save.
+
+Players are split into score groups. Inside a group the top half plays
+the bottom half (dutch system). When a player can not be paired in his
+group he floats down to the next one. The pairing is searched depth first
+with the cheapest candidates tried first, so the usual case is linear and
+the backtracking only happens at the end of the ranking.
+"""
+import time
+
+# Number of backtracking steps allowed before accepting one more rematch
+MAX_BACKTRACKING_STEPS = 20000
+
+# Nombre de bits du plus grand des deux id dans la clé d'une partie
+PAIR_KEY_BITS = 32
+
+
+def pair_key(player_one_id, player_two_id):
+    """Return the key identifying a game whatever the order of the players
+    The two ids are packed in a single integer, the smallest one in the high bits,
+    so the played games are a set of integers, saved as a plain list of numbers.
+
+    Args:
+        player_one_id (integer): id of the first player in database
+        player_two_id (integer): id of the second player in database
+
+    Returns:
+        integer: the key of the game
+    """
+    if player_one_id > player_two_id:
+        player_one_id, player_two_id = player_two_id, player_one_id
+    return player_one_id << PAIR_KEY_BITS | player_two_id
+
+
+def choose_bye(ranking, byes):
+    """Select the player who will not play this round when the number of players is odd
+    It is the lowest ranked player who has not already been exempted.
+
+    Args:
+        ranking (list): ids of the players, best first
+        byes (set): ids of the players already exempted in the tournament
+
+    Returns:
+        integer: id of the exempted player
+    """
+    for player_id in reversed(ranking):
+        if player_id not in byes:
+            return player_id
+    return ranking[-1]
+
+
+def score_groups(ranking, scores):
+    """Give for each position of the ranking the bounds of its score group
+
+    Args:
+        ranking (list): ids of the players, best first
+        scores (dictionnary): tournament score of each player id
+
+    Returns:
+        list: (start, end) of the score group of each position, end excluded
+    """
+    bounds = []
+    start = 0
+    for position in range(1, len(ranking) + 1):
+        if position == len(ranking) or scores.get(ranking[position], 0) != scores.get(ranking[start], 0):
+            bounds.extend([(start, position)] * (position - start))
+            start = position
+    return bounds
+
+
+def _candidates(position, group, nb_of_players):
+    """Yield the positions of the possible opponents, preferred ones first
+    The ideal opponent of a player of the top half of his group is the one
+    with the same rank in the bottom half. Then the closest players of
+    the group are proposed and finally the players of the lower groups.
+
+    Args:
+        position (integer): position of the player to pair in the ranking
+        group (tuple): bounds of the score group of the player
+        nb_of_players (integer): length of the ranking
+    """
+    start, end = group
+    half = (end - start) // 2
+    ideal = position + half if position - start < half else position + 1
+    offset = 0
+    while ideal + offset < end or ideal - offset > position:
+        if ideal + offset < end:
+            yield ideal + offset
+        if offset and position < ideal - offset < end:
+            yield ideal - offset
+        offset += 1
+    yield from range(max(end, position + 1), nb_of_players)
+
+
+def _search(ranking, groups, played, max_rematches):
+    """Pair all the players of the ranking by a depth first search
+
+    Args:
+        ranking (list): ids of the players to pair, best first
+        groups (list): score group bounds of each position
+        played (set): keys of the games already played in the tournament
+        max_rematches (integer): number of games between two players who have already met allowed in the round
+
+    Returns:
+        list: pairs of positions, None if no pairing was found
+    """
+    nb_of_players = len(ranking)
+    paired = [False] * nb_of_players
+    partner = [None] * nb_of_players
+    rematch = [False] * nb_of_players
+    rematches = 0
+    stack = []
+    steps = 0
+    first = 0
+    while True:
+        while first < nb_of_players and paired[first]:
+            first += 1
+        if first == nb_of_players:
+            return [(position, partner[position]) for position, _ in stack]
+        paired[first] = True
+        stack.append((first, _candidates(first, groups[first], nb_of_players)))
+        while True:
+            position, candidates = stack[-1]
+            player_id = ranking[position]
+            for candidate in candidates:
+                if paired[candidate]:
+                    continue
+                is_rematch = pair_key(player_id, ranking[candidate]) in played
+                if not is_rematch or rematches < max_rematches:
+                    break
+            else:
+                candidate = None
+            if candidate is not None:
+                partner[position] = candidate
+                paired[candidate] = True
+                rematch[position] = is_rematch
+                rematches += is_rematch
+                break
+            # dead end: the previous player has to try another opponent
+            stack.pop()
+            paired[position] = False
+            steps += 1
+            if not stack or steps > MAX_BACKTRACKING_STEPS:
+                return None
+            previous = stack[-1][0]
+            paired[partner[previous]] = False
+            partner[previous] = None
+            rematches -= rematch[previous]
+            rematch[previous] = False
+            first = previous
+
+
+def pair_round(ranking, scores, played=frozenset(), byes=frozenset()):
+    """Compute the games of the next round
+
+    Two players who have already met are only paired again if there is
+    no other way to pair the whole ranking, and then as few times as possible:
+    the search is done again allowing one more rematch each time.
+
+    Args:
+        ranking (list): ids of the players, sorted by tournament score then elo
+        scores (dictionnary): tournament score of each player id
+        played (set, optional): keys of the games already played (see pair_key)
+        byes (set, optional): ids of the players already exempted
+
+    Returns:
+        list: games as (player_one_id, player_two_id), player one being the better ranked
+        integer: id of the exempted player, None if the number of players is even
+    """
+    ranking = list(ranking)
+    bye = None
+    if len(ranking) % 2:
+        bye = choose_bye(ranking, byes)
+        ranking.remove(bye)
+    groups = score_groups(ranking, scores)
+    max_rematches = 0
+    pairs = _search(ranking, groups, played, max_rematches)
+    while pairs is None:
+        # chaque recherche est plus permissive que la précédente, toutes les parties sont permises au pire
+        max_rematches += 1
+        pairs = _search(ranking, groups, played, max_rematches)
+    return [(ranking[one], ranking[two]) for one, two in pairs], bye
+
+
+def timed_pair_round(ranking, scores, played=frozenset(), byes=frozenset()):
+    """Compute the games of the next round and measure the time taken
+    Used by the processes pairing several tournaments at once.
+
+    Args:
+        ranking (list): ids of the players, sorted by tournament score then elo
+        scores (dictionnary): tournament score of each player id
+        played (set, optional): keys of the games already played (see pair_key)
+        byes (set, optional): ids of the players already exempted
+
+    Returns:
+        list: games as (player_one_id, player_two_id)
+        integer: id of the exempted player, None if the number of players is even
+        float: seconds spent to pair the round
+    """
+    start = time.perf_counter()
+    pairs, bye = pair_round(ranking, scores, played, byes)
+    return pairs, bye, time.perf_counter() - start
@@ -0,0 +1,109 @@
+"""
+This module computes the elo ratings of the players from the results of their games.
+
+The games of a rating period, a round for example, are rated together
+with numpy arrays: the expected score of every game, the K-factor of
+every player and the rating changes are each computed by a single array
+operation, without a Python loop over the games. As in the FIDE rules,
+all the games of a period are rated from the ratings the players had
+before it, and the new ratings are rounded at the end of the period.
+
+The ratings are arrays indexed by the position of each player, which
+can simply be his id.
+"""
+import numpy as np
+
+
+# Facteur K de la FIDE: 40 pendant les 30 premières parties, puis 20, et 10 à partir de 2400
+NEW_PLAYER_K = 40
+NEW_PLAYER_GAMES = 30
+K = 20
+HIGH_RATING_K = 10
+HIGH_RATING = 2400
+
+
+def expected_scores(ratings, opponent_ratings):
+    """Return the expected score of each player against his opponent
+
+    Args:
+        ratings (numpy array): ratings of the players
+        opponent_ratings (numpy array): ratings of their opponents
+
+    Returns:
+        numpy array: expected scores, between 0 and 1
+    """
+    return 1 / (1 + 10 ** ((opponent_ratings - ratings) / 400))
+
+
+def k_factors(ratings, games):
+    """Return the K-factor of each player, from his rating and his number of rated games
+
+    Args:
+        ratings (numpy array): ratings of the players
+        games (numpy array): number of games already rated for each player
+
+    Returns:
+        numpy array: K-factors
+    """
+    return np.where(games < NEW_PLAYER_GAMES, NEW_PLAYER_K, np.where(ratings >= HIGH_RATING, HIGH_RATING_K, K))
+
+
+def rate_period(ratings, games, player_one, player_two, score_one):
+    """Compute the ratings of the players after the games of a rating period
+
+    Args:
+        ratings (array): rating of each player before the period
+        games (array): number of rated games of each player before the period
+        player_one (array): position in ratings of the first player of each game
+        player_two (array): position in ratings of the second player of each game
+        score_one (array): score of the first player of each game, 0, 0.5 or 1
+
+    Returns:
+        numpy array: rounded rating of each player after the period, unchanged for the ones who did not play
+        numpy array: number of rated games of each player after the period
+    """
+    ratings = np.asarray(ratings, dtype=np.float64)
+    games = np.asarray(games, dtype=np.int64)
+    player_one = np.asarray(player_one, dtype=np.intp)
+    player_two = np.asarray(player_two, dtype=np.intp)
+    size = len(ratings)
+
+    # ce que le joueur 1 gagne par rapport à son score attendu, le joueur 2 le perd
+    difference = np.asarray(score_one, dtype=np.float64) - expected_scores(ratings[player_one], ratings[player_two])
+    k = k_factors(ratings, games)
+    changes = (np.bincount(player_one, k[player_one] * difference, minlength=size)
+               - np.bincount(player_two, k[player_two] * difference, minlength=size))
+    played = np.bincount(player_one, minlength=size) + np.bincount(player_two, minlength=size)
+    return np.rint(ratings + changes).astype(np.int64), games + played
+
+
+def replay(ratings, games, period_ends, player_one, player_two, score_one):
+    """Rate rating periods one after the other
+    The ratings and the numbers of games are arrays indexed by player id, updated in place
+    after each period. Only the players of a period are read and written, so a period costs
+    the size of its games and not the number of players.
+
+    Args:
+        ratings (numpy array): rating of each player id before the first period, updated in place
+        games (numpy array): number of rated games of each player id, updated in place
+        period_ends (array): position after the last game of each period, increasing
+        player_one (numpy array): id of the first player of each game, the games being ordered by period
+        player_two (numpy array): id of the second player of each game
+        score_one (numpy array): score of the first player of each game, 0, 0.5 or 1
+
+    Yields:
+        integer: index of the rated period
+        numpy array: ids of the players of the period
+        numpy array: their ratings before the period
+        numpy array: their numbers of rated games before the period
+    """
+    start = 0
+    for period, end in enumerate(period_ends):
+        ones, twos = player_one[start:end], player_two[start:end]
+        # les joueurs de la période, et la position dans cette liste des deux joueurs de chaque partie
+        player_ids, positions = np.unique(np.concatenate((ones, twos)), return_inverse=True)
+        ratings_before, games_before = ratings[player_ids], games[player_ids]
+        ratings[player_ids], games[player_ids] = rate_period(ratings_before, games_before, positions[:end - start],
+                                                             positions[end - start:], score_one[start:end])
+        yield period, player_ids, ratings_before, games_before
+        start = end
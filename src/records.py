@@ -0,0 +1,92 @@
+"""
+This module contains the records given to the views by the models.
+
+A record holds the fields of a stored document as plain attributes,
+declared in __slots__, so building one costs a single small object.
+Records are copied and serialized field by field, without reflection.
+"""
+import json
+
+
+class Record:
+    """ Base of the records: the fields are the __slots__ of the subclass """
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for field in self.__slots__:
+            setattr(self, field, fields.get(field))
+
+    @classmethod
+    def from_document(cls, document):
+        """Build a record from a stored document
+        Fields missing in the document are None, other keys are ignored.
+
+        Args:
+            document (dictionnary): the document read in the database
+
+        Returns:
+            Record: the record
+        """
+        record = cls.__new__(cls)
+        for field in cls.__slots__:
+            setattr(record, field, document.get(field))
+        return record
+
+    @classmethod
+    def from_documents(cls, documents):
+        """Build the records of several documents
+
+        Args:
+            documents (iterable): the documents read in the database
+
+        Returns:
+            list: the records, in the order of the documents
+        """
+        return [cls.from_document(document) for document in documents]
+
+    def to_dict(self):
+        """ Return the fields as a dictionnary """
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    def copy(self):
+        """Return a copy of the record, lists of the fields are shared
+
+        Returns:
+            Record: the copy
+        """
+        record = self.__class__.__new__(self.__class__)
+        for field in self.__slots__:
+            setattr(record, field, getattr(self, field))
+        return record
+
+    __copy__ = copy
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __repr__(self):
+        return self.to_json()
+
+
+class PlayerRecord(Record):
+    """ Player, with his score and his tie-breaks when he is read from the standings of a tournament """
+    __slots__ = ("id", "firstname", "lastname", "birth_date", "gender", "elo", "tournament_score", "tiebreaks")
+
+
+class MatchRecord(Record):
+    __slots__ = ("match_id", "player_one_id", "player_two_id", "score_one", "score_two", "round_id",
+                 "tournament_id")
+
+
+class RoundRecord(Record):
+    __slots__ = ("round_id", "tournament_id", "name", "games", "bye", "beginning_date", "ending_date")
+
+
+class TournamentRecord(Record):
+    __slots__ = ("id", "name", "location", "description", "nb_rounds", "players", "game_rules", "rounds",
+                 "nb_of_played_round", "begin_date", "ending_date", "standings", "byes", "tiebreaks", "system")
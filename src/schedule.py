@@ -0,0 +1,78 @@
+"""
+This module computes all the rounds of a round-robin tournament.
+
+Like the pairing module, it does not communicate with the database: the
+model gives it the players, in the order of their seeds, and saves the
+rounds it returns when the tournament is created.
+
+The rounds follow the circle method. One player keeps his place while the
+others turn around him, and each round pairs the opposite places of the
+circle. The players turn by half the circle at each round, as in the
+Berger tables: the colors of almost every player alternate, and no player
+has more than one white game more than black ones. With an odd number of
+players, an empty place is added and its opponent is exempted. In a double
+round-robin, the second cycle plays the games of the first one with the
+colors reversed, starting from its second round.
+"""
+
+SWISS = "swiss"
+
+# Nombre de fois que deux joueurs se rencontrent, pour chaque système dont les rounds sont calculés d'avance
+SCHEDULES = {"round_robin": 1, "double_round_robin": 2}
+
+SYSTEMS = (SWISS,) + tuple(SCHEDULES)
+
+
+def schedule_length(player_count, system):
+    """Return the number of rounds of a tournament whose rounds are computed in advance
+
+    Args:
+        player_count (integer): number of players
+        system (string): system of the tournament, one of SYSTEMS
+
+    Returns:
+        integer: number of rounds, None for a swiss tournament
+    """
+    if system not in SCHEDULES:
+        return None
+    if player_count < 2:
+        return 0
+    return (player_count - 1 + player_count % 2) * SCHEDULES[system]
+
+
+def round_robin(player_ids, cycles=1):
+    """Compute every round of a round-robin tournament
+
+    Args:
+        player_ids (list): ids of the players, best seed first
+        cycles (integer, optional): number of games between two players. Defaults to 1.
+
+    Returns:
+        list: for each round, its games as (white player id, black player id)
+              and the id of the exempted player, None if every player plays
+    """
+    players = list(player_ids)
+    if len(players) < 2:
+        return []
+    if len(players) % 2:
+        players.append(None)
+    size = len(players)
+    half = size // 2
+    fixed, others = players[-1], players[:-1]
+    rounds = []
+    for number in range(size - 1):
+        ring = [others[(place + number * half) % (size - 1)] for place in range(size - 1)]
+        if fixed is None:
+            bye, games = ring[0], []
+        else:
+            # le joueur fixe change de couleur à chaque round
+            bye, games = None, [(fixed, ring[0]) if number % 2 else (ring[0], fixed)]
+        games.extend((ring[place], ring[size - 1 - place]) for place in range(1, half))
+        rounds.append((games, bye))
+    cycle = list(rounds)
+    for _ in range(1, cycles):
+        # le cycle suivant commence par son deuxième round, sinon des joueurs auraient
+        # trois fois de suite la même couleur d'un cycle à l'autre
+        cycle = [([(black, white) for white, black in games], bye) for games, bye in cycle[1:] + cycle[:1]]
+        rounds.extend(cycle)
+    return rounds
@@ -0,0 +1,497 @@
+"""
+This module serves the operations of the controller as a JSON API over HTTP.
+
+Several arbiters, or the tablets of the pairing room, can then use the
+application at the same time. The server only uses the standard library:
+
+    python main.py serve --host 127.0.0.1 --port 8000
+
+The database is only accessed by a single thread. Writes are queued and
+run one by one by the writer task, and each of them empties the cache.
+Reads are answered from an in-memory cache of the encoded responses, so
+they are served concurrently while the writer is busy. A read missing
+from the cache is computed once, even when many clients ask for it.
+Cached responses are dropped as well when another program, an arbiter
+terminal for example, writes the database. Reads never write it
+themselves, so a cached response stays valid until the next write.
+
+    GET  /players                                  all the players
+    POST /players                                  create a player
+    GET  /players/<id>                             a player
+    PUT  /players/<id>/elo                         change the elo of a player
+    GET  /players/<id>/ratings                     elo changes of a player, from the oldest
+    GET  /tournaments                              all the tournaments
+    POST /tournaments                              create a tournament
+    GET  /tournaments/<id>                         a tournament
+    GET  /tournaments/<id>/ranking                 standings of a tournament
+    PUT  /tournaments/<id>/tiebreaks               change the order of the tie-breaks of a tournament
+    GET  /tournaments/<id>/games                   games of the ongoing round
+    POST /tournaments/<id>/rounds                  generate the next round
+    POST /tournaments/<id>/rounds/<id>/results     results of the ongoing round
+    GET  /reports/<choice>                         a report of the menu 4, with the query
+                                                   parameters tournament, sorting, round, offset and limit
+"""
+import argparse
+import asyncio
+import json
+import re
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from src import importer
+from src.controller import AppController
+from src.export import report_row_to_dict
+from src.records import Record
+from src.schedule import SWISS, SYSTEMS, schedule_length
+from src.storage import ConflictError
+from src.tiebreaks import TIEBREAKS
+
+
+# Taille maximale du corps d'une requête, en octets
+MAX_BODY_SIZE = 1024 * 1024
+
+# Nombre maximal de réponses gardées en cache
+CACHE_SIZE = 1024
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    """ Error sent to the client with its status and message """
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def to_jsonable(value):
+    """ Used by json.dumps for the values it does not know """
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"{value.__class__.__name__} is not JSON serializable")
+
+
+def integer(value, name, minimum=None):
+    """Read an integer sent by the client
+
+    Args:
+        value: the value sent
+        name (string): name of the value, used in the error message
+        minimum (integer, optional): lowest accepted value. Defaults to None.
+
+    Returns:
+        integer: the value
+    """
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{name} doit être un entier")
+    if minimum is not None and number < minimum:
+        raise HTTPError(400, f"{name} doit être supérieur ou égal à {minimum}")
+    return number
+
+
+def query_value(query, name, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+
+def check_tournament(tournament_id):
+    """ Return the tournament, or a 404 error if it does not exist """
+    tournament = AppController.get_tournament(tournament_id)
+    if tournament is None:
+        raise HTTPError(404, f"le tournoi {tournament_id} n'existe pas")
+    return tournament
+
+
+def check_player(player_id):
+    """ Return the player, or a 404 error if he does not exist """
+    player = AppController.get_player(player_id)
+    if player is None:
+        raise HTTPError(404, f"le joueur {player_id} n'existe pas")
+    return player
+
+
+def tiebreak_order(value):
+    """Check the order of the tie-breaks sent by the client
+
+    Args:
+        value: the value read in the body of the request
+
+    Returns:
+        list: names of the tie-breaks
+    """
+    if not isinstance(value, list) or not value:
+        raise HTTPError(400, "tiebreaks doit être une liste de départages")
+    unknown = [name for name in value if name not in TIEBREAKS]
+    if unknown:
+        raise HTTPError(400, f"départages inconnus: {unknown}, possibles: {list(TIEBREAKS)}")
+    if len(set(value)) != len(value):
+        raise HTTPError(400, "un départage est donné deux fois")
+    return value
+
+
+def list_players(query, body):
+    return 200, AppController.get_player_info()
+
+
+def create_player(query, body):
+    attrs, reason = importer.validate_row(body)
+    if attrs is None:
+        raise HTTPError(400, reason)
+    return 201, {"id": AppController.create_player(attrs)}
+
+
+def get_player(query, body, player_id):
+    return 200, check_player(player_id)
+
+
+def set_player_elo(query, body, player_id):
+    check_player(player_id)
+    elo = integer(body.get("elo"), "elo", minimum=0)
+    AppController.set_player_elo(player_id, elo)
+    return 200, {"id": player_id, "elo": elo}
+
+
+def get_rating_history(query, body, player_id):
+    check_player(player_id)
+    return 200, AppController.get_rating_history(player_id)
+
+
+def list_tournaments(query, body):
+    # les paires déjà jouées ne sont utiles qu'au calcul des rounds
+    return 200, [{key: value for key, value in tournament.items() if key != "played_pairs"}
+                 for tournament in AppController.get_report(choice=2, choosing=True)]
+
+
+def create_tournament(query, body):
+    attrs = {}
+    for field in ("name", "location", "game_rules"):
+        attrs[field] = str(body.get(field) or "").strip()
+        if not attrs[field]:
+            raise HTTPError(400, f"{field} est obligatoire")
+    attrs["description"] = str(body.get("description") or "")
+    if not isinstance(body.get("players"), list):
+        raise HTTPError(400, "players doit être une liste d'id de joueurs")
+    attrs["players"] = [integer(player_id, "players") for player_id in body["players"]]
+    if len(set(attrs["players"])) != len(attrs["players"]):
+        raise HTTPError(400, "un joueur est inscrit deux fois")
+    if len(attrs["players"]) < 2:
+        raise HTTPError(400, "il faut au moins deux joueurs")
+    unknown = [player_id for player_id, name in AppController.get_player_names(attrs["players"]).items()
+               if name is None]
+    if unknown:
+        raise HTTPError(400, f"joueurs inexistants: {unknown}")
+    if body.get("tiebreaks") is not None:
+        attrs["tiebreaks"] = tiebreak_order(body["tiebreaks"])
+    attrs["system"] = body.get("system", SWISS)
+    if attrs["system"] not in SYSTEMS:
+        raise HTTPError(400, f"system doit valoir {', '.join(SYSTEMS)}")
+    length = schedule_length(len(attrs["players"]), attrs["system"])
+    attrs["nb_rounds"] = integer(body.get("nb_rounds", length or 4), "nb_rounds", minimum=1)
+    if length is not None and attrs["nb_rounds"] != length:
+        raise HTTPError(400, f"un tournoi {attrs['system']} de {len(attrs['players'])} joueurs "
+                             f"se joue en {length} rounds")
+    return 201, {"id": AppController.create_tournament(attrs)}
+
+
+def get_tournament(query, body, tournament_id):
+    tournament = check_tournament(tournament_id)
+    return 200, {key: value for key, value in tournament.items() if key != "played_pairs"}
+
+
+def get_ranking(query, body, tournament_id):
+    check_tournament(tournament_id)
+    return 200, AppController.get_provisional_ranking(tournament_id)
+
+
+def set_tiebreaks(query, body, tournament_id):
+    check_tournament(tournament_id)
+    AppController.set_tiebreaks(tournament_id, tiebreak_order(body.get("tiebreaks")))
+    return 200, AppController.get_provisional_ranking(tournament_id)
+
+
+def get_games(query, body, tournament_id):
+    check_tournament(tournament_id)
+    games, round_id = AppController.get_game_list(tournament_id)
+    return 200, {"round_id": round_id, "games": games}
+
+
+def generate_round(query, body, tournament_id):
+    check_tournament(tournament_id)
+    round = AppController.generate_tour(tournament_id)
+    if round is None:
+        raise HTTPError(409, "le tournoi est terminé")
+    if round is False:
+        raise HTTPError(409, "le round en cours n'a pas tous ses résultats")
+    return 201, round
+
+
+def submit_results(query, body, tournament_id, round_id):
+    check_tournament(tournament_id)
+    if round_id != AppController.get_game_list(tournament_id)[1]:
+        raise HTTPError(409, f"le round {round_id} n'est pas le round en cours du tournoi")
+    if not isinstance(body.get("results"), list):
+        raise HTTPError(400, "results doit être une liste de résultats")
+    results = []
+    for result in body["results"]:
+        if not isinstance(result, dict):
+            raise HTTPError(400, "chaque résultat doit contenir match_id, player_one_score et player_two_score")
+        try:
+            results.append((int(result["match_id"]),
+                            float(result["player_one_score"]),
+                            float(result["player_two_score"])))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPError(400, "chaque résultat doit contenir match_id, player_one_score et player_two_score")
+    errors, missing = AppController.submit_round_results(tournament_id, round_id, results)
+    if errors:
+        raise HTTPError(400, errors)
+    return 200, {"saved": len(results), "missing": missing}
+
+
+def get_report(query, body, choice):
+    if choice not in range(1, 6):
+        raise HTTPError(404, "les rapports vont de 1 à 5")
+    tournament_id = query_value(query, "tournament")
+    if choice > 2:
+        if tournament_id is None:
+            raise HTTPError(400, "le paramètre tournament est obligatoire pour ce rapport")
+        tournament_id = integer(tournament_id, "tournament")
+        check_tournament(tournament_id)
+    sorting = query_value(query, "sorting", "c")
+    if sorting not in ("a", "c"):
+        raise HTTPError(400, "sorting doit valoir 'a' ou 'c'")
+    round_choice = integer(query_value(query, "round", 0), "round")
+    offset = integer(query_value(query, "offset", 0), "offset", minimum=0)
+    limit = query_value(query, "limit")
+    limit = None if limit is None else integer(limit, "limit", minimum=0)
+    rows = AppController.get_report(choice, tournament_id, sorting, round_choice, offset=offset, limit=limit)
+    return 200, [report_row_to_dict(row) for row in rows]
+
+
+# méthode, chemin, fonction et True si la fonction écrit dans la base
+ROUTES = [(method, re.compile(f"^{path}$"), handler, writes) for method, path, handler, writes in (
+    ("GET", r"/players", list_players, False),
+    ("POST", r"/players", create_player, True),
+    ("GET", r"/players/(\d+)", get_player, False),
+    ("PUT", r"/players/(\d+)/elo", set_player_elo, True),
+    ("GET", r"/players/(\d+)/ratings", get_rating_history, False),
+    ("GET", r"/tournaments", list_tournaments, False),
+    ("POST", r"/tournaments", create_tournament, True),
+    ("GET", r"/tournaments/(\d+)", get_tournament, False),
+    ("GET", r"/tournaments/(\d+)/ranking", get_ranking, False),
+    ("PUT", r"/tournaments/(\d+)/tiebreaks", set_tiebreaks, True),
+    ("GET", r"/tournaments/(\d+)/games", get_games, False),
+    ("POST", r"/tournaments/(\d+)/rounds", generate_round, True),
+    ("POST", r"/tournaments/(\d+)/rounds/(\d+)/results", submit_results, True),
+    ("GET", r"/reports/(\d+)", get_report, False),
+)]
+
+
+def find_route(method, path):
+    """Find the function answering a request
+
+    Args:
+        method (string): method of the request
+        path (string): path of the request, without its query
+
+    Returns:
+        function: the function answering the request
+        list: the integers read in the path
+        boolean: True if the function writes in the database
+    """
+    allowed = False
+    for route_method, pattern, handler, writes in ROUTES:
+        match = pattern.match(path)
+        if match is None:
+            continue
+        if route_method == method:
+            return handler, [int(group) for group in match.groups()], writes
+        allowed = True
+    if allowed:
+        raise HTTPError(405, f"méthode {method} non autorisée pour {path}")
+    raise HTTPError(404, f"{path} n'existe pas")
+
+
+def encode(status, payload):
+    """ Return the status and the body of a response, encoded in json """
+    return status, json.dumps(payload, ensure_ascii=False, default=to_jsonable).encode()
+
+
+def answer(handler, query, body, arguments):
+    """Run a route function and encode its answer, errors included
+    Called in the thread of the database.
+
+    Returns:
+        integer: status of the response
+        bytes: body of the response
+    """
+    try:
+        return encode(*handler(query, body, *arguments))
+    except HTTPError as error:
+        return encode(error.status, {"error": error.message})
+    except ConflictError:
+        return encode(409, {"error": "la base a été modifiée par un autre programme, la requête peut être renvoyée"})
+
+
+class ChessServer:
+    """ HTTP server of the JSON API, with its writer task and its cache of reads """
+    def __init__(self, host="127.0.0.1", port=8000):
+        self.host = host
+        self.port = port
+        # un seul thread accède à la base: TinyDB et la connexion SQLite ne sont pas partagés entre threads
+        self._database = ThreadPoolExecutor(max_workers=1, thread_name_prefix="database")
+        self._cache = {}
+        self._writes = None
+
+    async def _writer(self):
+        """ Run the queued writes one by one, then empty the cache of reads """
+        loop = asyncio.get_running_loop()
+        while True:
+            handler, query, body, arguments, future = await self._writes.get()
+            try:
+                response = await loop.run_in_executor(self._database, answer, handler, query, body, arguments)
+            except Exception as error:
+                future.set_exception(error)
+            else:
+                future.set_result(response)
+            finally:
+                # les lectures soumises avant la fin de l'écriture ne doivent plus être servies
+                self._cache.clear()
+
+    async def write(self, handler, query, body, arguments):
+        future = asyncio.get_running_loop().create_future()
+        await self._writes.put((handler, query, body, arguments, future))
+        return await future
+
+    async def read(self, handler, query, body, arguments, key):
+        """Answer a read from the cache, computing it in the thread of the database if needed
+
+        Args:
+            key (tuple): path and query of the request
+
+        Returns:
+            integer: status of the response
+            bytes: body of the response
+        """
+        # la base a pu être écrite par un autre programme, les réponses lues avant sont alors périmées
+        version = AppController.database_version()
+        version_read, task = self._cache.get(key, (None, None))
+        if task is None or version_read != version:
+            loop = asyncio.get_running_loop()
+            task = loop.run_in_executor(self._database, answer, handler, query, body, arguments)
+            self._cache.pop(key, None)
+            if len(self._cache) >= CACHE_SIZE:
+                # on oublie la réponse la plus ancienne
+                del self._cache[next(iter(self._cache))]
+            self._cache[key] = (version, task)
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            if self._cache.get(key, (None, None))[1] is task:
+                del self._cache[key]
+            raise
+
+    async def dispatch(self, method, target, body):
+        """Answer a request
+
+        Args:
+            method (string): method of the request
+            target (string): path and query of the request
+            body (bytes): body of the request
+
+        Returns:
+            integer: status of the response
+            bytes: body of the response
+        """
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        handler, arguments, writes = find_route(method, path)
+        query = parse_qs(url.query)
+        if not writes:
+            return await self.read(handler, query, None, arguments, (path, url.query))
+        try:
+            body = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "le corps de la requête n'est pas du json valide")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "le corps de la requête doit être un objet json")
+        return await self.write(handler, query, body, arguments)
+
+    async def handle_connection(self, reader, writer):
+        """ Answer the requests of a connection, which is kept open between requests """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    keep_alive = keep_alive and version == "HTTP/1.1"
+                    length = integer(headers.get("content-length", 0), "Content-Length", minimum=0)
+                    if length > MAX_BODY_SIZE:
+                        keep_alive = False
+                        raise HTTPError(413, "le corps de la requête est trop grand")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(method, target, body)
+                except HTTPError as error:
+                    status, payload = encode(error.status, {"error": error.message})
+                except ValueError:
+                    keep_alive = False
+                    status, payload = encode(400, {"error": "requête illisible"})
+                except asyncio.IncompleteReadError:
+                    break
+                except Exception as error:
+                    status, payload = encode(500, {"error": f"{error.__class__.__name__}: {error}"})
+                writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                             f"Content-Type: application/json; charset=utf-8\r\n"
+                             f"Content-Length: {len(payload)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        """ Start the writer task and answer the connections until the server is stopped """
+        self._writes = asyncio.Queue()
+        writer_task = asyncio.create_task(self._writer())
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port, backlog=1024)
+        print(f"Serveur démarré sur http://{self.host}:{self.port} (Ctrl+C pour l'arrêter)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            writer_task.cancel()
+            self._database.shutdown(wait=True)
+            AppController.close_database()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Sert l'application en JSON sur HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(ChessServer(args.host, args.port).serve())
+    except KeyboardInterrupt:
+        print("Serveur arrêté.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Settings of the application.
+They can be changed with environment variables.
+"""
+import os
+
+# Moteur de base de données: "tinydb" (fichier json) ou "sqlite"
+DB_ENGINE = os.environ.get("CHESS_DB_ENGINE", "tinydb")
+
+# Stockage du fichier json avec le moteur tinydb: "journal" ou "json"
+DB_STORAGE = os.environ.get("CHESS_DB_STORAGE", "journal")
+
+JSON_DB_PATH = os.environ.get("CHESS_JSON_DB_PATH", "db.json")
+
+SQLITE_DB_PATH = os.environ.get("CHESS_SQLITE_DB_PATH", "db.sqlite3")
+
+# Mesure des accès à la base par opération (voir src/instrumentation.py): "1" pour l'activer
+PROFILE = os.environ.get("CHESS_PROFILE", "") not in ("", "0")
+
+# Fichier json recevant les mesures à la sortie, sinon elles sont affichées
+PROFILE_OUTPUT = os.environ.get("CHESS_PROFILE_OUTPUT") or None
+
+# Opération dont le premier appel est profilé, par exemple "AppController.generate_tour:tracemalloc"
+PROFILE_CAPTURE = os.environ.get("CHESS_PROFILE_CAPTURE") or None
+
+# Calcul automatique des elo quand tous les matchs d'un round ont un résultat: "0" pour le désactiver
+AUTO_RATING = os.environ.get("CHESS_AUTO_RATING", "1") != "0"
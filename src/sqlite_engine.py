@@ -0,0 +1,450 @@
+"""
+This module stores the tables of the models in a SQLite database.
+
+It offers the same interface as the indexed TinyDB database of the models
+module, so the model classes work the same way with both engines.
+Each table is a real SQLite table: the document id is the primary key,
+the key fields and the sorted fields of the table have their own indexed
+column and the whole document is kept as json in the 'document' column.
+
+An existing db.json can be copied into a SQLite file with:
+
+    python -m src.sqlite_engine db.json db.sqlite3
+"""
+import argparse
+import json
+import os
+import sqlite3
+
+from contextlib import contextmanager
+from tinydb.table import Document
+
+from src.storage import ConflictError, JournalStorage
+
+
+class SQLiteTable:
+    """ Table of the SQLite database, with the lookups of the TinyDB IndexedTable """
+    def __init__(self, database, name, key_fields, sorted_fields=()):
+        """
+        Args:
+            database (SQLiteDatabase): database of the table
+            name (string): name of the table
+            key_fields (tuple): fields having an indexed column
+            sorted_fields (tuple, optional): fields whose documents are read in order. Defaults to ().
+        """
+        self.database = database
+        self.name = name
+        self.sorted_fields = sorted_fields
+        # les champs triés ont aussi leur colonne, indexée sans tenir compte de la casse
+        self.key_fields = key_fields + tuple(field for field in sorted_fields if field not in key_fields)
+        columns = "".join(f', "{field}"' for field in self.key_fields)
+        with database.transaction():
+            database.connection.execute(
+                f'CREATE TABLE IF NOT EXISTS "{name}" (doc_id INTEGER PRIMARY KEY{columns}, document TEXT NOT NULL)')
+            existing = {row[1] for row in database.connection.execute(f'PRAGMA table_info("{name}")')}
+            for field in self.key_fields:
+                if field not in existing:
+                    # champ indexé ajouté après la création de la table: on remplit sa colonne
+                    database.connection.execute(f'ALTER TABLE "{name}" ADD COLUMN "{field}"')
+                    database.connection.execute(
+                        f'UPDATE "{name}" SET "{field}" = json_extract(document, ?)', (f'$."{field}"',))
+            for field in key_fields:
+                database.connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{name}_{field}" ON "{name}" ("{field}")')
+            for field in sorted_fields:
+                # les valeurs manquantes sont rangées après les autres, comme dans les index de TinyDB
+                database.connection.execute(f'DROP INDEX IF EXISTS "{name}_{field}_nocase"')
+                database.connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{name}_{field}_nulls_last" '
+                    f'ON "{name}" ("{field}" IS NULL, "{field}" COLLATE NOCASE)')
+
+    def _row(self, document):
+        """Return the values of the key columns and of the document column"""
+        return [document.get(field) for field in self.key_fields] + [json.dumps(document)]
+
+    def _select(self, keys):
+        """Run a select on the documents whose fields are equal to the given values
+
+        Args:
+            keys (dictionnary): field=value pairs the documents must match
+
+        Returns:
+            list: matching documents
+        """
+        conditions = [f'"{field}" = ?' for field in keys if field in self.key_fields]
+        sql = f'SELECT doc_id, document FROM "{self.name}"'
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        parameters = [value for field, value in keys.items() if field in self.key_fields]
+        documents = []
+        for doc_id, content in self.database.connection.execute(sql + " ORDER BY doc_id", parameters):
+            document = json.loads(content)
+            if all(document.get(field) == value for field, value in keys.items()):
+                documents.append(Document(document, doc_id))
+        return documents
+
+    def insert(self, document):
+        """Insert a document
+
+        Args:
+            document (dictionnary): the document
+
+        Returns:
+            integer: id of the document
+        """
+        placeholders = ", ".join("?" * (len(self.key_fields) + 1))
+        columns = "".join(f'"{field}", ' for field in self.key_fields)
+        with self.database.transaction():
+            cursor = self.database.connection.execute(
+                f'INSERT INTO "{self.name}" ({columns}document) VALUES ({placeholders})', self._row(document))
+        return cursor.lastrowid
+
+    def insert_multiple(self, documents, doc_ids=None):
+        """Insert documents in a single statement
+
+        Args:
+            documents (iterable): the documents
+            doc_ids (iterable, optional): ids to give to the documents. Defaults to None.
+
+        Returns:
+            list: ids of the documents
+        """
+        columns = "".join(f'"{field}", ' for field in self.key_fields)
+        placeholders = ", ".join("?" * (len(self.key_fields) + 1))
+        rows = (self._row(document) for document in documents)
+        if doc_ids is not None:
+            columns = "doc_id, " + columns
+            placeholders = "?, " + placeholders
+        with self.database.transaction():
+            # sans id imposé, SQLite donne aux lignes les ids qui suivent le plus grand existant
+            first_id = self.database.connection.execute(
+                f'SELECT COALESCE(MAX(doc_id), 0) + 1 FROM "{self.name}"').fetchone()[0]
+            if doc_ids is not None:
+                doc_ids = list(doc_ids)
+                rows = ([doc_id] + row for doc_id, row in zip(doc_ids, rows))
+            cursor = self.database.connection.executemany(
+                f'INSERT INTO "{self.name}" ({columns}document) VALUES ({placeholders})', rows)
+        return doc_ids if doc_ids is not None else list(range(first_id, first_id + cursor.rowcount))
+
+    def all(self):
+        return self._select({})
+
+    def __iter__(self):
+        for doc_id, content in self.database.connection.execute(
+                f'SELECT doc_id, document FROM "{self.name}" ORDER BY doc_id'):
+            yield Document(json.loads(content), doc_id)
+
+    def rows(self, *fields):
+        """Yield the id and some fields of every document, without decoding the whole documents
+        For the computations going through a whole table.
+
+        Args:
+            fields: names of the fields, a missing field gives None
+
+        Yields:
+            tuple: id of the document then the value of each field
+        """
+        # les champs indexés sont lus dans leur colonne, les autres extraits par SQLite, suivis d'un indicateur:
+        # seules les listes et les dictionnaires, rendus en json, sont décodés en Python
+        columns = "".join(f', "{field}"' if field in self.key_fields
+                          else ", json_extract(document, ?), json_type(document, ?) IN ('array', 'object')"
+                          for field in fields)
+        paths = [path for field in fields if field not in self.key_fields for path in [f'$."{field}"'] * 2]
+        for row in self.database.connection.execute(f'SELECT doc_id{columns} FROM "{self.name}" ORDER BY doc_id',
+                                                    paths):
+            if not paths:
+                yield row
+                continue
+            values = [row[0]]
+            position = 1
+            for field in fields:
+                if field in self.key_fields:
+                    values.append(row[position])
+                    position += 1
+                else:
+                    values.append(json.loads(row[position]) if row[position + 1] else row[position])
+                    position += 2
+            yield tuple(values)
+
+    def sorted_by(self, field, reverse=False, offset=0, limit=None):
+        """Yield a page of the documents in the order of a field
+        Sorted fields are read from their index, other fields from the json document.
+        Missing values come last, or first in the decreasing order, as with TinyDB.
+
+        Args:
+            field (string): the field giving the order
+            reverse (boolean, optional): True for the decreasing order. Defaults to False.
+            offset (integer, optional): number of documents to skip. Defaults to 0.
+            limit (integer, optional): maximum number of documents. Defaults to None, for all of them.
+
+        Yields:
+            dictionnary: the documents of the page
+        """
+        order = "DESC" if reverse else "ASC"
+        column = f'"{field}"' if field in self.key_fields else f"json_extract(document, '$.\"{field}\"')"
+        cursor = self.database.connection.execute(
+            f'SELECT doc_id, document FROM "{self.name}" '
+            f'ORDER BY {column} IS NULL {order}, {column} COLLATE NOCASE {order}, doc_id {order} LIMIT ? OFFSET ?',
+            (-1 if limit is None else limit, offset))
+        for doc_id, content in cursor:
+            yield Document(json.loads(content), doc_id)
+
+    def search_by(self, **keys):
+        """Return the documents whose fields are equal to the given values
+
+        Args:
+            keys: field=value pairs the documents must match
+
+        Returns:
+            list: matching documents
+        """
+        return self._select(keys)
+
+    def get_by(self, **keys):
+        """Return the first document whose fields are equal to the given values
+
+        Args:
+            keys: field=value pairs the document must match
+
+        Returns:
+            dictionnary: the document, None if there is none
+        """
+        documents = self._select(keys)
+        return documents[0] if documents else None
+
+    def update(self, fields, doc_ids):
+        """Update documents
+
+        Args:
+            fields (dictionnary or callable): the fields to update or a tinydb operation
+            doc_ids (list): ids of the documents to update
+
+        Returns:
+            list: ids of the updated documents
+        """
+        assignments = "".join(f'"{field}" = ?, ' for field in self.key_fields)
+        with self.database.transaction():
+            for doc_id in doc_ids:
+                row = self.database.connection.execute(
+                    f'SELECT document FROM "{self.name}" WHERE doc_id = ?', (doc_id,)).fetchone()
+                document = json.loads(row[0])
+                if callable(fields):
+                    fields(document)
+                else:
+                    document.update(fields)
+                self.database.connection.execute(
+                    f'UPDATE "{self.name}" SET {assignments}document = ? WHERE doc_id = ?',
+                    self._row(document) + [doc_id])
+        return list(doc_ids)
+
+    def update_many(self, updates):
+        """Update several documents at once, each with its own fields
+
+        Args:
+            updates (dictionnary): fields to update of each doc_id
+
+        Returns:
+            list: ids of the updated documents
+        """
+        doc_ids = list(updates)
+        assignments = "".join(f'"{field}" = ?, ' for field in self.key_fields)
+        rows = []
+        with self.database.transaction():
+            # les documents sont lus par paquets, sous la limite de paramètres de SQLite
+            for start in range(0, len(doc_ids), 500):
+                chunk = doc_ids[start:start + 500]
+                for doc_id, content in self.database.connection.execute(
+                        f'SELECT doc_id, document FROM "{self.name}" WHERE doc_id IN ({", ".join("?" * len(chunk))})',
+                        chunk):
+                    document = json.loads(content)
+                    document.update(updates[doc_id])
+                    rows.append(self._row(document) + [doc_id])
+            self.database.connection.executemany(
+                f'UPDATE "{self.name}" SET {assignments}document = ? WHERE doc_id = ?', rows)
+        return doc_ids
+
+    def update_by(self, fields, **keys):
+        """Update the documents whose fields are equal to the given values
+
+        Args:
+            fields (dictionnary or callable): the fields to update or a tinydb operation
+            keys: field=value pairs the documents must match
+
+        Returns:
+            list: ids of the updated documents
+        """
+        return self.update(fields, [document.doc_id for document in self._select(keys)])
+
+    def remove(self, doc_ids):
+        """Remove documents
+
+        Args:
+            doc_ids (list): ids of the documents to remove
+
+        Returns:
+            list: ids of the removed documents
+        """
+        doc_ids = list(doc_ids)
+        with self.database.transaction():
+            self.database.connection.executemany(f'DELETE FROM "{self.name}" WHERE doc_id = ?',
+                                                 ((doc_id,) for doc_id in doc_ids))
+        return doc_ids
+
+    def __len__(self):
+        return self.database.connection.execute(f'SELECT COUNT(*) FROM "{self.name}"').fetchone()[0]
+
+
+class SQLiteDatabase:
+    """ SQLite database giving access to its tables like the TinyDB database """
+    def __init__(self, path, key_fields, sorted_fields=None):
+        """
+        Args:
+            path (string): path of the SQLite file
+            key_fields (dictionnary): fields having an indexed column, for each table
+            sorted_fields (dictionnary, optional): fields whose documents are read in order, for each table.
+                                                   Defaults to None.
+        """
+        self.path = path
+        self.key_fields = key_fields
+        self.sorted_fields = sorted_fields or {}
+        # le serveur HTTP utilise la connexion depuis un seul thread, différent de celui qui l'a ouverte
+        self.connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._tables = {}
+        self._depth = 0
+        # les tables connues sont créées à l'ouverture: lire une table ne doit jamais écrire le fichier
+        for name in key_fields:
+            self.table(name)
+
+    def table(self, name):
+        """Return the table, creating it if needed
+
+        Args:
+            name (string): name of the table
+
+        Returns:
+            SQLiteTable: the table
+        """
+        if name not in self._tables:
+            self._tables[name] = SQLiteTable(self, name, self.key_fields.get(name, ()),
+                                             self.sorted_fields.get(name, ()))
+        return self._tables[name]
+
+    @contextmanager
+    def transaction(self, exclusive=False):
+        """Run the block in a SQLite transaction, which can be nested
+        The transaction is committed when the outermost block ends, or rolled back on exception.
+        If another program holds the lock of the file, ConflictError is raised, as with db.json.
+
+        Args:
+            exclusive (boolean, optional): True to take the write lock of the file at once
+                                           instead of at the first write. Defaults to False.
+        """
+        if not self._depth:
+            self.connection.execute("BEGIN IMMEDIATE" if exclusive else "BEGIN")
+        self._depth += 1
+        try:
+            yield self
+            if self._depth == 1:
+                self.connection.execute("COMMIT")
+        except BaseException as error:
+            self._depth -= 1
+            if not self._depth:
+                self.connection.execute("ROLLBACK")
+                # un autre programme écrit la base: la transaction ne peut pas prendre le verrou
+                # d'écriture sans attendre un verrou qu'il attend lui-même, elle peut être refaite
+                if isinstance(error, sqlite3.OperationalError) and "locked" in str(error):
+                    raise ConflictError(f"{self.path} est écrit par un autre programme") from error
+            raise
+        self._depth -= 1
+
+    def compact(self):
+        """Rebuild the SQLite file to give back the space of removed data"""
+        self.connection.execute("VACUUM")
+
+    def version(self):
+        """Return a value which changes when the SQLite file is written
+        It is read from the file itself, so it can be called from any thread.
+        """
+        status = os.stat(self.path)
+        return status.st_mtime_ns, status.st_size
+
+    def close(self):
+        self.connection.close()
+
+
+def migrate_json_to_sqlite(json_path, sqlite_path, key_fields, sorted_fields=None, replace=False):
+    """Copy every table of a TinyDB json database into a SQLite database
+    Documents keep their ids. The rows of each table are streamed into
+    a single insert statement, all tables in one transaction.
+
+    db.json and its journal are parsed whole, as when the program opens the database:
+    the copy needs as much memory, and each table is freed once copied.
+    The SQLite database is written in a temporary file which only replaces
+    sqlite_path at the end, so a failed copy leaves nothing behind.
+
+    Args:
+        json_path (string): path of db.json (its journal is replayed if there is one)
+        sqlite_path (string): path of the SQLite file
+        key_fields (dictionnary): fields having an indexed column, for each table
+        sorted_fields (dictionnary, optional): fields whose documents are read in order, for each table.
+                                               Defaults to None.
+        replace (boolean, optional): True to replace an existing SQLite file. Defaults to False.
+
+    Raises:
+        FileExistsError: if the SQLite file already exists and replace is False
+
+    Returns:
+        dictionnary: number of copied documents of each table
+    """
+    if os.path.exists(sqlite_path) and not replace:
+        raise FileExistsError(f"{sqlite_path} existe déjà")
+    storage = JournalStorage(json_path)
+    # le verrou d'une base utilisée par d'autres programmes doit rester en place
+    lock_existed = os.path.exists(storage.lock.path)
+    try:
+        data = storage.read() or {}
+    finally:
+        storage.close()
+        if not lock_existed and os.path.exists(storage.lock.path):
+            os.remove(storage.lock.path)
+    temporary_path = sqlite_path + ".tmp"
+    if os.path.exists(temporary_path):
+        os.remove(temporary_path)
+    database = SQLiteDatabase(temporary_path, key_fields, sorted_fields)
+    copied = {}
+    try:
+        with database.transaction():
+            while data:
+                name = next(iter(data))
+                documents = data.pop(name)
+                database.table(name).insert_multiple(documents.values(),
+                                                     doc_ids=(int(doc_id) for doc_id in documents))
+                copied[name] = len(documents)
+    except BaseException:
+        database.close()
+        os.remove(temporary_path)
+        raise
+    database.close()
+    os.replace(temporary_path, sqlite_path)
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copie une base db.json dans une base SQLite")
+    parser.add_argument("json_path")
+    parser.add_argument("sqlite_path")
+    parser.add_argument("--replace", action="store_true", help="remplace la base SQLite si elle existe déjà")
+    args = parser.parse_args()
+    from src.models import INDEXED_FIELDS, SORTED_FIELDS
+
+    try:
+        copied = migrate_json_to_sqlite(args.json_path, args.sqlite_path, INDEXED_FIELDS, SORTED_FIELDS,
+                                        replace=args.replace)
+    except FileExistsError as error:
+        parser.error(f"{error}, --replace pour la remplacer")
+    for name, count in copied.items():
+        print(f"{name}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,488 @@
+"""
+This module contains the storages used by the TinyDB database of the models.
+
+TinyDB storages read and write the whole database at once. The default
+JSONStorage parses the file again at every read and rewrites it at every
+write, so the storages below keep the parsed database in memory and only
+touch the file when needed.
+
+Several programs can share the same file. The files are read under a
+shared lock and written under an exclusive one, taken on a lock file next
+to the database (fcntl, so only where it exists). The lock file also holds
+the version of the database, incremented by each write: a program notices
+from it that another one wrote the database and reloads it at its next
+read. A write based on data which has been changed in the meantime is not
+saved and raises ConflictError, so it can be done again on the new data.
+"""
+import json
+import mmap
+import os
+import tempfile
+import threading
+
+from contextlib import contextmanager
+from tinydb.storages import Storage
+
+try:
+    import fcntl
+except ImportError:  # Windows: pas de verrou entre programmes, les versions sont tout de même vérifiées
+    fcntl = None
+
+
+class ConflictError(Exception):
+    """ The database was written by another program since it was read.
+    Nothing has been saved: the action can be done again on the reloaded data.
+    """
+
+
+class FileLock:
+    """ Advisory lock shared by the programs and the threads using a database
+    The lock can be taken again by the thread holding it. The file also
+    holds the version of the database, written as a fixed-width number.
+    The file is mapped in memory, so reading the version costs no system call.
+    """
+    version_width = 20  # chiffres
+
+    def __init__(self, path):
+        """
+        Args:
+            path (string): path of the lock file, created if needed
+        """
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._descriptor = None
+        self._map = None
+        self._depth = 0
+        self._exclusive = False
+
+    def _open(self):
+        """Open and map the lock file, writing the version 0 in a new file"""
+        with self._thread_lock:
+            if self._descriptor is not None:
+                return
+            descriptor = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(descriptor, fcntl.LOCK_EX)
+            if os.fstat(descriptor).st_size < self.version_width:
+                os.write(descriptor, b"0" * self.version_width)
+            if fcntl is not None:
+                fcntl.flock(descriptor, fcntl.LOCK_UN)
+            self._map = mmap.mmap(descriptor, self.version_width)
+            self._descriptor = descriptor
+
+    @contextmanager
+    def hold(self, exclusive=False):
+        """Hold the lock during the block
+
+        Args:
+            exclusive (boolean, optional): True to write, False to read. Defaults to False.
+        """
+        with self._thread_lock:
+            if not self._depth:
+                self._open()
+                if fcntl is not None:
+                    fcntl.flock(self._descriptor, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                self._exclusive = exclusive
+            elif exclusive and not self._exclusive:
+                raise RuntimeError("a shared lock can not become exclusive")
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if not self._depth and fcntl is not None:
+                    fcntl.flock(self._descriptor, fcntl.LOCK_UN)
+
+    def version(self):
+        """Return the version of the database, 0 if it has never been written
+
+        Returns:
+            integer: the version
+        """
+        if self._map is None:
+            self._open()
+        return int(self._map[:self.version_width])
+
+    def set_version(self, version):
+        """Write the version of the database, the exclusive lock must be held
+
+        Args:
+            version (integer): the new version
+        """
+        if self._map is None:
+            self._open()
+        self._map[:self.version_width] = f"{version:0{self.version_width}d}".encode()
+
+    def close(self):
+        with self._thread_lock:
+            if self._descriptor is not None:
+                self._map.close()
+                os.close(self._descriptor)
+                self._map = None
+                self._descriptor = None
+
+
+class CachedJSONStorage(Storage):
+    """ JSON file storage keeping the parsed database in memory
+    The file is parsed at the first read only.
+    Writes made inside a transaction are kept in memory and written
+    once, when the transaction is over.
+    The data is parsed again when another program has written the file.
+    """
+    def __init__(self, path, encoding=None, **kwargs):
+        """
+        Args:
+            path (string): path of the json file
+            encoding (string, optional): encoding of the file. Defaults to None.
+            kwargs: arguments given to json.dump
+        """
+        super().__init__()
+        self.path = path
+        self.encoding = encoding
+        self.kwargs = kwargs
+        self.generation = 0  # incrémenté quand les données en mémoire sont abandonnées
+        self.lock = FileLock(path + ".lock")
+        self._version = None  # version de la base lue en mémoire
+        self._data = None
+        self._loaded = False
+        self._depth = 0
+        self._dirty = False
+
+    def read(self):
+        """Return the database, parsing the file only the first time
+
+        Returns:
+            dictionnary: all tables of the database, None if the file is empty
+        """
+        if not self._loaded:
+            self._data = self._load()
+            self._loaded = True
+        return self._data
+
+    def write(self, data):
+        """Keep the database in memory and write it in the file
+        unless a transaction is in progress
+
+        Args:
+            data (dictionnary): all tables of the database
+        """
+        self._data = data
+        self._loaded = True
+        if self._depth:
+            self._dirty = True
+            return
+        self._commit()
+
+    def refresh(self):
+        """Forget the data in memory if another program has written the database since it was read
+        It is parsed again at the next read. Inside a transaction nothing is done:
+        its writes are checked when it ends.
+        """
+        if self._loaded and not self._depth and self.lock.version() != self._version:
+            self.rollback()
+
+    def _load(self):
+        """Parse the json file and remember the version of the database it holds
+
+        Returns:
+            dictionnary: all tables of the database, None if the file is empty or missing
+        """
+        with self.lock.hold():
+            self._version = self.lock.version()
+            return self._read_file()
+
+    def _read_file(self):
+        """Parse the json file
+
+        Returns:
+            dictionnary: all tables of the database, None if the file is empty or missing
+        """
+        try:
+            with open(self.path, encoding=self.encoding) as handle:
+                content = handle.read()
+        except FileNotFoundError:
+            return None
+        if not content:
+            return None
+        return json.loads(content)
+
+    def _commit(self):
+        """Save the data in memory, unless another program has written the database since it was read
+        The version is incremented before the files are written, so a write stopped
+        halfway makes the other programs reload the files.
+        """
+        with self.lock.hold(exclusive=True):
+            version = self.lock.version()
+            if self._version is not None and version != self._version:
+                self.rollback()
+                raise ConflictError(f"{self.path} a été modifié par un autre programme")
+            self._version = version + 1
+            self.lock.set_version(self._version)
+            self._flush()
+
+    def _flush(self):
+        """Write the database in the json file"""
+        self._write_file(self._data)
+        self._dirty = False
+
+    def _write_file(self, data):
+        """Write data in a temporary file then rename it over the json file
+        so the file is never left half written.
+
+        Args:
+            data (dictionnary): all tables of the database
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temporary_path = tempfile.mkstemp(dir=directory, prefix=".db-", suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w", encoding=self.encoding) as temporary_file:
+                temporary_file.write(json.dumps(data, **self.kwargs))
+                temporary_file.flush()
+                os.fsync(temporary_file.fileno())
+            if os.path.exists(self.path):
+                os.chmod(temporary_path, os.stat(self.path).st_mode)
+            os.replace(temporary_path, self.path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+    def mark_changed(self, table, doc_ids):
+        """Called by the tables with the documents changed by a write.
+        The whole file is written anyway, so nothing is done here.
+
+        Args:
+            table (string): name of the table
+            doc_ids (list): ids of the changed documents, None if the whole table changed
+        """
+        pass
+
+    def compact(self):
+        """Nothing to compact: the file always holds the whole database"""
+        pass
+
+    def rollback(self):
+        """Forget the changes that have not been written in the file"""
+        self._data = None
+        self._loaded = False
+        self._dirty = False
+        self.generation += 1
+
+    @contextmanager
+    def transaction(self, exclusive=False):
+        """Group all the writes made in the block into a single file write
+        Transactions can be nested, the file is written when the outermost one ends.
+        If an exception is raised, nothing is written and the changes are forgotten.
+        The outermost transaction starts from the last version of the database,
+        and raises ConflictError if another program wrote it before the end.
+
+        Args:
+            exclusive (boolean, optional): True to hold the exclusive lock during the whole
+                                           transaction, so no other program can write the
+                                           database before it ends. Defaults to False.
+        """
+        if exclusive and not self._depth:
+            with self.lock.hold(exclusive=True):
+                with self.transaction() as storage:
+                    yield storage
+            return
+        if not self._depth:
+            self.refresh()
+        self._depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._depth -= 1
+            if not self._depth:
+                self.rollback()
+            raise
+        self._depth -= 1
+        if not self._depth and self._dirty:
+            try:
+                self._commit()
+            except BaseException:
+                self.rollback()
+                raise
+
+    def close(self):
+        self.lock.close()
+
+
+class JournalStorage(CachedJSONStorage):
+    """ Storage appending each change to a journal instead of rewriting the json file
+    The json file is a snapshot of the database and the journal, next to it,
+    lists in json-lines the documents written or removed since the snapshot.
+    Opening the database replays the journal over the snapshot.
+
+    When the journal is bigger than compaction_threshold it is merged into the
+    snapshot by a background thread, which only works on the files: the journal
+    is first sealed and a new one receives the next writes. The merge holds
+    the exclusive lock, as it may be done while other programs read the files.
+    """
+    compaction_threshold = 8 * 1024 * 1024  # octets
+
+    def __init__(self, path, encoding=None, **kwargs):
+        """
+        Args:
+            path (string): path of the json snapshot. The journal is path + '.journal'
+            encoding (string, optional): encoding of the files. Defaults to None.
+            kwargs: arguments given to json.dump
+        """
+        super().__init__(path, encoding, **kwargs)
+        self.journal_path = path + ".journal"
+        self.sealed_path = path + ".journal.sealed"
+        self._changes = {}  # (table, doc_id) des documents à écrire dans le journal
+        self._full_write = False
+        self._writes = 0
+        self._marks = 0
+        self._compaction = None
+
+    def write(self, data):
+        self._writes += 1
+        super().write(data)
+
+    def mark_changed(self, table, doc_ids):
+        """Remember the documents to append to the journal at the next flush
+
+        Args:
+            table (string): name of the table
+            doc_ids (list): ids of the changed documents, None if the whole table changed
+        """
+        self._marks += 1
+        if doc_ids is None:
+            self._full_write = True
+            return
+        for doc_id in doc_ids:
+            self._changes[(table, str(doc_id))] = True
+
+    def _load(self):
+        """Read the snapshot and replay the sealed and current journals over it
+
+        Returns:
+            dictionnary: all tables of the database, None if there is nothing saved
+        """
+        with self.lock.hold():
+            data = super()._load()
+            for path in (self.sealed_path, self.journal_path):
+                data = self._replay(path, data)
+        return data
+
+    def _replay(self, path, data):
+        """Apply the records of a journal file to the data
+
+        Args:
+            path (string): path of the journal
+            data (dictionnary): tables to update, can be None
+
+        Returns:
+            dictionnary: the updated tables
+        """
+        try:
+            handle = open(path, encoding=self.encoding)
+        except FileNotFoundError:
+            return data
+        with handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:  # dernière ligne incomplète après un arrêt brutal
+                    break
+                if data is None:
+                    data = {}
+                table = data.setdefault(record["table"], {})
+                if "document" in record:
+                    table[record["id"]] = record["document"]
+                else:
+                    table.pop(record["id"], None)
+        return data
+
+    def _flush(self):
+        """Append the changed documents to the journal
+        Writes that were not reported by the tables are saved by a full snapshot.
+        """
+        if self._full_write or self._writes > self._marks:
+            self._write_snapshot()
+        else:
+            lines = []
+            for table, doc_id in self._changes:
+                document = (self._data or {}).get(table, {}).get(doc_id)
+                record = {"table": table, "id": doc_id}
+                if document is not None:
+                    record["document"] = document
+                lines.append(json.dumps(record, **self.kwargs) + "\n")
+            with self.lock.hold(exclusive=True):
+                with open(self.journal_path, "a", encoding=self.encoding) as handle:
+                    handle.write("".join(lines))
+                    handle.flush()
+                    os.fsync(handle.fileno())
+                journal_size = os.path.getsize(self.journal_path)
+            if journal_size > self.compaction_threshold:
+                self.compact(wait=False)
+        self._forget_changes()
+
+    def _forget_changes(self):
+        self._changes = {}
+        self._full_write = False
+        self._writes = 0
+        self._marks = 0
+        self._dirty = False
+
+    def _write_snapshot(self):
+        """Write the whole database in the snapshot and remove the journals
+        A merge waiting for the lock then finds no sealed journal and does nothing.
+        """
+        with self.lock.hold(exclusive=True):
+            self._write_file(self._data)
+            for path in (self.sealed_path, self.journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def rollback(self):
+        super().rollback()
+        self._forget_changes()
+
+    def compact(self, wait=True):
+        """Merge the journal into the snapshot
+
+        Args:
+            wait (boolean, optional): if False the merge is done by a background thread. Defaults to True.
+        """
+        if self._compaction is not None and self._compaction.is_alive():
+            if wait:
+                self._wait_compaction()
+            return
+        with self.lock.hold(exclusive=True):
+            if not os.path.exists(self.journal_path) or os.path.exists(self.sealed_path):
+                sealed = os.path.exists(self.sealed_path)
+            else:
+                os.replace(self.journal_path, self.sealed_path)
+                sealed = True
+        if not sealed:
+            return
+        self._compaction = threading.Thread(target=self._merge_sealed_journal, daemon=True)
+        self._compaction.start()
+        if wait:
+            self._wait_compaction()
+
+    def _merge_sealed_journal(self):
+        """Write the snapshot updated with the sealed journal, then remove this journal
+        Replaying a journal twice gives the same tables, so stopping between
+        both steps is harmless. The content of the database does not change,
+        so its version is left as it is.
+        """
+        with self.lock.hold(exclusive=True):
+            # un autre programme a pu fusionner le journal scellé entre-temps
+            if not os.path.exists(self.sealed_path):
+                return
+            data = self._replay(self.sealed_path, self._read_file())
+            self._write_file(data or {})
+            os.remove(self.sealed_path)
+
+    def _wait_compaction(self):
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+
+    def close(self):
+        self._wait_compaction()
+        super().close()
@@ -0,0 +1,129 @@
+"""
+This module computes the tie-breaks of the standings of a tournament.
+
+The games of the tournament are read once and put in two arrays with a
+line per player and a column per round: the position of the opponent
+of the player in this round, -1 when he had none, and the points he won.
+Every tie-break is then a single array operation on these arrays, with no
+Python loop over the players or over their opponents.
+
+A bye gives its point to the player, so it counts in his score and in
+his progressive score, but it has no opponent: it adds nothing to his
+Buchholz or to his Sonneborn-Berger.
+"""
+import numpy as np
+
+
+def buchholz(scores, opponent_scores, played, results):
+    """ Sum of the scores of the opponents """
+    return opponent_scores.sum(axis=1)
+
+
+def buchholz_cut1(scores, opponent_scores, played, results):
+    """ Buchholz without the score of the weakest opponent """
+    weakest = np.where(played, opponent_scores, np.inf).min(axis=1, initial=np.inf)
+    return opponent_scores.sum(axis=1) - np.where(np.isfinite(weakest), weakest, 0)
+
+
+def sonneborn_berger(scores, opponent_scores, played, results):
+    """ Sum of the scores of the opponents, weighted by the points won against each of them """
+    return (results * opponent_scores).sum(axis=1)
+
+
+def progressive(scores, opponent_scores, played, results):
+    """ Sum of the scores of the player after each round """
+    return np.cumsum(results, axis=1).sum(axis=1)
+
+
+def wins(scores, opponent_scores, played, results):
+    """ Number of games won """
+    return (played & (results == 1)).sum(axis=1).astype(np.float64)
+
+
+# Départages disponibles, par le nom donné dans l'ordre de départage d'un tournoi
+TIEBREAKS = {"buchholz": buchholz,
+             "buchholz_cut1": buchholz_cut1,
+             "sonneborn_berger": sonneborn_berger,
+             "progressive": progressive,
+             "wins": wins}
+
+TIEBREAK_LABELS = {"buchholz": "Buchholz",
+                   "buchholz_cut1": "Buchholz tronqué",
+                   "sonneborn_berger": "Sonneborn-Berger",
+                   "progressive": "cumulatif",
+                   "wins": "victoires"}
+
+# Ordre de départage des nouveaux tournois, l'elo départage ensuite les ex aequo restants
+DEFAULT_TIEBREAKS = ("buchholz", "sonneborn_berger", "progressive")
+
+
+def opponent_arrays(player_ids, game_rounds, player_one, player_two, score_one, score_two,
+                    bye_rounds=(), bye_players=()):
+    """Build the opponents and the results of each player in each round
+
+    Args:
+        player_ids (list): ids of the players of the tournament
+        game_rounds (array): round id of each game having a result
+        player_one (array): id of the first player of each game
+        player_two (array): id of the second player of each game
+        score_one (array): points of the first player of each game
+        score_two (array): points of the second player of each game
+        bye_rounds (array, optional): round id of each bye. Defaults to ().
+        bye_players (array, optional): id of the exempted player of each bye. Defaults to ().
+
+    Returns:
+        numpy array: position in player_ids of the opponent of each player in each round, -1 if none
+        numpy array: points of each player in each round
+    """
+    ids = np.asarray(player_ids, dtype=np.int64)
+    order = np.argsort(ids)
+    game_rounds = np.asarray(game_rounds, dtype=np.int64)
+    bye_rounds = np.asarray(bye_rounds, dtype=np.int64)
+    # les rounds dans l'ordre de leurs id, qui est celui où ils ont été joués
+    _, columns = np.unique(np.concatenate([game_rounds, bye_rounds]), return_inverse=True)
+    game_columns, bye_columns = columns[:len(game_rounds)], columns[len(game_rounds):]
+
+    def positions(players):
+        return order[np.searchsorted(ids, np.asarray(players, dtype=np.int64), sorter=order)]
+
+    one, two = positions(player_one), positions(player_two)
+    opponents = np.full((len(ids), columns.max(initial=-1) + 1), -1, dtype=np.intp)
+    results = np.zeros(opponents.shape, dtype=np.float64)
+    opponents[one, game_columns] = two
+    opponents[two, game_columns] = one
+    results[one, game_columns] = score_one
+    results[two, game_columns] = score_two
+    results[positions(bye_players), bye_columns] = 1
+    return opponents, results
+
+
+def tiebreak_values(criteria, opponents, results):
+    """Compute the tie-breaks of every player
+
+    Args:
+        criteria (list): names of the tie-breaks, keys of TIEBREAKS
+        opponents (numpy array): opponents of the players, as given by opponent_arrays
+        results (numpy array): points of the players, as given by opponent_arrays
+
+    Returns:
+        numpy array: a line per player, a column per tie-break in the order of the criteria
+    """
+    scores = results.sum(axis=1)
+    played = opponents >= 0
+    opponent_scores = np.where(played, scores[np.where(played, opponents, 0)], 0)
+    values = np.zeros((len(opponents), len(criteria)), dtype=np.float64)
+    for column, criterion in enumerate(criteria):
+        values[:, column] = TIEBREAKS[criterion](scores, opponent_scores, played, results)
+    return values
+
+
+def format_tiebreaks(tiebreaks):
+    """Return the tie-breaks of a player as a line of text, like 'Buchholz 6, Sonneborn-Berger 4.5'
+
+    Args:
+        tiebreaks (dictionnary): value of each tie-break, in the order they break ties
+
+    Returns:
+        string: the tie-breaks
+    """
+    return ", ".join(f"{TIEBREAK_LABELS.get(name, name)} {value:g}" for name, value in (tiebreaks or {}).items())
@@ -3,10 +3,16 @@
     actions informations to the controller
 """
 from src.controller import AppController
+from src.schedule import SCHEDULES, SWISS, SYSTEMS
+from src.tiebreaks import DEFAULT_TIEBREAKS, TIEBREAKS, format_tiebreaks
 from datetime import datetime
 import pprint
 
 
+# Nombre de lignes affichées par page dans les rapports
+REPORT_PAGE_SIZE = 20
+
+
 class Views:
     """The class where you find display methods """
     @staticmethod
@@ -15,7 +21,7 @@ class Views:
         First three parameters are optionals
         If nb_rounds is not informed the default value is 4
 
-        ... raises:: If less than 8 players are informed it raises
+        ... raises:: If a player id is not an integer it raises
                     an error and the user is rediricted to main menu
             returns:
              dictionnary : a dictionnary to write in base with all informations about the tournament
@@ -37,20 +43,30 @@ class Views:
             print("Le lieu est une information obligatoire")
         print("Commentaires:")
         tournament_info["description"] = input()
-        print("nombre de tours: (4 par défaut)")
-        nb_rounds = input()
-        if nb_rounds == "":
-            nb_rounds = 4
-        tournament_info["nb_rounds"] = nb_rounds
-        print("Joueurs participant:")
+        print(f"Système: {', '.join(SYSTEMS)} ({SWISS} par défaut)")
         while True:
-            player = int(input())
-            players.append(player)
-            if len(players) == 8:
-                tournament_info["players"] = players
+            tournament_info["system"] = input() or SWISS
+            if tournament_info["system"] in SYSTEMS:
                 break
-            else:
-                pass
+            print("Système inconnu")
+        # les rounds d'un tournoi toutes rondes se déduisent du nombre de joueurs
+        nb_rounds = None
+        if tournament_info["system"] not in SCHEDULES:
+            print("nombre de tours: (4 par défaut)")
+            nb_rounds = input()
+            if nb_rounds == "":
+                nb_rounds = 4
+        tournament_info["nb_rounds"] = nb_rounds
+        print("Joueurs participant: (une ligne vide pour terminer)")
+        while True:
+            player = input()
+            if player == "":
+                if len(players) >= 2:
+                    tournament_info["players"] = players
+                    break
+                print("Il faut au moins deux joueurs")
+                continue
+            players.append(int(player))
         print("Quels types de parties seront jouées?")
         print("bullet, blitz, coup rapide")
         while True:
@@ -58,11 +74,22 @@ class Views:
             if tournament_info["game_rules"] != "":
                 break
             print("Le type de partie est obligatoire")
+        print(f"Ordre des départages, parmi {', '.join(TIEBREAKS)}:")
+        print(f"(séparés par des espaces, {' '.join(DEFAULT_TIEBREAKS)} par défaut)")
+        while True:
+            tiebreaks = input().split()
+            if all(name in TIEBREAKS for name in tiebreaks) and len(set(tiebreaks)) == len(tiebreaks):
+                tournament_info["tiebreaks"] = tiebreaks
+                break
+            print("Départage inconnu ou donné deux fois")
         tournament_info["rounds"] = []
         tournament_info["nb_of_played_round"] = 0
         tournament_info["begin_date"] = str(datetime.now())
         tournament_info["ending_date"] = ""
-        AppController.create_tournament(tournament_info)
+        try:
+            AppController.create_tournament(tournament_info)
+        except ValueError as error:
+            print(f"\nLe tournoi n'a pas été créé, {error}\n")
 
     @staticmethod
     def create_player_view():
@@ -98,6 +125,22 @@ class Views:
                 print("Le classement est obligatoire")
         AppController.create_player(player_info)
 
+    @staticmethod
+    def import_players_view():
+        """Used to create players from a CSV or json-lines file.
+        The user enters the path of the file.
+        The number of imported players and the rejected lines are printed."""
+        print("Chemin du fichier à importer (.csv ou .jsonl):")
+        path = input()
+        try:
+            imported, rejected = AppController.import_players(path)
+        except OSError:
+            print("Le fichier n'a pas pu être lu.")
+            return
+        print(f"{imported} joueurs importés.")
+        for line_number, reason in rejected:
+            print(f"ligne {line_number} rejetée: {reason}")
+
     @staticmethod
     def show_generated_round(round):
         """Show generated games for a newly generated round
@@ -108,9 +151,38 @@ class Views:
         if round:
             for game in round['games']:
                 print(game)
+            if round.get('bye') is not None:
+                print(f"Exempté: joueur {round['bye']}")
             return
         print('Pas de round généré.')
 
+    @staticmethod
+    def generate_rounds_view():
+        """Used to generate the next round of several tournaments at once
+        The user enters the ids of the tournaments separated by spaces,
+        or an empty line for all the ongoing tournaments.
+        The time spent for each tournament is printed.
+        """
+        print("Saisissez les id des tournois séparés par des espaces,")
+        print("ou une ligne vide pour tous les tournois en cours:")
+        try:
+            tournament_ids = [int(tournament_id) for tournament_id in input().split()] or None
+        except ValueError:
+            print("Les id des tournois doivent être des entiers.")
+            return
+        results, write_time = AppController.generate_rounds(tournament_ids)
+        for result in results:
+            timing = (f"lecture {result['read'] * 1000:.1f} ms, appariement {result['pairing'] * 1000:.1f} ms, "
+                      f"enregistrement {result['save'] * 1000:.1f} ms")
+            if result["round"] is None:
+                print(f"Tournoi {result['tournament_id']}: le tournoi est terminé.")
+            elif result["round"] is False:
+                print(f"Tournoi {result['tournament_id']}: le round en cours n'a pas tous ses résultats.")
+            else:
+                print(f"Tournoi {result['tournament_id']}: {result['round']['name']} généré, "
+                      f"{len(result['round']['games'])} matchs ({timing})")
+        print(f"Écriture de la base: {write_time * 1000:.1f} ms")
+
     @staticmethod
     def tournament_choice_view(generating_rounds=False):
         """"Used to select a tournament
@@ -147,6 +219,20 @@ class Views:
             print("Il y a déjà un round en cours, vous devez d'abord rentrer les résultats avant d'en créer un autre")
         Views.show_generated_round(round)
 
+    @staticmethod
+    def print_games(games_list):
+        """Print the games of a round with the names of the players
+
+        Args:
+            games_list (list): the match records of the round
+        """
+        names = AppController.get_player_names({player_id for game in games_list
+                                                for player_id in (game.player_one_id, game.player_two_id)})
+        for game in games_list:
+            print(f"{game.match_id}: "
+                  f"{names[game.player_one_id]}(id:{game.player_one_id}) vs "
+                  f"{names[game.player_two_id]}(id:{game.player_two_id})")
+
     @staticmethod
     def get_match_id_view(games_list):
         """This method is called when the user wants to enter a round results
@@ -163,39 +249,79 @@ class Views:
             print("La liste des matchs est vide.")
             return
         print("\n")
-        for game in games_list.items:
-            print(f"{game.match_id.value}: {game.joueur1.value} vs {game.joueur2.value}")
+        Views.print_games(games_list)
         match_id_user_choice = input()
         return match_id_user_choice
 
+    @staticmethod
+    def parse_results(lines):
+        """Read results typed as 'match_id player_one_score player_two_score'
+        Several results can be given on a line when separated by ';'.
+
+        Args:
+            lines (iterable): the typed lines
+
+        Returns:
+            list: (match_id, player_one_score, player_two_score) of each readable result
+            list: the results which could not be read
+        """
+        results, unreadable = [], []
+        for line in lines:
+            for entry in line.split(";"):
+                if not entry.strip():
+                    continue
+                try:
+                    match_id, player_one_score, player_two_score = entry.split()
+                    results.append((int(match_id), float(player_one_score), float(player_two_score)))
+                except ValueError:
+                    unreadable.append(entry.strip())
+        return results, unreadable
+
     @staticmethod
     def get_round_results_view():
         """Used to enter a round results.
         This method prints all the ongoing tournaments.
         The user choose the id of the wanted tournament.
-        Then the user choose the id of the match and the result.
+        Then the user types the results of the games, one per line,
+        and validates them all at once with an empty line.
         The validity is checked as the sum of each score shall be equal to 1.
-        The user ends entering results by typing q or Q.
+        The user can leave without saving by typing q or Q.
         """
         tournament_id_user_choice = int(Views.tournament_choice_view(generating_rounds=True))
         games_list, round_id = AppController.get_game_list(tournament_id_user_choice)
         if not games_list:
             print("Pas de matchs trouvé")
             return
-        matchs_results = []
+        print("\n")
+        Views.print_games(games_list)
         while True:
-            match_id_user_choice = Views.get_match_id_view(games_list)
-            print("Vous pouvez quitter la saisie des résultats en rentrant 'Q'.")
-            if match_id_user_choice.upper() == "Q":
-                break
-            match_id, player_one_score, player_two_score = list(map(float,
-                                                                match_id_user_choice.split(" ")))
-            if player_one_score + player_two_score != 1:
-                print("Les scores rentrés ne sont pas corrects. Veuillez ressaisir le résultat.")
+            print("Saisissez un résultat par ligne: 'id_du_match score_joueur1 score_joueur2'.")
+            print("Validez la saisie par une ligne vide, ou quittez sans enregistrer en rentrant 'Q'.")
+            lines = []
+            while True:
+                line = input()
+                if line.strip().upper() == "Q":
+                    return
+                if not line.strip():
+                    break
+                lines.append(line)
+            results, unreadable = Views.parse_results(lines)
+            for entry in unreadable:
+                print(f"Résultat illisible: {entry}")
+            if unreadable or not results:
                 continue
-
-            AppController.set_tour_results(matchs_results, round_id, tournament_id_user_choice,
-                                           match_id, player_one_score, player_two_score)
+            errors, missing = AppController.submit_round_results(tournament_id_user_choice, round_id, results)
+            if errors:
+                for error in errors:
+                    print(error)
+                print("Aucun résultat n'a été enregistré. Veuillez ressaisir les résultats.")
+                continue
+            print(f"{len(results)} résultat(s) enregistré(s).")
+            if missing:
+                print(f"Matchs sans résultat: {', '.join(str(match_id) for match_id in missing)}")
+            else:
+                print("Tous les matchs ont un résultat, le round est terminé.")
+            return
 
     @staticmethod
     def show_provisional_ranking():
@@ -208,10 +334,11 @@ class Views:
         players = AppController.get_provisional_ranking(tournament_id_user_choice)
         for n, player in enumerate(players):
             print(f"n°{n + 1}: "
-                  f"id: {player.id.value}"
-                  f" | Prénom: {player.firstname.value}"
+                  f"id: {player.id}"
+                  f" | Prénom: {player.firstname}"
                   f" | score tournoi: {player.tournament_score}"
-                  f" | elo: {player.elo.value}")
+                  f" | {format_tiebreaks(player.tiebreaks)}"
+                  f" | elo: {player.elo}")
         input()
 
     @staticmethod
@@ -293,16 +420,22 @@ class Views:
             print("Saisissez l'id du round qui vous intéresse:")
             round_choice = int(input())
 
-        report = AppController.get_report(choice, tournament_choice, sorting, round_choice)
-        if isinstance(report, dict):
-            print(f"matchs joués: {report['games']}")
-            input()
-            return
-        for value in report:
-            pprint.pprint(value)
-            print("\n")
-        input()
-        return
+        offset = 0
+        while True:
+            # on lit une ligne de plus que la page pour savoir s'il reste une page suivante
+            page = list(AppController.get_report(choice, tournament_choice, sorting, round_choice,
+                                                 offset=offset, limit=REPORT_PAGE_SIZE + 1))
+            for value in page[:REPORT_PAGE_SIZE]:
+                pprint.pprint(value)
+                print("\n")
+            if len(page) <= REPORT_PAGE_SIZE:
+                input()
+                return
+            print(f"Lignes {offset + 1} à {offset + REPORT_PAGE_SIZE}. "
+                  "Appuyez sur Entrée pour la page suivante ou rentrez 'Q' pour quitter.")
+            if input().strip().upper() == "Q":
+                return
+            offset += REPORT_PAGE_SIZE
 
     @staticmethod
     def main_menue_view():
@@ -321,6 +454,8 @@ class Views:
             "6: Consulter les informations d'un joueurs en particulier?\n"
             "7: Modifier le classement d'un joueur?\n"
             "8: Consulter le classement d'un tournois en cours ou fini?\n"
+            "9: Importer des joueurs depuis un fichier?\n"
+            "10: Générer un round pour plusieurs tournois en cours?\n"
               )
         user_choice = input()
         return user_choice
@@ -331,3 +466,10 @@ class Views:
 
         print("\nDésolé mais votre réponse ne décrit pas une action possible.\n"
               "Veuillez essayer de nouveau\n")
+
+    @staticmethod
+    def conflict_message_view():
+        """Used to inform the user that his action was not saved
+        because another program kept writing the database at the same time."""
+        print("\nLa base de données a été modifiée par un autre programme pendant votre action.\n"
+              "Rien n'a été enregistré, veuillez recommencer.\n")
@@ -0,0 +1,31 @@
+"""
+Fixtures shared by the tests.
+
+Each test gets its own database in a temporary directory: the settings are
+changed before the first access, which opens it, and it is closed at the end.
+"""
+import pytest
+
+from src import settings
+from src.models import close_database
+
+
+@pytest.fixture(params=["tinydb", "sqlite"])
+def database(request, tmp_path, monkeypatch):
+    """ An empty database, for each engine """
+    monkeypatch.setattr(settings, "DB_ENGINE", request.param)
+    monkeypatch.setattr(settings, "JSON_DB_PATH", str(tmp_path / "db.json"))
+    monkeypatch.setattr(settings, "SQLITE_DB_PATH", str(tmp_path / "db.sqlite3"))
+    close_database()
+    yield request.param
+    close_database()
+
+
+@pytest.fixture
+def json_database(tmp_path, monkeypatch):
+    """ An empty db.json database, for the tests of its storage """
+    monkeypatch.setattr(settings, "DB_ENGINE", "tinydb")
+    monkeypatch.setattr(settings, "JSON_DB_PATH", str(tmp_path / "db.json"))
+    close_database()
+    yield settings.JSON_DB_PATH
+    close_database()
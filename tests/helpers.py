@@ -0,0 +1,45 @@
+"""
+Helpers building the tournaments of the tests through the controller.
+"""
+from src.controller import AppController
+from src.models import db
+
+
+def create_players(count):
+    """Create players whose elo decreases with their id
+
+    Returns:
+        list: ids of the players
+    """
+    return [AppController.create_player({"firstname": f"Joueur{number}", "lastname": "Test", "birth_date": "",
+                                         "gender": "", "elo": 2000 - number})
+            for number in range(count)]
+
+
+def create_tournament(players, system="swiss", nb_rounds=None):
+    """ Create a tournament of the given players and return its id, of 4 rounds by default if it is swiss """
+    if nb_rounds is None and system == "swiss":
+        nb_rounds = 4
+    return AppController.create_tournament({"name": "Open", "location": "Paris", "description": "",
+                                            "players": players, "game_rules": "blitz",
+                                            "nb_rounds": nb_rounds, "system": system})
+
+
+def play_round(tournament_id, score_one=1, score_two=0):
+    """Generate the next round and enter a result for every game
+
+    Returns:
+        list: the games of the round
+    """
+    AppController.generate_tour(tournament_id)
+    games, round_id = AppController.get_game_list(tournament_id)
+    assert AppController.submit_round_results(
+        tournament_id, round_id, [(game.match_id, score_one, score_two) for game in games]) == ([], [])
+    return games
+
+
+def forget_standings(tournament_id):
+    """ Remove the standings and the tie-breaks of a tournament, as saved by the versions before them """
+    document = db.table('tournaments').get_by(id=tournament_id)
+    db.table('tournaments').update(lambda fields: (fields.pop("standings"), fields.pop("tiebreaks")),
+                                   doc_ids=[document.doc_id])
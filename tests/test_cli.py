@@ -0,0 +1,48 @@
+"""
+Commands and batches of the command line.
+"""
+import json
+
+from src import cli
+from src.controller import AppController
+
+PLAYER = "player create --firstname Judit --lastname Polgar --birth-date 23/07/1976 --gender f --elo 2735"
+
+
+def run(capsys, *argv):
+    """Run a command
+
+    Returns:
+        integer: status of the program
+        string: what it printed
+        string: what it printed as error
+    """
+    status = cli.main(list(argv))
+    out, err = capsys.readouterr()
+    return status, out, err
+
+
+def test_commands_print_their_result_in_json(database, capsys):
+    assert run(capsys, *PLAYER.split(), "--format", "json") == (0, '{"id": 1}\n', "")
+    status, out, _ = run(capsys, "player", "list", "--format", "json")
+    assert status == 0
+    assert [player["lastname"] for player in json.loads(out)] == ["Polgar"]
+
+
+def test_invalid_command_prints_an_error(database, capsys):
+    status, _, err = run(capsys, "tournament", "create", "--name", "Open", "--location", "Paris",
+                         "--game-rules", "blitz", "--players", "1", "2")
+    assert status == 1
+    assert err == "erreur: joueurs inexistants: [1, 2]\n"
+
+
+def test_batch_saves_all_its_commands_or_none(database, capsys, tmp_path):
+    batch = tmp_path / "lot.txt"
+    batch.write_text(f"# joueurs\n{PLAYER}\n\n{PLAYER}\n", encoding="utf-8")
+    assert run(capsys, "batch", str(batch))[0] == 0
+    assert len(AppController.get_player_info()) == 2
+    batch.write_text(f"{PLAYER}\nplayer elo --player 9 --elo 2000\n", encoding="utf-8")
+    status, _, err = run(capsys, "batch", str(batch))
+    assert status == 1
+    assert f"{batch}, ligne 2" in err
+    assert len(AppController.get_player_info()) == 2
@@ -0,0 +1,49 @@
+"""
+Export of players, reports and tournaments to CSV or json-lines files.
+"""
+import csv
+import io
+import json
+
+from src import export
+from src.models import database_version, db
+from tests.helpers import create_players, create_tournament, forget_standings, play_round
+
+
+def test_csv_columns_are_the_keys_of_every_row():
+    handle = io.StringIO()
+    assert export.write_rows_to(iter([{"id": 1}, {"id": 2, "rated_games": 3}]), handle, "csv") == 2
+    assert list(csv.DictReader(io.StringIO(handle.getvalue()))) == [{"id": "1", "rated_games": ""},
+                                                                    {"id": "2", "rated_games": "3"}]
+
+
+def test_export_players_keeps_the_columns_missing_from_the_first_player(database, tmp_path):
+    create_players(3)
+    db.table('players').update_by({"rated_games": 7}, id=3)
+    path = tmp_path / "joueurs.csv"
+    assert export.export_players(str(path)) == 3
+    rows = list(csv.DictReader(path.open(encoding="utf-8")))
+    assert [row["rated_games"] for row in rows] == ["", "", "7"]
+
+
+def test_export_tournament_does_not_write_the_database(database, tmp_path):
+    tournament_id = create_tournament(create_players(4), nb_rounds=1)
+    play_round(tournament_id)
+    forget_standings(tournament_id)
+    version = database_version()
+    written = export.export_tournaments(str(tmp_path), [tournament_id], "jsonl", workers=1)
+    assert database_version() == version
+    assert "standings" not in db.table('tournaments').get_by(id=tournament_id)
+    standings = tmp_path / f"tournament_{tournament_id}_standings.jsonl"
+    assert written[str(standings)] == 4
+    ranked = [json.loads(line) for line in standings.read_text(encoding="utf-8").splitlines()]
+    assert [entry["rank"] for entry in ranked] == [1, 2, 3, 4]
+    assert sum(entry["score"] for entry in ranked) == 2
+
+
+def test_export_report_writes_the_labels_as_columns(database, tmp_path):
+    create_players(3)
+    path = tmp_path / "rapport.jsonl"
+    assert export.export_report(str(path), 1, sorting="a") == 3
+    rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [row["Prénom"] for row in rows] == ["Joueur0", "Joueur1", "Joueur2"]
@@ -0,0 +1,27 @@
+"""
+Databases generated for the benchmarks.
+"""
+from benchmarks.generator import generate, sizes_for_matchs, write_database
+from src import settings
+from src.controller import AppController
+from src.models import INDEXED_FIELDS, SORTED_FIELDS, Tournament, db
+from src.sqlite_engine import migrate_json_to_sqlite
+from tests.helpers import play_round
+
+
+def test_same_seed_gives_the_same_database():
+    sizes = sizes_for_matchs(200)
+    assert generate(**sizes, seed=3) == generate(**sizes, seed=3)
+    assert generate(**sizes, seed=3) != generate(**sizes, seed=4)
+
+
+def test_generated_tournaments_go_on_with_the_models(database):
+    counts = write_database(settings.JSON_DB_PATH, **sizes_for_matchs(200))
+    if database == "sqlite":
+        migrate_json_to_sqlite(settings.JSON_DB_PATH, settings.SQLITE_DB_PATH, INDEXED_FIELDS, SORTED_FIELDS)
+    assert len(db.table('matchs')) == counts["matchs"]
+    tournament_id = Tournament.get_ongoing_tournaments()[0]
+    games = play_round(tournament_id)
+    last_round = Tournament.get_tournament(tournament_id)["nb_of_played_round"]
+    rows = list(AppController.get_report(5, tournament_choice=tournament_id, round_choice=last_round))
+    assert len(rows) == len(games) > 0
@@ -0,0 +1,58 @@
+"""
+Bulk import of players from CSV or json-lines files.
+"""
+import json
+
+import pytest
+
+from src.controller import AppController
+from src.importer import validate_row
+from src.models import Tournament
+from tests.helpers import create_players
+
+
+@pytest.mark.parametrize("row, reason", [
+    ({"firstname": "Judit", "lastname": "Polgar", "elo": 2735}, None),
+    ({"firstname": "Judit", "lastname": "Polgar", "elo": 0}, None),
+    ({"firstname": "Judit", "lastname": "Polgar", "elo": " 2735 "}, None),
+    ({"firstname": "", "lastname": "Polgar", "elo": 2735}, "le prénom est obligatoire"),
+    ({"firstname": "Judit", "lastname": None, "elo": 2735}, "le nom est obligatoire"),
+    ({"firstname": "Judit", "lastname": "Polgar"}, "le classement est obligatoire et doit être un entier"),
+    ({"firstname": "Judit", "lastname": "Polgar", "elo": "abc"},
+     "le classement est obligatoire et doit être un entier"),
+    ({"firstname": "Judit", "lastname": "Polgar", "elo": -5}, "le classement ne peut pas être négatif"),
+    (None, "ligne illisible"),
+])
+def test_validate_row(row, reason):
+    attrs, error = validate_row(row)
+    assert error == reason
+    assert (attrs is None) == (reason is not None)
+
+
+def test_import_players_keeps_the_valid_rows(database, tmp_path):
+    path = tmp_path / "joueurs.jsonl"
+    path.write_text("\n".join([json.dumps({"firstname": "Judit", "lastname": "Polgar", "elo": 2735}),
+                               "pas du json",
+                               json.dumps({"firstname": "Magnus", "lastname": "Carlsen", "elo": 0}),
+                               json.dumps({"firstname": "Garry", "elo": 2812})]), encoding="utf-8")
+    imported, rejected = AppController.import_players(str(path))
+    assert imported == 2
+    assert [line_number for line_number, _ in rejected] == [2, 4]
+    assert sorted(player["elo"] for player in Tournament.get_all_players()) == [0, 2735]
+
+
+def test_import_players_from_csv(database, tmp_path):
+    path = tmp_path / "joueurs.csv"
+    path.write_text("firstname,lastname,birth_date,gender,elo\nJudit,Polgar,23/07/1976,f,2735\n,Carlsen,,m,2800\n",
+                    encoding="utf-8")
+    imported, rejected = AppController.import_players(str(path))
+    assert (imported, rejected) == (1, [(3, "le prénom est obligatoire")])
+
+
+def test_imported_players_take_the_next_ids(database, tmp_path):
+    create_players(2)
+    path = tmp_path / "joueurs.jsonl"
+    path.write_text("\n".join(json.dumps({"firstname": f"Joueur{number}", "lastname": "Import", "elo": 1500})
+                              for number in range(3)), encoding="utf-8")
+    assert AppController.import_players(str(path)) == (3, [])
+    assert sorted(player["id"] for player in Tournament.get_all_players()) == [1, 2, 3, 4, 5]
@@ -0,0 +1,45 @@
+"""
+Lookups of the tables by their key fields, which must give the same documents as a full scan, with both engines.
+"""
+from src import settings
+from src.models import Database, STORAGES, db
+
+
+def scan(table, **keys):
+    """ The documents of the table matching the keys, found without index """
+    return sorted(document.doc_id for document in table.all()
+                  if all(document.get(field) == value for field, value in keys.items()))
+
+
+def test_lookups_follow_the_writes(database):
+    matchs = db.table('matchs')
+    matchs.insert_multiple([{"match_id": number, "round_id": number % 3, "tournament_id": 1}
+                            for number in range(1, 31)])
+    assert [document.doc_id for document in matchs.search_by(round_id=2)] == scan(matchs, round_id=2)
+    matchs.update({"round_id": 4}, doc_ids=[2, 5])
+    matchs.remove(doc_ids=[8])
+    matchs.insert({"match_id": 31, "round_id": 2, "tournament_id": 2})
+    for round_id in range(5):
+        assert [document.doc_id for document in matchs.search_by(round_id=round_id)] == scan(matchs, round_id=round_id)
+    assert [document.doc_id for document in matchs.search_by(round_id=2, tournament_id=2)] == [31]
+    assert matchs.get_by(match_id=8) is None
+    assert matchs.get_by(match_id=31)["tournament_id"] == 2
+
+
+def test_sorted_pages_follow_the_writes(database):
+    players = db.table('players')
+    players.insert_multiple([{"id": number, "firstname": name, "elo": 2000 + number}
+                             for number, name in enumerate(["dupont", "Martin", "bernard", "Petit"], 1)])
+    players.update({"firstname": "Aubert"}, doc_ids=[4])
+    names = [player["firstname"] for player in players.sorted_by("firstname")]
+    assert names == ["Aubert", "bernard", "dupont", "Martin"]
+    assert [player["id"] for player in players.sorted_by("elo", reverse=True, offset=1, limit=2)] == [3, 2]
+
+
+def test_indexes_see_the_writes_of_another_program(json_database):
+    db.table('rounds').insert({"round_id": 1, "tournament_id": 1})
+    assert len(db.table('rounds').search_by(tournament_id=1)) == 1
+    other = Database(json_database, storage=STORAGES[settings.DB_STORAGE])
+    other.table('rounds').insert({"round_id": 2, "tournament_id": 1})
+    other.close()
+    assert [document["round_id"] for document in db.table('rounds').search_by(tournament_id=1)] == [1, 2]
@@ -0,0 +1,20 @@
+"""
+Tracing of the database accesses, in another process so the classes of the tests stay unwrapped.
+"""
+import json
+import os
+import subprocess
+import sys
+
+
+def test_profile_attributes_the_accesses_to_the_operations(tmp_path):
+    output = tmp_path / "stats.json"
+    environment = {**os.environ, "CHESS_PROFILE": "1", "CHESS_PROFILE_OUTPUT": str(output),
+                   "CHESS_DB_ENGINE": "tinydb", "CHESS_JSON_DB_PATH": str(tmp_path / "db.json")}
+    subprocess.run([sys.executable, "main.py", "player", "create", "--firstname", "Judit", "--lastname", "Polgar",
+                    "--birth-date", "23/07/1976", "--gender", "f", "--elo", "2735"],
+                   env=environment, check=True, stdout=subprocess.DEVNULL,
+                   cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    operations = json.loads(output.read_text())["operations"]
+    assert operations["AppController.create_player"]["calls"]["count"] == 1
+    assert "players:write" in operations["AppController.create_player"]["accesses"]
@@ -0,0 +1,65 @@
+"""
+Journal of db.json: changes appended after the snapshot, replayed at the opening and merged by the compaction.
+"""
+import json
+import os
+
+from src.models import Database
+from src.storage import JournalStorage
+
+
+def open_journal(tmp_path):
+    return Database(str(tmp_path / "db.json"), storage=JournalStorage)
+
+
+def fill(database):
+    players = database.table('players')
+    players.insert_multiple([{"id": number, "elo": 2000} for number in range(1, 4)])
+    players.update({"elo": 2100}, doc_ids=[1])
+    players.remove(doc_ids=[2])
+
+
+def test_changes_are_appended_to_the_journal_and_replayed(tmp_path):
+    database = open_journal(tmp_path)
+    fill(database)
+    database.close()
+    with open(tmp_path / "db.json.journal", encoding="utf-8") as handle:
+        records = [json.loads(line) for line in handle]
+    assert [(record["id"], "document" in record) for record in records] == [
+        ("1", True), ("2", True), ("3", True), ("1", True), ("2", False)]
+    assert not os.path.exists(tmp_path / "db.json")
+    database = open_journal(tmp_path)
+    assert {player.doc_id: player["elo"] for player in database.table('players').all()} == {1: 2100, 3: 2000}
+
+
+def test_last_line_cut_by_a_crash_is_ignored(tmp_path):
+    database = open_journal(tmp_path)
+    fill(database)
+    database.close()
+    with open(tmp_path / "db.json.journal", "a", encoding="utf-8") as handle:
+        handle.write('{"table": "players", "id": "3", "docu')
+    database = open_journal(tmp_path)
+    assert {player.doc_id: player["elo"] for player in database.table('players').all()} == {1: 2100, 3: 2000}
+
+
+def test_compaction_merges_the_journal_into_the_snapshot(tmp_path):
+    database = open_journal(tmp_path)
+    fill(database)
+    database.compact()
+    database.close()
+    assert not os.path.exists(tmp_path / "db.json.journal")
+    assert not os.path.exists(tmp_path / "db.json.journal.sealed")
+    with open(tmp_path / "db.json", encoding="utf-8") as handle:
+        assert json.load(handle)["players"] == {"1": {"id": 1, "elo": 2100}, "3": {"id": 3, "elo": 2000}}
+
+
+def test_big_journal_is_compacted_in_the_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(JournalStorage, "compaction_threshold", 100)
+    database = open_journal(tmp_path)
+    fill(database)
+    database.table('players').insert({"id": 4, "elo": 1900})
+    database.close()
+    database = open_journal(tmp_path)
+    assert {player.doc_id: player["elo"] for player in database.table('players').all()} == {
+        1: 2100, 3: 2000, 4: 1900}
+    assert os.path.exists(tmp_path / "db.json")
@@ -0,0 +1,26 @@
+"""
+Opening of the database at its first access.
+"""
+import os
+import subprocess
+import sys
+
+from src import settings
+from src.models import close_database, db
+from tests.helpers import create_players
+
+
+def test_importing_the_program_does_not_open_the_database(tmp_path):
+    path = tmp_path / "db.json"
+    subprocess.run([sys.executable, "-c", "import src.controller, src.views"], check=True,
+                   env={**os.environ, "CHESS_DB_ENGINE": "tinydb", "CHESS_JSON_DB_PATH": str(path)},
+                   cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert not os.listdir(tmp_path)
+
+
+def test_closed_database_is_opened_again_with_the_new_settings(database, tmp_path, monkeypatch):
+    create_players(2)
+    close_database()
+    monkeypatch.setattr(settings, "JSON_DB_PATH", str(tmp_path / "autre.json"))
+    monkeypatch.setattr(settings, "SQLITE_DB_PATH", str(tmp_path / "autre.sqlite3"))
+    assert len(db.table('players')) == 0
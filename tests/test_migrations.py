@@ -0,0 +1,86 @@
+"""
+Migration of a database saved by the first version of the application, with both engines.
+"""
+import json
+
+import pytest
+
+from src import settings
+from src.controller import AppController
+from src.migrations import MIGRATIONS
+from src.models import INDEXED_FIELDS, SORTED_FIELDS, Tournament, close_database, db
+from src.pairing import pair_key
+from src.sqlite_engine import migrate_json_to_sqlite
+from tests.helpers import play_round
+
+
+def baseline_database():
+    """Return a tournament of 4 players as saved by the first version: the labels of the players
+    in the matchs, the games of the rounds as json strings and the list of the games not played yet
+
+    Returns:
+        dictionnary: the tables of db.json
+    """
+    players = {str(player_id): {"firstname": f"Joueur{player_id}", "lastname": "Test", "birth_date": "",
+                                "gender": "", "elo": 2000 - player_id, "id": player_id}
+               for player_id in range(1, 5)}
+    games = [(1, 3, 1, 0), (2, 4, 0.5, 0.5)]
+    matchs = {str(match_id): {"joueur1": f"Joueur{one}(id:{one})", "joueur2": f"Joueur{two}(id:{two})",
+                              "score_one": score_one, "score_two": score_two, "round_id": 1, "match_id": match_id}
+              for match_id, (one, two, score_one, score_two) in enumerate(games, 1)}
+    rounds = {"1": {"round_id": 1, "tournament_id": 1, "name": "Round 1", "beginning_date": "2021-06-01 10:00:00",
+                    "ending_date": "2021-06-01 12:00:00",
+                    "games": [json.dumps([[one, f"Joueur{one}", score_one], [two, f"Joueur{two}", score_two]])
+                              for one, two, score_one, score_two in games]}}
+    scores = {str(player_id): {"player_id": player_id, "tournament_id": 1, "score": score}
+              for player_id, score in enumerate([1, 0.5, 0, 0.5], 1)}
+    tournaments = {"1": {"name": "Open", "location": "Paris", "description": "", "nb_rounds": 3,
+                         "players": [1, 2, 3, 4], "game_rules": "blitz", "rounds": [1], "nb_of_played_round": 1,
+                         "begin_date": "2021-06-01 09:00:00", "ending_date": "", "id": 1,
+                         "list_of_possible_games": [[1, 2], [1, 4], [2, 3], [3, 4]]}}
+    return {"players": players, "tournaments": tournaments, "rounds": rounds, "matchs": matchs, "scores": scores}
+
+
+@pytest.fixture
+def baseline(database):
+    """ The baseline database, opened with the engine of the database fixture """
+    with open(settings.JSON_DB_PATH, "w", encoding="utf-8") as handle:
+        json.dump(baseline_database(), handle)
+    if database == "sqlite":
+        migrate_json_to_sqlite(settings.JSON_DB_PATH, settings.SQLITE_DB_PATH, INDEXED_FIELDS, SORTED_FIELDS)
+    return database
+
+
+def test_every_migration_is_applied_once(baseline):
+    assert [migration["name"] for migration in db.table('migrations').all()] == [name for name, _ in MIGRATIONS]
+    close_database()
+    assert len(db.table('migrations').all()) == len(MIGRATIONS)
+
+
+def test_match_labels_become_player_ids(baseline):
+    assert sorted((game["player_one_id"], game["player_two_id"], game["tournament_id"])
+                  for game in db.table('matchs').all()) == [(1, 3, 1), (2, 4, 1)]
+    assert all("joueur1" not in game and "joueur2" not in game for game in db.table('matchs').all())
+
+
+def test_possible_games_become_played_pairs(baseline):
+    tournament = db.table('tournaments').get_by(id=1)
+    assert "list_of_possible_games" not in tournament
+    assert tournament["played_pairs"] == sorted([pair_key(1, 3), pair_key(2, 4)])
+
+
+def test_round_games_become_lists(baseline):
+    assert db.table('rounds').get_by(round_id=1)["games"] == [
+        [[1, "Joueur1", 1], [3, "Joueur3", 0]], [[2, "Joueur2", 0.5], [4, "Joueur4", 0.5]]]
+
+
+def test_baseline_tournament_goes_on_after_the_migration(baseline):
+    assert [row[2] for row in AppController.get_report(5, tournament_choice=1, round_choice=1)] \
+        == ["Score: 1 - 0", "Score: 0.5 - 0.5"]
+    assert [entry["player_id"] for entry in Tournament.get_standings(1)] == [1, 2, 4, 3]
+    games = play_round(1)
+    assert len(list(AppController.get_report(5, tournament_choice=1, round_choice=2))) == 2
+    # les nouveaux matchs prennent les id suivant ceux de la base
+    assert sorted(game.match_id for game in games) == [3, 4]
+    # aucun des deux matchs du premier round n'est rejoué
+    assert not {pair_key(game.player_one_id, game.player_two_id) for game in games} & {pair_key(1, 3), pair_key(2, 4)}
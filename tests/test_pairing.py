@@ -0,0 +1,143 @@
+"""
+Invariants of the swiss pairing and of the round-robin schedules, without database.
+"""
+import itertools
+import random
+
+import pytest
+
+from src.pairing import pair_key, pair_round
+from src.schedule import SCHEDULES, round_robin, schedule_length
+
+
+def fewest_rematches(players, played):
+    """Count the rematches of the best pairing of the players, trying them all
+
+    Returns:
+        integer: smallest number of games between players who have already met
+    """
+    if not players:
+        return 0
+    first, others = players[0], players[1:]
+    return min((pair_key(first, other) in played)
+               + fewest_rematches(others[:index] + others[index + 1:], played)
+               for index, other in enumerate(others))
+
+
+def play_swiss(players, rounds, seed=1):
+    """Pair and play a swiss tournament with random results
+
+    Returns:
+        list: games, exempted player and games played before, of each round
+    """
+    rng = random.Random(seed)
+    scores = {player_id: 0 for player_id in players}
+    played, byes, history = set(), set(), []
+    for _ in range(rounds):
+        ranking = sorted(players, key=lambda player_id: (-scores[player_id], player_id))
+        pairs, bye = pair_round(ranking, scores, played, byes)
+        history.append((pairs, bye, set(played)))
+        for player_one_id, player_two_id in pairs:
+            score_one = rng.choice([0, 0.5, 1])
+            scores[player_one_id] += score_one
+            scores[player_two_id] += 1 - score_one
+            played.add(pair_key(player_one_id, player_two_id))
+        if bye is not None:
+            scores[bye] += 1
+            byes.add(bye)
+    return history
+
+
+def test_pair_key_ignores_the_order_of_the_players():
+    assert pair_key(3, 12) == pair_key(12, 3) != pair_key(3, 13)
+
+
+@pytest.mark.parametrize("count", [2, 7, 8, 31])
+def test_swiss_round_pairs_every_player_once(count):
+    players = list(range(1, count + 1))
+    for pairs, bye, _ in play_swiss(players, 5):
+        paired = [player_id for pair in pairs for player_id in pair]
+        assert sorted(paired + ([bye] if bye is not None else [])) == players
+        assert (bye is None) == (count % 2 == 0)
+
+
+@pytest.mark.parametrize("count", [8, 9, 30])
+def test_swiss_avoids_rematches_and_second_byes(count):
+    history = play_swiss(list(range(1, count + 1)), 5)
+    keys = [pair_key(*pair) for pairs, _, _ in history for pair in pairs]
+    assert len(keys) == len(set(keys))
+    byes = [bye for _, bye, _ in history if bye is not None]
+    assert len(byes) == len(set(byes))
+
+
+def test_swiss_first_round_pairs_top_half_against_bottom_half():
+    players = list(range(1, 9))
+    pairs, bye = pair_round(players, dict.fromkeys(players, 0))
+    assert bye is None
+    assert sorted(tuple(sorted(pair)) for pair in pairs) == [(1, 5), (2, 6), (3, 7), (4, 8)]
+
+
+def test_swiss_bye_goes_to_the_lowest_player_not_yet_exempted():
+    players = list(range(1, 8))
+    _, bye = pair_round(players, dict.fromkeys(players, 0), byes={7})
+    assert bye == 6
+
+
+def test_swiss_pairs_again_as_few_players_as_possible():
+    # 1 et 4 ne se sont pas rencontrés: 1-4 et 2-3 ne rejoue qu'une partie, 1-3 et 2-4 en rejouerait deux
+    players = [1, 2, 3, 4]
+    played = {pair_key(1, 2), pair_key(1, 3), pair_key(2, 3), pair_key(2, 4), pair_key(3, 4)}
+    pairs, _ = pair_round(players, dict.fromkeys(players, 0), played)
+    assert sorted(tuple(sorted(pair)) for pair in pairs) == [(1, 4), (2, 3)]
+
+
+@pytest.mark.parametrize("count, rounds", [(6, 5), (7, 6), (8, 7), (10, 9)])
+@pytest.mark.parametrize("seed", range(10))
+def test_swiss_rematches_are_the_fewest_possible(count, rounds, seed):
+    for pairs, _, played in play_swiss(list(range(1, count + 1)), rounds, seed):
+        paired = [player_id for pair in pairs for player_id in pair]
+        rematches = sum(pair_key(*pair) in played for pair in pairs)
+        assert rematches == fewest_rematches(paired, played)
+
+
+@pytest.mark.parametrize("system", SCHEDULES)
+@pytest.mark.parametrize("count", range(2, 16))
+def test_round_robin_plays_every_pair_once_per_cycle(system, count):
+    players = list(range(1, count + 1))
+    rounds = round_robin(players, SCHEDULES[system])
+    assert len(rounds) == schedule_length(count, system)
+    meetings = {}
+    for games, bye in rounds:
+        paired = [player_id for game in games for player_id in game]
+        assert sorted(paired + ([bye] if bye is not None else [])) == players
+        for game in games:
+            meetings[pair_key(*game)] = meetings.get(pair_key(*game), 0) + 1
+    assert meetings == {pair_key(*pair): SCHEDULES[system] for pair in itertools.combinations(players, 2)}
+    byes = [bye for _, bye in rounds if bye is not None]
+    assert sorted(byes) == (sorted(players * SCHEDULES[system]) if count % 2 else [])
+
+
+@pytest.mark.parametrize("system", SCHEDULES)
+@pytest.mark.parametrize("count", range(2, 16))
+def test_round_robin_balances_the_colors(system, count):
+    colors = {player_id: [] for player_id in range(1, count + 1)}
+    for games, _ in round_robin(list(colors), SCHEDULES[system]):
+        for white, black in games:
+            colors[white].append("w")
+            colors[black].append("b")
+    for sequence in colors.values():
+        assert abs(sequence.count("w") - sequence.count("b")) <= 1
+        assert max(len(list(streak)) for _, streak in itertools.groupby(sequence)) <= 2
+
+
+def test_round_robin_reverses_the_colors_in_the_second_cycle():
+    players = list(range(1, 7))
+    first = {game for games, _ in round_robin(players) for game in games}
+    second = {game for games, _ in round_robin(players, 2)[len(players) - 1:] for game in games}
+    assert second == {(black, white) for white, black in first}
+
+
+def test_schedule_length_is_none_for_swiss():
+    assert schedule_length(10, "swiss") is None
+    assert schedule_length(5, "round_robin") == 5
+    assert schedule_length(6, "double_round_robin") == 10
@@ -0,0 +1,67 @@
+"""
+Elo ratings computed from the results of the rounds.
+"""
+import numpy as np
+
+from src.controller import AppController
+from src.models import Tournament, db, transaction
+from src.rating import rate_period
+from tests.helpers import create_players, create_tournament, play_round
+
+
+def test_rate_period_follows_the_k_factors():
+    # nouveau joueur: K = 40, joueur confirmé: K = 20, à partir de 2400: K = 10
+    ratings, games = rate_period([2000, 2000, 2500, 2500], [0, 30, 30, 30], [0, 2], [1, 3], [1, 0.5])
+    assert ratings.tolist() == [2020, 1990, 2500, 2500]
+    assert games.tolist() == [1, 31, 31, 31]
+
+
+def test_rate_period_rates_every_game_from_the_ratings_before_it():
+    # deux victoires contre le même adversaire comptent autant l'une que l'autre
+    ratings, games = rate_period(np.array([2000, 2000]), np.array([30, 30]), [0, 0], [1, 1], [1, 1])
+    assert ratings.tolist() == [2020, 1980]
+    assert games.tolist() == [32, 32]
+
+
+def test_players_are_rated_when_a_round_is_over(database):
+    players = create_players(4)
+    tournament_id = create_tournament(players)
+    games = play_round(tournament_id)
+    winners = {game.player_one_id for game in games}
+    for player_id in players:
+        history = AppController.get_rating_history(player_id)
+        assert len(history) == 1
+        change = history[0]["rating_after"] - history[0]["rating_before"]
+        assert (change > 0) == (player_id in winners)
+        assert db.table('players').get_by(id=player_id)["elo"] == history[0]["rating_after"]
+
+
+def elos(players):
+    return [db.table('players').get_by(id=player_id)["elo"] for player_id in players]
+
+
+def test_replay_gives_the_ratings_computed_round_by_round(database):
+    players = create_players(6)
+    tournament_id = create_tournament(players, nb_rounds=3)
+    for _ in range(3):
+        play_round(tournament_id)
+    rated = elos(players)
+    with transaction():
+        summary = Tournament.replay_ratings()
+    assert summary["rounds"] == 3
+    assert elos(players) == rated
+
+
+def test_corrected_result_rates_the_next_rounds_again(database):
+    players = create_players(4)
+    tournament_id = create_tournament(players, nb_rounds=2)
+    first_round = play_round(tournament_id)
+    play_round(tournament_id)
+    round_id = db.table('rounds').get_by(tournament_id=tournament_id, name="Round 1")["round_id"]
+    before = elos(players)
+    assert AppController.submit_round_results(tournament_id, round_id, [(first_round[0].match_id, 0, 1)]) == ([], [])
+    corrected = elos(players)
+    assert corrected != before
+    with transaction():
+        Tournament.replay_ratings()
+    assert elos(players) == corrected
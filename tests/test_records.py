@@ -0,0 +1,22 @@
+"""
+Records built from the stored documents.
+"""
+import copy
+
+from src.records import PlayerRecord
+
+
+def test_record_keeps_its_fields_and_ignores_the_other_keys():
+    player = PlayerRecord.from_document({"id": 3, "firstname": "Judit", "elo": 2735, "doc_id": 9})
+    assert player.to_dict() == {"id": 3, "firstname": "Judit", "lastname": None, "birth_date": None,
+                                "gender": None, "elo": 2735, "tournament_score": None, "tiebreaks": None}
+    assert not hasattr(player, "__dict__")
+
+
+def test_record_copy_is_equal_and_independent():
+    player = PlayerRecord(id=3, firstname="Judit", elo=2735)
+    other = copy.copy(player)
+    assert other == player
+    other.elo = 2700
+    assert player.elo == 2735
+    assert other != player
@@ -0,0 +1,18 @@
+"""
+Id sequences of the tables.
+"""
+from src.models import Sequence, db
+from tests.helpers import create_players
+
+
+def test_ids_of_removed_documents_are_not_given_again(database):
+    players = create_players(3)
+    db.table('players').remove(doc_ids=[db.table('players').get_by(id=players[-1]).doc_id])
+    assert create_players(1) == [players[-1] + 1]
+
+
+def test_sequence_starts_after_the_biggest_id_of_an_existing_database(database):
+    # base enregistrée avant les séquences, avec des trous dans les ids
+    db.table('players').insert_multiple({"firstname": "Joueur", "elo": 1500, "id": player_id} for player_id in (1, 7))
+    assert Sequence.reserve("players", 3) == 8
+    assert Sequence.next_id("players") == 11
@@ -0,0 +1,39 @@
+"""
+Routes of the HTTP server, called without opening a socket.
+"""
+import asyncio
+import json
+
+from src.models import database_version
+from src.server import ROUTES, ChessServer, find_route
+from tests.helpers import create_players, create_tournament, forget_standings, play_round
+
+
+def request(server, method, target, body=None):
+    """Answer a request like the server does for a client
+
+    Returns:
+        integer: status of the response
+        variable: decoded body of the response
+    """
+    status, payload = asyncio.run(server.dispatch(method, target, json.dumps(body).encode() if body else b""))
+    return status, json.loads(payload)
+
+
+def test_reads_of_an_older_tournament_write_nothing(database):
+    tournament_id = create_tournament(create_players(4))
+    play_round(tournament_id)
+    forget_standings(tournament_id)
+    server = ChessServer()
+    version = database_version()
+    targets = ["/players", "/players/1", "/players/1/ratings", "/tournaments", f"/tournaments/{tournament_id}",
+               f"/tournaments/{tournament_id}/ranking", f"/tournaments/{tournament_id}/games"]
+    targets += [f"/reports/{choice}?tournament={tournament_id}&round=1" for choice in range(1, 6)]
+    # toutes les routes de lecture sont appelées
+    assert {find_route("GET", target.split("?")[0])[0] for target in targets} \
+        == {handler for method, _, handler, _ in ROUTES if method == "GET"}
+    for target in targets:
+        assert request(server, "GET", target)[0] == 200
+        assert database_version() == version
+    status, ranking = request(server, "GET", f"/tournaments/{tournament_id}/ranking")
+    assert [player["tournament_score"] for player in ranking] == [1, 1, 0, 0]
@@ -0,0 +1,78 @@
+"""
+The SQLite engine: same answers as TinyDB, and copy of a db.json database.
+"""
+import json
+import os
+
+import pytest
+
+from src.models import INDEXED_FIELDS, SORTED_FIELDS, Database
+from src.sqlite_engine import SQLiteDatabase, migrate_json_to_sqlite
+from src.storage import CachedJSONStorage
+
+
+def write_json_database(path, players):
+    """ Write a db.json holding the given number of players """
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump({"players": {str(player_id): {"firstname": f"Joueur{player_id}", "elo": 2000, "id": player_id}
+                               for player_id in range(1, players + 1)}}, handle)
+
+
+def test_both_engines_sort_missing_values_last(tmp_path):
+    documents = [{"id": 1, "firstname": "bob", "elo": None}, {"id": 2, "firstname": None, "elo": 1500},
+                 {"id": 3, "firstname": "Alice", "elo": 1800}, {"id": 4, "elo": 1200}]
+    json_database = Database(os.path.join(tmp_path, "db.json"), storage=CachedJSONStorage)
+    sqlite_database = SQLiteDatabase(os.path.join(tmp_path, "db.sqlite3"), {"players": ("id",)},
+                                     {"players": ("elo", "firstname")})
+    for database in (json_database, sqlite_database):
+        database.table('players').insert_multiple(documents)
+    for field in ("elo", "firstname", "gender"):
+        for reverse in (False, True):
+            orders = [[player["id"] for player in database.table('players').sorted_by(field, reverse)]
+                      for database in (json_database, sqlite_database)]
+            assert orders[0] == orders[1]
+    assert [player["id"] for player in sqlite_database.table('players').sorted_by("elo")] == [4, 2, 3, 1]
+
+
+def test_copy_keeps_the_documents_and_their_ids(tmp_path):
+    json_path, sqlite_path = str(tmp_path / "db.json"), str(tmp_path / "db.sqlite3")
+    write_json_database(json_path, 3)
+    assert migrate_json_to_sqlite(json_path, sqlite_path, INDEXED_FIELDS, SORTED_FIELDS) == {"players": 3}
+    database = SQLiteDatabase(sqlite_path, INDEXED_FIELDS, SORTED_FIELDS)
+    assert [(player.doc_id, player["firstname"]) for player in database.table('players').all()] \
+        == [(1, "Joueur1"), (2, "Joueur2"), (3, "Joueur3")]
+    database.close()
+    # la base copiée n'était utilisée par aucun programme: son verrou n'est pas laissé
+    assert sorted(os.listdir(tmp_path)) == ["db.json", "db.sqlite3"]
+
+
+def test_copy_refuses_an_existing_database_unless_replaced(tmp_path):
+    json_path, sqlite_path = str(tmp_path / "db.json"), str(tmp_path / "db.sqlite3")
+    write_json_database(json_path, 3)
+    migrate_json_to_sqlite(json_path, sqlite_path, INDEXED_FIELDS, SORTED_FIELDS)
+    write_json_database(json_path, 5)
+    with pytest.raises(FileExistsError):
+        migrate_json_to_sqlite(json_path, sqlite_path, INDEXED_FIELDS, SORTED_FIELDS)
+    assert migrate_json_to_sqlite(json_path, sqlite_path, INDEXED_FIELDS, SORTED_FIELDS,
+                                  replace=True) == {"players": 5}
+    database = SQLiteDatabase(sqlite_path, INDEXED_FIELDS, SORTED_FIELDS)
+    assert len(database.table('players')) == 5
+    database.close()
+
+
+def test_failed_copy_leaves_the_existing_database(tmp_path, monkeypatch):
+    json_path, sqlite_path = str(tmp_path / "db.json"), str(tmp_path / "db.sqlite3")
+    write_json_database(json_path, 3)
+    migrate_json_to_sqlite(json_path, sqlite_path, INDEXED_FIELDS, SORTED_FIELDS)
+    write_json_database(json_path, 5)
+
+    def fail(self, documents, doc_ids=None):
+        raise OSError("disque plein")
+    with monkeypatch.context() as patch:
+        patch.setattr("src.sqlite_engine.SQLiteTable.insert_multiple", fail)
+        with pytest.raises(OSError):
+            migrate_json_to_sqlite(json_path, sqlite_path, INDEXED_FIELDS, SORTED_FIELDS, replace=True)
+    assert sorted(os.listdir(tmp_path)) == ["db.json", "db.sqlite3"]
+    database = SQLiteDatabase(sqlite_path, INDEXED_FIELDS, SORTED_FIELDS)
+    assert len(database.table('players')) == 3
+    database.close()
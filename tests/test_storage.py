@@ -0,0 +1,91 @@
+"""
+Sharing of db.json between programs: lock, versions and conflicts.
+"""
+import multiprocessing
+
+import pytest
+
+from src import controller, settings, storage
+from src.controller import unit_of_work
+from src.models import STORAGES, Database, Player, close_database, db
+from src.storage import CachedJSONStorage, ConflictError
+from tests.helpers import create_players
+
+
+def other_program(path):
+    """ Open the database a second time, as another program would """
+    return Database(path, storage=STORAGES[settings.DB_STORAGE])
+
+
+class Actions:
+    """ Controller actions writing the database while another program writes it too """
+    attempts = 0
+    conflicting_attempts = 1
+
+    @classmethod
+    @unit_of_work
+    def create_player_during_a_write(cls):
+        cls.attempts += 1
+        player_id = len(Player.__table__) + 1
+        Player.__table__.insert({"firstname": "Judit", "lastname": "Polgar", "elo": 2735, "id": player_id})
+        if cls.attempts <= cls.conflicting_attempts:
+            other = other_program(settings.JSON_DB_PATH)
+            other.table('players').insert({"firstname": "Garry", "lastname": "Kasparov", "elo": 2812,
+                                           "id": player_id})
+            other.close()
+        return player_id
+
+
+def test_a_write_based_on_old_data_raises_conflict_error(json_database):
+    first = Database(json_database, storage=CachedJSONStorage)
+    second = Database(json_database, storage=CachedJSONStorage)
+    with pytest.raises(ConflictError):
+        with first.transaction():
+            first.table('players').all()
+            second.table('players').insert({"id": 1})
+            first.table('players').insert({"id": 2})
+    assert [player["id"] for player in first.table('players').all()] == [1]
+
+
+def test_a_conflicting_action_is_done_again_on_the_new_data(json_database, monkeypatch):
+    monkeypatch.setattr(Actions, "attempts", 0)
+    player_id = Actions.create_player_during_a_write()
+    assert Actions.attempts == 2
+    close_database()
+    assert sorted(player["firstname"] for player in db.table('players').all()) == ["Garry", "Judit"]
+    assert player_id == 2
+
+
+def test_conflict_error_is_raised_after_the_last_attempt_without_lock(json_database, monkeypatch):
+    # sans fcntl le verrou ne protège pas la nouvelle tentative, seules les versions sont vérifiées
+    monkeypatch.setattr(storage, "fcntl", None)
+    monkeypatch.setattr(controller, "CONFLICT_BACKOFF", 0)
+    monkeypatch.setattr(Actions, "attempts", 0)
+    monkeypatch.setattr(Actions, "conflicting_attempts", controller.CONFLICT_ATTEMPTS)
+    with pytest.raises(ConflictError):
+        Actions.create_player_during_a_write()
+    assert Actions.attempts == controller.CONFLICT_ATTEMPTS
+
+
+def create_players_in_a_process(path, count):
+    """ Create players from another process, return the number of actions which failed """
+    settings.JSON_DB_PATH = path
+    failed = 0
+    for _ in range(count):
+        try:
+            create_players(1)
+        except ConflictError:
+            failed += 1
+    close_database()
+    return failed
+
+
+def test_concurrent_programs_lose_no_action(json_database):
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(3) as pool:
+        failed = pool.starmap(create_players_in_a_process, [(json_database, 30)] * 3)
+    assert failed == [0, 0, 0]
+    close_database()
+    players = db.table('players').all()
+    assert len(players) == 90
+    assert len({player["id"] for player in players}) == 90
@@ -0,0 +1,48 @@
+"""
+Tie-breaks computed from the arrays of the opponents and of the results, on small tournaments computed by hand.
+"""
+import numpy as np
+
+from src.tiebreaks import TIEBREAKS, format_tiebreaks, opponent_arrays, tiebreak_values
+
+
+def test_tiebreaks_of_a_tournament_without_bye():
+    # les parties sont données dans le désordre: les colonnes suivent l'id des rounds
+    opponents, results = opponent_arrays([10, 20, 30, 40], [7, 7, 5, 5], [10, 20, 10, 30], [30, 40, 20, 40],
+                                         [0.5, 1, 1, 0.5], [0.5, 0, 0, 0.5])
+    assert opponents.tolist() == [[1, 2], [0, 3], [3, 0], [2, 1]]
+    assert results.tolist() == [[1, 0.5], [0, 1], [0.5, 0.5], [0.5, 0]]
+    values = tiebreak_values(list(TIEBREAKS), opponents, results)
+    assert values.tolist() == [[2, 1, 1.5, 2.5, 1],
+                               [2, 1.5, 0.5, 1, 1],
+                               [2, 1.5, 1, 1.5, 0],
+                               [2, 1, 0.5, 1, 0]]
+
+
+def test_bye_counts_in_the_score_but_not_in_the_opponents():
+    opponents, results = opponent_arrays([1, 2, 3], [1, 2], [1, 3], [2, 1], [1, 1], [0, 0],
+                                         bye_rounds=[1, 2], bye_players=[3, 2])
+    assert opponents.tolist() == [[1, 2], [0, -1], [-1, 0]]
+    assert results.tolist() == [[1, 0], [0, 1], [1, 1]]
+    values = tiebreak_values(list(TIEBREAKS), opponents, results)
+    assert values.tolist() == [[3, 2, 1, 2, 1],
+                               [1, 0, 0, 1, 0],
+                               [1, 0, 1, 3, 1]]
+
+
+def test_tiebreaks_follow_the_order_of_the_criteria():
+    opponents, results = opponent_arrays([1, 2], [1], [1], [2], [1], [0])
+    assert tiebreak_values(["wins", "buchholz"], opponents, results).tolist() == [[1, 0], [0, 1]]
+    assert tiebreak_values([], opponents, results).shape == (2, 0)
+
+
+def test_tournament_without_games_has_no_column():
+    opponents, results = opponent_arrays([1, 2], [], [], [], [], [])
+    assert opponents.shape == (2, 0)
+    assert tiebreak_values(["buchholz_cut1"], opponents, results).tolist() == [[0], [0]]
+    assert np.all(results == 0)
+
+
+def test_format_tiebreaks():
+    assert format_tiebreaks({"buchholz": 6.0, "sonneborn_berger": 4.5}) == "Buchholz 6, Sonneborn-Berger 4.5"
+    assert format_tiebreaks(None) == ""
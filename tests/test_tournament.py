@@ -0,0 +1,220 @@
+"""
+Tournaments played through the controller: creation, rounds, results and reports, with both engines.
+"""
+import pytest
+
+from src.controller import AppController
+from src.models import Tournament, database_version, db
+from tests.helpers import create_players, create_tournament, forget_standings, play_round
+
+
+def report(choice, tournament_id, round_choice=None):
+    return list(AppController.get_report(choice, tournament_choice=tournament_id, sorting="c",
+                                         round_choice=round_choice))
+
+
+def test_report_5_lists_the_games_of_a_round_without_results(database):
+    tournament_id = create_tournament(create_players(4))
+    AppController.generate_tour(tournament_id)
+    rows = report(5, tournament_id, 1)
+    assert len(rows) == 2
+    assert all(row[2] == "Score: 0 - 0" for row in rows)
+
+
+def test_reports_are_read_page_by_page(database):
+    create_players(5)
+    everyone = list(AppController.get_report(1, sorting="a"))
+    assert len(everyone) == 5
+    assert list(AppController.get_report(1, sorting="a", offset=1, limit=2)) == everyone[1:3]
+    assert list(AppController.get_report(1, sorting="a", offset=4, limit=2)) == everyone[4:]
+
+
+def test_report_5_after_partial_then_complete_results(database):
+    tournament_id = create_tournament(create_players(4))
+    AppController.generate_tour(tournament_id)
+    games, round_id = AppController.get_game_list(tournament_id)
+    assert AppController.submit_round_results(tournament_id, round_id, [(games[0].match_id, 1, 0)]) \
+        == ([], [games[1].match_id])
+    assert [row[2] for row in report(5, tournament_id, 1)] == ["Score: 1 - 0", "Score: 0 - 0"]
+    assert AppController.submit_round_results(tournament_id, round_id, [(games[1].match_id, 0.5, 0.5)]) == ([], [])
+    assert [row[2] for row in report(5, tournament_id, 1)] == ["Score: 1 - 0", "Score: 0.5 - 0.5"]
+
+
+def test_invalid_results_are_rejected_and_nothing_is_saved(database):
+    tournament_id = create_tournament(create_players(4))
+    AppController.generate_tour(tournament_id)
+    games, round_id = AppController.get_game_list(tournament_id)
+    errors, _ = AppController.submit_round_results(tournament_id, round_id,
+                                                   [(games[0].match_id, 1, 0), (games[1].match_id, 1, 1)])
+    assert errors
+    assert all(game.score_one + game.score_two == 0 for game in AppController.get_game_list(tournament_id)[0])
+
+
+def test_results_of_a_round_of_another_tournament_are_rejected(database):
+    players = create_players(4)
+    first, second = create_tournament(players), create_tournament(players)
+    AppController.generate_tour(first)
+    games, round_id = AppController.get_game_list(first)
+    errors, _ = AppController.submit_round_results(second, round_id, [(game.match_id, 1, 0) for game in games])
+    assert errors == [f"le round {round_id} n'est pas un round commencé du tournoi {second}"]
+    assert all(entry["score"] == 0 for entry in Tournament.get_standings(second))
+    assert all(game.score_one + game.score_two == 0 for game in AppController.get_game_list(first)[0])
+
+
+def test_round_entered_result_by_result_ends_with_its_last_result(database):
+    tournament_id = create_tournament(create_players(4), nb_rounds=1)
+    AppController.generate_tour(tournament_id)
+    games, round_id = AppController.get_game_list(tournament_id)
+    matchs_results = []
+    AppController.set_tour_results(matchs_results, round_id, tournament_id, games[0].match_id, 1, 0)
+    assert not db.table('rounds').get_by(round_id=round_id)["ending_date"]
+    assert not Tournament.get_tournament(tournament_id)["ending_date"]
+    AppController.set_tour_results(matchs_results, round_id, tournament_id, games[1].match_id, 0, 1)
+    assert db.table('rounds').get_by(round_id=round_id)["ending_date"]
+    assert Tournament.get_tournament(tournament_id)["ending_date"]
+
+
+def test_swiss_tournament_is_played_to_the_end(database):
+    players = create_players(6)
+    tournament_id = create_tournament(players, nb_rounds=3)
+    for _ in range(3):
+        play_round(tournament_id)
+    assert AppController.generate_tour(tournament_id) is None
+    tournament = Tournament.get_tournament(tournament_id)
+    assert tournament["ending_date"]
+    # 9 parties jouées, sans qu'aucune paire ne se rencontre deux fois
+    assert len(tournament["played_pairs"]) == 9
+    assert sum(entry["score"] for entry in tournament["standings"]) == 9
+
+
+def test_new_order_of_the_tiebreaks_ranks_the_standings_again(database):
+    tournament_id = create_tournament(create_players(6), nb_rounds=3)
+    for _ in range(2):
+        play_round(tournament_id)
+    standings = AppController.set_tiebreaks(tournament_id, ["progressive", "wins"])
+    assert all(len(entry["tiebreaks"]) == 2 for entry in standings)
+    assert [entry["rank"] for entry in standings] == list(range(1, 7))
+    keys = [(entry["score"], *entry["tiebreaks"], entry["elo"]) for entry in standings]
+    assert keys == sorted(keys, reverse=True)
+    tournament = Tournament.get_tournament(tournament_id)
+    assert tournament["tiebreaks"] == ["progressive", "wins"]
+    assert tournament["standings"] == standings
+
+
+def test_next_round_waits_for_the_results(database):
+    tournament_id = create_tournament(create_players(4))
+    AppController.generate_tour(tournament_id)
+    assert AppController.generate_tour(tournament_id) is False
+
+
+def test_unknown_players_cancel_the_creation(database):
+    players = create_players(2)
+    with pytest.raises(ValueError, match="joueurs inexistants"):
+        create_tournament(players + [999])
+    assert list(Tournament.get_all_tournaments()) == []
+
+
+def test_round_robin_rounds_are_saved_at_creation_and_started_one_by_one(database):
+    players = create_players(5)
+    tournament_id = create_tournament(players, system="round_robin")
+    assert Tournament.get_tournament(tournament_id)["nb_rounds"] == 5
+    assert len(db.table('rounds').search_by(tournament_id=tournament_id)) == 5
+    assert len(db.table('matchs').search_by(tournament_id=tournament_id)) == 10
+    assert AppController.get_game_list(tournament_id) == ([], None)
+    assert [row[1] for row in report(4, tournament_id)] == ["Date de début: à venir"] * 5
+    assert report(5, tournament_id, 1) == []
+
+    for _ in range(5):
+        games = play_round(tournament_id)
+        assert len(games) == 2
+    assert AppController.generate_tour(tournament_id) is None
+    tournament = Tournament.get_tournament(tournament_id)
+    assert sorted(tournament["byes"]) == sorted(players)
+    assert len(tournament["played_pairs"]) == 10
+    # chaque joueur gagne ou perd ses 4 parties, et marque le point de son exemption
+    assert sum(entry["score"] for entry in tournament["standings"]) == 10 + 5
+
+
+def test_round_robin_rejects_another_number_of_rounds(database):
+    with pytest.raises(ValueError, match="se joue en 3 rounds"):
+        create_tournament(create_players(3), system="round_robin", nb_rounds=4)
+
+
+def test_generate_rounds_mixes_swiss_and_round_robin(database):
+    players = create_players(6)
+    swiss = create_tournament(players)
+    scheduled = create_tournament(players[:4], system="double_round_robin")
+    results, _ = AppController.generate_rounds([swiss, scheduled], workers=1)
+    assert [result["round"]["name"] for result in results] == ["Round 1", "Round 1"]
+    results, _ = AppController.generate_rounds([swiss, scheduled], workers=1)
+    assert [result["round"] for result in results] == [False, False]
+
+
+def test_standings_read_from_an_older_tournament_leaves_its_document_untouched(database):
+    tournament_id = create_tournament(create_players(4))
+    document = db.table('tournaments').get_by(id=tournament_id)
+
+    def without_tiebreaks(fields):
+        # classement enregistré avant les départages
+        fields.pop("tiebreaks")
+        fields["standings"] = [{key: value for key, value in entry.items() if key != "tiebreaks"}
+                               for entry in fields["standings"]]
+    db.table('tournaments').update(without_tiebreaks, doc_ids=[document.doc_id])
+    older = db.table('tournaments').get_by(id=tournament_id)
+    assert all("tiebreaks" in entry for entry in Tournament.compute_standings(older))
+    assert all("tiebreaks" not in entry for entry in db.table('tournaments').get_by(id=tournament_id)["standings"])
+
+
+def test_failed_update_leaves_the_saved_standings_untouched(database, monkeypatch):
+    players = create_players(4)
+    tournament_id = create_tournament(players)
+    saved = [dict(entry) for entry in Tournament.get_standings(tournament_id)]
+
+    def fail(tournament, criteria):
+        raise RuntimeError("départages impossibles")
+    with monkeypatch.context() as patch:
+        patch.setattr(Tournament, "compute_tiebreaks", fail)
+        with pytest.raises(RuntimeError):
+            Tournament.update_standings(tournament_id, {players[3]: 1})
+    assert Tournament.get_standings(tournament_id) == saved
+
+
+def test_generate_rounds_of_several_tournaments(database):
+    players = create_players(6)
+    tournaments = [create_tournament(players), create_tournament(players[:4])]
+    results, _ = AppController.generate_rounds(tournaments, workers=1)
+    assert [result["round"]["name"] for result in results] == ["Round 1", "Round 1"]
+    results, _ = AppController.generate_rounds(tournaments, workers=1)
+    assert [result["round"] for result in results] == [False, False]
+
+
+def test_generate_rounds_reads_again_a_tournament_changed_before_the_write(database, monkeypatch):
+    tournament_id = create_tournament(create_players(4))
+    pairing_snapshot = Tournament.pairing_snapshot
+
+    def snapshot_then_generate(tournament_id):
+        # un autre poste génère le round entre la lecture et l'écriture
+        snapshot = pairing_snapshot(tournament_id)
+        monkeypatch.setattr(Tournament, "pairing_snapshot", pairing_snapshot)
+        AppController.generate_tour(tournament_id)
+        return snapshot
+
+    monkeypatch.setattr(Tournament, "pairing_snapshot", snapshot_then_generate)
+    results, _ = AppController.generate_rounds([tournament_id], workers=1)
+    assert results[0]["round"] is False
+    assert [round["name"] for round in db.table('rounds').search_by(tournament_id=tournament_id)] == ["Round 1"]
+
+
+def test_pairing_snapshot_of_an_older_tournament_writes_nothing(database):
+    tournament_id = create_tournament(create_players(4))
+    forget_standings(tournament_id)
+    version = database_version()
+    snapshot = Tournament.pairing_snapshot(tournament_id)
+    assert database_version() == version
+    assert snapshot["ranking"] == [1, 2, 3, 4]
+    assert "standings" not in db.table('tournaments').get_by(id=tournament_id)
+    # le round est enregistré avec le classement
+    results, _ = AppController.generate_rounds([tournament_id], workers=1)
+    assert results[0]["round"]["name"] == "Round 1"
+    assert [entry["player_id"] for entry in db.table('tournaments').get_by(id=tournament_id)["standings"]] \
+        == [1, 2, 3, 4]
@@ -0,0 +1,55 @@
+"""
+Transactions grouping the writes of a user action into a single write of db.json.
+"""
+import pytest
+
+from src import settings
+from src.models import STORAGES, Database, db, transaction
+from src.storage import CachedJSONStorage
+
+
+@pytest.fixture
+def flushes(json_database, monkeypatch):
+    """ Count the writes of the database files, by either storage, once the migrations are saved """
+    db.table('migrations').all()
+    count = []
+    commit = CachedJSONStorage._commit
+
+    def counted_commit(storage):
+        count.append(storage)
+        commit(storage)
+
+    monkeypatch.setattr(CachedJSONStorage, "_commit", counted_commit)
+    return count
+
+
+def test_writes_of_a_transaction_are_saved_once_at_the_end(json_database, flushes):
+    with transaction():
+        for number in range(1, 4):
+            db.table('players').insert({"id": number, "elo": 2000})
+        with transaction():
+            db.table('players').update({"elo": 2100}, doc_ids=[1])
+        assert not flushes
+        other = Database(json_database, storage=STORAGES[settings.DB_STORAGE])
+        assert other.table('players').all() == []
+        other.close()
+    assert len(flushes) == 1
+    assert [player["elo"] for player in db.table('players').all()] == [2100, 2000, 2000]
+
+
+def test_failed_transaction_saves_nothing(json_database, flushes):
+    db.table('players').insert({"id": 1, "elo": 2000})
+    with pytest.raises(RuntimeError):
+        with transaction():
+            db.table('players').update({"elo": 2100}, doc_ids=[1])
+            db.table('players').insert({"id": 2, "elo": 1900})
+            raise RuntimeError
+    assert len(flushes) == 1
+    assert [player["elo"] for player in db.table('players').all()] == [2000]
+    assert db.table('players').get_by(id=2) is None
+
+
+def test_writes_outside_a_transaction_are_saved_each_time(json_database, flushes):
+    db.table('players').insert({"id": 1, "elo": 2000})
+    db.table('players').update({"elo": 2100}, doc_ids=[1])
+    assert len(flushes) == 2